@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# cold import time of the modules in lib, each imported in a fresh interpreter (as a CLI run or a spawned worker process would)
+import os, sys, json, argparse, subprocess, statistics
+
+LIB_HOME = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'lib')
+# modules importable without blender (blender, dev and orbital drivers need bpy at use)
+MODULES = ['solarsystem', 'planet', 'moon', 'sun', 'data', 'texture', 'batch', 'snapshot', 'query', 'export', 'catalog', 'culling']
+# dependencies which must not be imported by merely importing a module of this package
+HEAVY = ['numpy', 'requests', 'PIL', 'imageio', 'scipy', 'bpy']
+
+# NOTE: runs in the child interpreter, prints the import time (ms), the heavy modules it loaded, and any working directory change or stdout output
+PROBE = """
+import os, sys, io, time, json
+sys.path.insert(0, {lib!r})
+cwd, out = os.getcwd(), sys.stdout
+sys.stdout = io.StringIO()
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+printed, sys.stdout = sys.stdout.getvalue(), out
+print(json.dumps({{'ms': elapsed, 'heavy': [i for i in {heavy!r} if i in sys.modules], 'chdir': os.getcwd() != cwd, 'printed': printed}}))
+"""
+
+
+def probe(module: str) -> dict:
+    """
+    Imports a module in a fresh interpreter, returns dict with keys ms, heavy, chdir and printed
+    """
+    code = PROBE.format(lib=LIB_HOME, module=module, heavy=HEAVY)
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit {result.returncode}"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__ or "cold import time of the modules in lib")
+    parser.add_argument('modules', nargs='*', default=MODULES, help=f"modules to import (default: {' '.join(MODULES)})")
+    parser.add_argument('-n', '--repeat', type=int, default=5, help="imports per module, the median is reported (default: 5)")
+    parser.add_argument('--budget', type=float, default=None, help="fail when the median import time of a module exceeds this many ms")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args(argv)
+    results, failed = {}, False
+    for module in args.modules:
+        runs = [probe(module) for _ in range(args.repeat)]
+        errors = [i['error'] for i in runs if 'error' in i]
+        if errors:
+            results[module] = {'error': errors[0]}
+            failed = True
+            continue
+        result = {
+            'ms': statistics.median(i['ms'] for i in runs),
+            'heavy': runs[0]['heavy'],
+            'chdir': runs[0]['chdir'],
+            'printed': bool(runs[0]['printed'])
+        }
+        # NOTE: an import is side-effect free when it changes no working directory, prints nothing and loads no heavy dependency
+        result['ok'] = not (result['heavy'] or result['chdir'] or result['printed']) and (args.budget == None or result['ms'] <= args.budget)
+        failed = failed or not result['ok']
+        results[module] = result
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for module, result in results.items():
+            if 'error' in result:
+                print(f"{module:<12} ERROR   {result['error']}")
+            else:
+                notes = [f"loaded {', '.join(result['heavy'])}"] if result['heavy'] else []
+                notes += ["changed the working directory"] if result['chdir'] else []
+                notes += ["printed to stdout"] if result['printed'] else []
+                print(f"{module:<12} {'ok' if result['ok'] else 'FAIL':<7} {result['ms']:8.1f} ms  {'; '.join(notes)}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
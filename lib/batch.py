@@ -0,0 +1,114 @@
+# builds many solar systems (scaled variants of one catalog) across a process pool, each returned as a compact snapshot
+from __future__ import annotations
+import os, sys, time, threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+sys.path.extend([os.path.join('../', 'lib')])
+import registry
+import scaling
+from solarsystem import SolarSystem
+
+# catalogs loaded by this process, by path
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def catalog(path: str) -> SolarSystem:
+    """
+    Returns the SolarSystem of a snapshot file (see SolarSystem.save), loaded once per process into a registry context of its own and shared read-only by every system built from it
+
+    Parameters
+    ----------
+
+    path: str
+        filesystem path of the snapshot file (either layout)
+    """
+    path = os.path.abspath(path)
+    with _lock:
+        if path not in _catalogs:
+            _catalogs[path] = SolarSystem.load(path, context=registry.Context(f"catalog-{os.path.basename(path)}"))
+        return _catalogs[path]
+
+
+def _build(path: str, name: str, scale_data: dict, level: int) -> tuple:
+    # builds one system from a catalog for build, returns (snapshot bytes, seconds), the system never outlives its throwaway registry context
+    start = time.perf_counter()
+    context = registry.Context(f"batch-{name}")
+    try:
+        system = catalog(path).clone(scale_data, context=context)
+        system.name = name
+        data = system.dumps(level=level)
+    finally:
+        context.dispose()
+    return data, time.perf_counter() - start
+
+
+def build(path: str, variants, names: list = None, workers: int = None, executor: str = "process", chunksize: int = None, level: int = 1, report: bool = False, debug: bool = False):
+    """
+    Builds one SolarSystem per variant from a catalog snapshot, across a pool of workers, each system is returned as a compact snapshot (see SolarSystem.dumps, read one back with SolarSystem.loads)
+
+    Nothing is fetched from the data source: the catalog is read once per worker (process pools started with fork share the copy already loaded by the caller), and every system is a clone of it scaled by its variant (see SolarSystem.clone).
+
+        results, stats = batch.build('solarsystem.snap', [{'planet': {'scale_dist': d}} for d in (3.0, 3.2, 3.4)], report=True)
+        systems = [SolarSystem.loads(i) for i in results]
+
+    Parameters
+    ----------
+
+    path: str
+        filesystem path of the catalog snapshot (written by SolarSystem.save, either layout)
+    variants: int|list
+        scale data of each system (dict|scaling.ScaleProfile, None keeps the scale state of the catalog), or a number of systems to build with the scale state of the catalog
+    names: list
+        name of each system (default: '<catalog name>-<n>')
+    workers: int
+        number of workers (default: os.cpu_count()), 1 builds every system in the calling process
+    executor: str
+        'process' or 'thread' pool (default: 'process')
+    chunksize: int
+        number of systems sent to a worker at once (default: spread evenly, 4 chunks per worker)
+    level: int
+        zlib compression level of the snapshots (default: 1)
+    report: bool
+        also return a dict with keys systems, workers, executor, seconds, systems_per_sec, bytes and build_seconds (the time spent building, summed over systems) (default: False)
+    debug: bool
+        print info messages
+
+    Returns
+    -------
+    list of bytes (in variant order), or (list of bytes, dict) when report is True
+    """
+    if executor not in ('thread', 'process'):
+        raise ValueError(f"executor must be 'thread' or 'process', got {executor!r}")
+    start = time.perf_counter()
+    path = os.path.abspath(path)
+    base = catalog(path)
+    variants = [None] * variants if isinstance(variants, int) else list(variants)
+    names = [f"{base.name}-{n}" for n in range(len(variants))] if names == None else list(names)
+    if len(names) != len(variants):
+        raise ValueError(f"got {len(names)} names for {len(variants)} variants")
+    # NOTE: scale data is compiled once here, workers receive plain dicts
+    jobs = [(path, name, None if i == None else scaling.profile(base.default_scale_data, i).todict(), level) for name, i in zip(names, variants)]
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        built = [_build(*i) for i in jobs]
+    else:
+        chunksize = chunksize or max(len(jobs) // (workers * 4), 1)
+        if executor == 'process':
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=catalog, initargs=(path,))
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers)
+        with pool as ex:
+            built = list(ex.map(_build, *zip(*jobs), chunksize=chunksize))
+    results = [i[0] for i in built]
+    seconds = time.perf_counter() - start
+    stats = {
+        'systems': len(results),
+        'workers': workers,
+        'executor': executor if workers > 1 else 'serial',
+        'seconds': seconds,
+        'systems_per_sec': len(results) / seconds if seconds > 0 else float('inf'),
+        'bytes': sum(len(i) for i in results),
+        'build_seconds': sum(i[1] for i in built)
+    }
+    print(f"INFO: built {stats['systems']} systems in {seconds:.3f}s ({stats['systems_per_sec']:.1f} systems/sec, {workers} {stats['executor']} workers)") if debug else None
+    return (results, stats) if report else results
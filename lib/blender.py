@@ -7,6 +7,7 @@ import bpy_types
 import math, mathutils
 from mathutils import Vector
 import utilz
+import culling
 # test adding the Planet and Moon class back for proper typing
 #from planet import Planet
 #from moon import Moon
@@ -398,21 +399,46 @@ def add_orbital_drivers(planet):
     return xdriver, ydriver, zdriver
 
 
-def plot_natural_satellites(planet, sub_divisions: int = 100, prettify: bool = True, debug: bool = False):
+def pixel_scale(planet, camera=None) -> float:
+    """
+    planet: Planet (pass in Planet object, its empty must exist)
+    camera: bpy_types.Object (default: the scene camera)
+    Returns the approximate number of pixels per scene unit at the planets distance from the camera (see culling.screen_sizes), None when the scene has no camera
+    """
+    scene = bpy.context.scene
+    camera = scene.camera if camera == None else camera
+    if camera == None:
+        return None
+    width = scene.render.resolution_x * scene.render.resolution_percentage / 100
+    if camera.data.type == 'ORTHO':
+        return width / camera.data.ortho_scale
+    distance = (camera.matrix_world.translation - bpy.data.objects[f"empty_{planet.englishName}"].matrix_world.translation).length
+    return width * camera.data.lens / (camera.data.sensor_width * max(distance, 1e-9))
+
+
+def plot_natural_satellites(planet, sub_divisions: int = 100, prettify: bool = True, moons: list = None, limits: dict = None, min_pixels: float = 0.0, debug: bool = False):
     """
     planet: Planet (pass in Planet object)
     sub_divisions: int (the number of divisions to cut plane into)
     prettify: bool (use some fancy logix to try to keep the scene looking good)
+    moons: list (the moons to plot, eg. Hierarchy.children(planet), default: planet.moonData)
+    limits: dict (overrides of Moon._limits['moon'] in raw units, moons outside the limits are not plotted, {} applies Moon._limits as is, default: None, every moon is plotted)
+    min_pixels: float (moons with a smaller on-screen diameter from the scene camera are not plotted, default: 0, no minimum)
     debug: bool (output informational messages)
     adds known natural satellites, an orbital path for each, and adds follow path constraint to satellite object, each object is parented to it's owning planets empty
     NOTE: The follow path constraint is used for orbital motion 
-    TODO:  add z-euler rotation driver for axial rotation, add checks for moon limits here, add force fields, fix rotation speeds to be based on the sideralOrbit period for the moon
+    NOTE: with limits or min_pixels, moons are filtered (see culling.cull) before any blender object is created
+    TODO:  add z-euler rotation driver for axial rotation, add force fields, fix rotation speeds to be based on the sideralOrbit period for the moon
     """
-    moons = planet.moonData
+    moons = planet.moonData if moons == None else moons
+    if limits != None or min_pixels:
+        moons, excluded = culling.cull(moons, culling.limits(limits) if limits != None else {}, min_pixels=min_pixels, pixel_scale=pixel_scale(planet) if min_pixels else None, debug=debug)
+        print(f"INFO: excluded {len(excluded)} moons of {planet.englishName} from plotting") if debug else None
     planetEquaDiameter = planet.equaRadius*2 
     planetMajorAxis = planet.semimajorAxis*2
     planetName = planet.englishName
-    print(f"INFO: will process {len(planet.moonData)} moons for {planet.englishName}") if debug else None
+    moonObject = None
+    print(f"INFO: will process {len(moons)} moons for {planet.englishName}") if debug else None
     for moon in moons:
         print(f"INFO: processing {moon.englishName}") if debug else None
         # NOTE: if the moons semimajorAxis*2 is less than the planets equaDiameter, the moon will be INSIDE the planet. solution Moon.semimajorAxis=(semimajorAxis*2)+planetEquaDiameter; Moon.semiminorAxis=(semiminorAxis*2)+planetEquaDiameter
@@ -523,7 +549,7 @@ def plot_natural_satellites(planet, sub_divisions: int = 100, prettify: bool = T
         override={'constraint':empty.constraints["Follow Path"]}
         bpy.ops.constraint.followpath_path_animate(override,constraint="Follow Path", owner='OBJECT')
         insert_custom_attributes(f"empty_{moon.englishName}", moon, debug=debug)
-        return moonObject
+    return moonObject
 
 def plot_atmosphere(planet, sub_divisions: int = 100, black_val: float = 0.460, white_val: float = 0.640, noise_scale: float = 9.6, noise_detail: float = 11.4, debug: bool = False ):
     """
@@ -831,6 +857,38 @@ def plot_sun(sun, sub_divisions: int = 100, debug: bool = False):
     return plane 
 
 #/Users/photon/Downloads/Spherical/SPACE013SX.hdr
+def plot_system(system, sub_divisions: int = 100, drivers: bool = True, limits: dict = None, min_pixels: float = 0.0, report: bool = False, debug: bool = False):
+    """
+    system: SolarSystem (pass in SolarSystem object)
+    sub_divisions: int (the number of subdivisions for plane primitives)
+    drivers: bool (add orbital drivers to each planet)
+    limits: dict (overrides of Moon._limits['moon'] in raw units, moons outside the limits are not plotted, {} applies Moon._limits as is, default: None, every moon is plotted)
+    min_pixels: float (moons with a smaller on-screen diameter from the scene camera are not plotted, default: 0, no minimum)
+    report: bool (also return the excluded moons, dict of planet englishName -> list of dicts with keys index, id and reasons, see culling.cull)
+    debug: bool (output informational messages)
+    plots the sun, every planet and the moons of every planet in depth order, walking SolarSystem.hierarchy() (parents are always plotted before their children)
+    NOTE: you should call SolarSystem.scale_solar_system() first
+    """
+    tree = system.hierarchy()
+    for body, depth in tree.traverse():
+        if depth == 0:
+            plot_sun(body, sub_divisions=sub_divisions, debug=debug)
+        elif depth == 1:
+            plot_planet(body, sub_divisions=sub_divisions, debug=debug)
+            add_orbital_drivers(body) if drivers else None
+        else:
+            break
+    # NOTE: moons are plotted per planet, the planets empty (empty_<englishName>) exists by now
+    excluded = {}
+    for planet in tree.level(1):
+        moons = tree.children(planet)
+        if moons and (limits != None or min_pixels):
+            moons, excluded[planet.englishName] = culling.cull(moons, culling.limits(limits) if limits != None else {}, min_pixels=min_pixels, pixel_scale=pixel_scale(planet) if min_pixels else None, debug=debug)
+        plot_natural_satellites(planet, sub_divisions=sub_divisions, moons=moons, debug=debug) if moons else None
+    print(f"INFO: excluded {sum(len(i) for i in excluded.values())} moons from plotting") if debug else None
+    return (tree, excluded) if report else tree
+
+
 def plot_expanse(file_path):
     bpy.ops.image.open(filepath=file_path, directory=os.path.dirname(file_path), files=[{"name":f"{os.path.basename(file_path)}"}], relative_path=True, show_multiview=False)
     bpy.data.images[f"{os.path.basename(file_path)}"].colorspace_settings.name = 'sRGB'
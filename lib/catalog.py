@@ -0,0 +1,307 @@
+# vectorized loading of local exoplanet catalogs (CSV tables of host star and planet parameters) into Sun, Planet and SolarSystem objects, nothing is fetched from the data source
+from __future__ import annotations
+import os, sys, csv, math
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+np = utilz.lazy_import('numpy')
+import registry
+import scaling
+import schema
+import derived
+from sun import Sun
+from planet import Planet
+from moon import MoonData
+from solarsystem import SolarSystem
+
+AU_KM = 149597870.7
+EARTH_RADIUS_KM = 6371.0
+EARTH_MASS_KG = 5.9722e24
+SUN_RADIUS_KM = 695700.0
+SUN_MASS_KG = derived.SUN_MASS_KG
+
+#############################################################################################################
+# NOTE: COLUMNS maps each catalog field to (column name, factor converting the catalog unit to body units)  #
+#   the defaults are the column names (and units) of the NASA Exoplanet Archive planetary systems tables   #
+#   system, planet:  host star name, planet name                                                           #
+#   semimajorAxis:   au -> km                  eccentricity:  (none, missing values are taken as 0)        #
+#   sideralOrbit:    days (missing values are derived from the semimajor axis and the host star mass)      #
+#   meanRadius:      earth radii -> km         mass:          earth masses -> kg                           #
+#   inclination:     degrees                   sunRadius:     solar radii -> km                            #
+#   sunMass:         solar masses -> kg                                                                    #
+#############################################################################################################
+COLUMNS = {
+    "system": ("hostname", None),
+    "planet": ("pl_name", None),
+    "semimajorAxis": ("pl_orbsmax", AU_KM),
+    "eccentricity": ("pl_orbeccen", 1.0),
+    "sideralOrbit": ("pl_orbper", 1.0),
+    "meanRadius": ("pl_rade", EARTH_RADIUS_KM),
+    "mass": ("pl_bmasse", EARTH_MASS_KG),
+    "inclination": ("pl_orbincl", 1.0),
+    "sunRadius": ("st_rad", SUN_RADIUS_KM),
+    "sunMass": ("st_mass", SUN_MASS_KG)
+}
+
+
+def read(path: str, comment: str = "#") -> dict:
+    """
+    Reads a CSV catalog (one row per planet, with a header row) into columns, dict of column name -> np.ndarray (float64 when every value is a number or empty, nan for empty values, otherwise str)
+
+    Parameters
+    ----------
+
+    path: str
+        filesystem path of the CSV file
+    comment: str
+        lines starting with this prefix are skipped (default: '#', as in NASA Exoplanet Archive exports)
+    """
+    with open(path, newline='') as f:
+        rows = csv.reader(i for i in f if not i.startswith(comment) and i.strip())
+        header = next(rows, None)
+        if header == None:
+            return {}
+        values = list(zip(*rows)) or [() for _ in header]
+    columns = {}
+    for name, column in zip(header, values):
+        try:
+            columns[name.strip()] = np.array([i if i.strip() else 'nan' for i in column], dtype='float64')
+        except ValueError:
+            columns[name.strip()] = np.array(column, dtype=object)
+    return columns
+
+
+def _split(values: np.ndarray) -> tuple:
+    # splits values into (mantissa, exponent) arrays, as in the mass and vol dicts of the data source (massValue * 10**massExponent)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exponents = np.where(values > 0, np.floor(np.log10(values)), 0.0)
+    return values / 10.0**exponents, exponents.astype(np.int64)
+
+
+def bodies(columns: dict, mapping: dict = None) -> dict:
+    """
+    Computes the raw payload and derived values of every sun and planet of a catalog in one vectorized pass over its columns, rows which can not be modeled are rejected
+
+    A row is rejected when its semimajor axis, radius or mass is missing (or not positive), its eccentricity is not in [0, 1), or its orbital period is missing and can not be derived. Every planet of a system is rejected when the host star has no mass or radius.
+
+    Parameters
+    ----------
+
+    columns: dict
+        catalog columns (see catalog.read)
+    mapping: dict
+        overrides of catalog.COLUMNS, eg. {'semimajorAxis': ('a_au', catalog.AU_KM)}
+
+    Returns
+    -------
+    dict with keys systems (list of (name, sun state, list of planet states), in catalog order) and rejected (list of dicts with keys index, id and reasons, like MoonData.rejected)
+    """
+    mapping = dict(COLUMNS, **(mapping or {}))
+    rows = len(next(iter(columns.values()))) if columns else 0
+
+    def column(field: str, numeric: bool = True) -> np.ndarray:
+        name, factor = mapping[field]
+        if name not in columns:
+            return np.full(rows, np.nan) if numeric else np.array([f"{field}-{i}" for i in range(rows)], dtype=object)
+        values = columns[name]
+        if not numeric:
+            return np.array([str(i).strip() for i in values], dtype=object)
+        values = values if values.dtype == np.float64 else np.array([_float(i) for i in values], dtype='float64')
+        return values * factor if factor != None else values
+
+    hosts, names = column("system", numeric=False), column("planet", numeric=False)
+    axis, radius, mass = column("semimajorAxis"), column("meanRadius"), column("mass")
+    eccentricity = np.nan_to_num(column("eccentricity"), nan=0.0)
+    inclination = np.nan_to_num(column("inclination"), nan=0.0)
+    sun_radius, sun_mass = column("sunRadius"), column("sunMass")
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # NOTE: missing orbital periods follow from Kepler's third law around the host star
+        kepler = 2.0 * np.pi * np.sqrt((axis * 1e3)**3 / (derived.G * sun_mass)) / derived.SECONDS_PER_DAY
+        period = np.where(np.isnan(column("sideralOrbit")), kepler, column("sideralOrbit"))
+        checks = (
+            (schema.Rejection("semimajorAxis", "value", "semimajorAxis must be a positive number"), np.isfinite(axis) & (axis > 0)),
+            (schema.Rejection("meanRadius", "value", "meanRadius must be a positive number"), np.isfinite(radius) & (radius > 0)),
+            (schema.Rejection("mass", "value", "mass must be a positive number"), np.isfinite(mass) & (mass > 0)),
+            (schema.Rejection("eccentricity", "value", "eccentricity must be in [0, 1)"), (eccentricity >= 0) & (eccentricity < 1)),
+            (schema.Rejection("sideralOrbit", "value", "sideralOrbit is missing and can not be derived"), np.isfinite(period) & (period > 0)),
+            (schema.Rejection("sun", "value", "the host star has no mass or radius"), np.isfinite(sun_mass) & (sun_mass > 0) & np.isfinite(sun_radius) & (sun_radius > 0))
+        )
+        valid = np.logical_and.reduce([i[1] for i in checks])
+        minor = axis * np.sqrt(1.0 - eccentricity**2)
+        volume = 4.0 / 3.0 * np.pi * radius**3
+        sun_volume = 4.0 / 3.0 * np.pi * sun_radius**3
+        gravity = derived.G * mass / (radius * 1e3)**2
+        density = mass / (volume * 1e9) / 1e3
+        au = axis * scaling.KM_IN_AU
+        harmonic = au**3 / period**2
+    mass_value, mass_exponent = _split(mass)
+    vol_value, vol_exponent = _split(volume)
+    sun_mass_value, sun_mass_exponent = _split(sun_mass)
+    sun_vol_value, sun_vol_exponent = _split(sun_volume)
+    # NOTE: raw magnitudes are recomputed from their (mantissa, exponent) pairs, as the constructors do (see scaling.magnitude)
+    mass, volume = scaling.magnitudes(mass_value, mass_exponent), scaling.magnitudes(vol_value, vol_exponent)
+    sun_mass = scaling.magnitudes(sun_mass_value, sun_mass_exponent)
+    rejected = []
+    for i in np.flatnonzero(~valid).tolist():
+        rejected.append({'index': i, 'id': names[i], 'reasons': [reason for reason, ok in checks if not ok[i]]})
+    # NOTE: every value is converted back to python numbers once, per column
+    columns_ = dict((k, v.tolist()) for k, v in {
+        'axis': axis, 'minor': minor, 'eccentricity': eccentricity, 'inclination': inclination, 'radius': radius, 'period': period,
+        'mass': mass, 'massValue': mass_value, 'massExponent': mass_exponent, 'volume': volume, 'volValue': vol_value, 'volExponent': vol_exponent,
+        'gravity': gravity, 'density': density, 'au': au, 'harmonic': harmonic, 'sunRadius': sun_radius, 'sunMass': sun_mass,
+        'sunMassValue': sun_mass_value, 'sunMassExponent': sun_mass_exponent, 'sunVolume': sun_volume, 'sunVolValue': sun_vol_value, 'sunVolExponent': sun_vol_exponent
+    }.items())
+    systems = {}
+    for i in np.flatnonzero(valid).tolist():
+        host = hosts[i]
+        if host not in systems:
+            systems[host] = (host, _sun_state(host, columns_, i), [])
+        systems[host][2].append(_planet_state(names[i], columns_, i))
+    return {'systems': list(systems.values()), 'rejected': rejected}
+
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _id(name: str) -> str:
+    return "".join(i for i in name.lower().replace(" ", "_") if i.isalnum() or i in "_-")
+
+
+def _sun_state(name: str, c: dict, i: int) -> dict:
+    # the attributes Sun.__init__ sets from a payload, for row i
+    payload = {
+        "id": _id(name),
+        "name": name,
+        "englishName": name,
+        "isPlanet": False,
+        "bodyType": "Star",
+        "semimajorAxis": 0,
+        "eccentricity": 0,
+        "inclination": 0,
+        "meanRadius": c['sunRadius'][i],
+        "equaRadius": c['sunRadius'][i],
+        "mass": {"massValue": c['sunMassValue'][i], "massExponent": c['sunMassExponent'][i]},
+        "vol": {"volValue": c['sunVolValue'][i], "volExponent": c['sunVolExponent'][i]},
+        "sideralOrbit": 0,
+        "sideralRotation": 0
+    }
+    state = dict(payload)
+    state.update({
+        "scaleMassExp": 0.0, "scaleSizeExp": 0.0, "scaleDistExp": 0.0, "scaleVolExp": 0.0,
+        "massValue": payload['mass']['massValue'],
+        "massExponent": payload['mass']['massExponent'],
+        "massRawKG": c['sunMass'][i],
+        "keys": list(payload.keys()) + ['massValue', 'massExponent', 'massRawKG', 'scaleMassExp', 'scaleSizeExp', 'scaleDistExp', 'scaleVolExp']
+    })
+    return state
+
+
+def _planet_state(name: str, c: dict, i: int) -> dict:
+    # the attributes Planet.__init__ sets from a payload, for row i
+    payload = {
+        "id": _id(name),
+        "name": name,
+        "englishName": name,
+        "isPlanet": True,
+        "bodyType": "Planet",
+        "moons": None,
+        "semimajorAxis": c['axis'][i],
+        "eccentricity": c['eccentricity'][i],
+        "inclination": c['inclination'][i],
+        "meanRadius": c['radius'][i],
+        "equaRadius": c['radius'][i],
+        "mass": {"massValue": c['massValue'][i], "massExponent": c['massExponent'][i]},
+        "vol": {"volValue": c['volValue'][i], "volExponent": c['volExponent'][i]},
+        "density": c['density'][i],
+        "gravity": c['gravity'][i],
+        "sideralOrbit": c['period'][i],
+        # NOTE: catalogs have no rotation periods, planets are taken to be tidally locked (hours)
+        "sideralRotation": c['period'][i] * 24.0,
+        "axialTilt": 0,
+        "aroundPlanet": None
+    }
+    state = dict(payload)
+    state.update({
+        "semiminorAxis": c['minor'][i],
+        "scaleMassExp": 0.0, "scaleSizeExp": 0.0, "scaleDistExp": 0.0, "scaleVolExp": 0.0,
+        "volValue": payload['vol']['volValue'],
+        "volExponent": payload['vol']['volExponent'],
+        "massValue": payload['mass']['massValue'],
+        "massExponent": payload['mass']['massExponent'],
+        "volumeRawKG": c['volume'][i],
+        "massRawKG": c['mass'][i],
+        "distanceFromSunInAU": c['au'][i],
+        "harmonicFrequency": c['harmonic'][i],
+        "keys": list(payload.keys()) + ['semiminorAxis', 'volValue', 'volExponent', 'massValue', 'massExponent', 'volumeRawKG', 'massRawKG', 'distanceFromSunInAU', 'harmonicFrequency', 'scaleMassExp', 'scaleSizeExp', 'scaleDistExp', 'scaleVolExp']
+    })
+    return state
+
+
+def _body(cls, state: dict, defaults: dict, user: dict):
+    # creates a body from its state without calling its constructor (the state holds every attribute the constructor would set), user is the compiled scale data of the body type
+    obj = cls.__new__(cls)
+    obj.__dict__.update(state)
+    obj.default_scale_data = dict((k, dict(v)) for k, v in defaults.items())
+    obj.user_scale_data = dict((k, dict(v)) for k, v in user.items())
+    if cls is Planet:
+        obj.moonData = MoonData.of([])
+    # NOTE: raw values are never modified, every scale operation starts from them
+    obj._raw = scaling.freeze(obj)
+    obj._views = scaling.ViewCache()
+    return obj
+
+
+# the default_scale_data set by Sun.__init__ and Planet.__init__
+SUN_SCALE_DATA = {"sun": {"debug": False, "scale_mass": 8.5, "scale_vol": 8.5, "scale_dist": 3.2, "scale_size": 1.5}}
+PLANET_SCALE_DATA = {
+    "planet": {"debug": False, "scale_mass": 8.5, "scale_vol": 8.5, "scale_dist": 3.2, "scale_size": 1.5},
+    "moon": {"debug": False, "scale_mass": 8.5, "scale_vol": 8.5, "scale_dist": 4.2, "scale_size": 1.5}
+}
+
+
+def load(source, mapping: dict = None, scale_data: dict = None, context: registry.Context = None, report: bool = False, debug: bool = False):
+    """
+    Creates one SolarSystem per host star of a catalog (a sun and its planets, without moons), nothing is fetched from the data source
+
+    Columns are converted, validated and derived in one vectorized pass (see catalog.bodies), bodies are then created from their computed state without going through the Sun and Planet constructors.
+
+        systems = catalog.load('PS_2024.csv')
+        systems, rejected = catalog.load('PS_2024.csv', report=True)
+
+    Parameters
+    ----------
+
+    source: str|dict
+        filesystem path of a CSV catalog, or catalog columns (see catalog.read)
+    mapping: dict
+        overrides of catalog.COLUMNS, eg. {'semimajorAxis': ('a_au', catalog.AU_KM)}
+    scale_data: dict|scaling.ScaleProfile
+        scale data of the systems (default: SolarSystem._default_scale_data)
+    context: registry.Context
+        The registry context the systems and their bodies are registered in (default: the current context, see registry.current)
+    report: bool
+        also return the rejected rows (list of dicts with keys index, id and reasons) (default: False)
+    debug: bool
+        print info messages
+
+    Returns
+    -------
+    list of SolarSystem, or (list of SolarSystem, list) when report is True
+    """
+    columns = read(source) if isinstance(source, (str, os.PathLike)) else source
+    found = bodies(columns, mapping)
+    # NOTE: scale data is compiled once per body type, not once per body
+    sun_scale = scaling.profile(SUN_SCALE_DATA, scale_data).todict()
+    planet_scale = scaling.profile(PLANET_SCALE_DATA, scale_data).todict()
+    systems = []
+    for name, sun, planets in found['systems']:
+        sun = _body(Sun, sun, SUN_SCALE_DATA, sun_scale)
+        planets = [_body(Planet, i, PLANET_SCALE_DATA, planet_scale) for i in planets]
+        # NOTE: the registries are the only owners of catalog bodies, they are pinned until disposed
+        systems.append(SolarSystem._from_bodies(name, sun, planets, scale_data=scale_data, context=context, pin=True))
+    print(f"INFO: loaded {len(systems)} systems ({sum(len(i.planets) for i in systems)} planets), rejected {len(found['rejected'])} rows") if debug else None
+    [print(f"WARNING: rejected row {i['index']} ({i['id']}): {'; '.join(r.message for r in i['reasons'])}") for i in found['rejected']] if debug else None
+    return (systems, found['rejected']) if report else systems
@@ -0,0 +1,113 @@
+# limit based pre-filtering of moons before plotting, moons outside Moon._limits (or smaller than a minimum on-screen size) are excluded before any blender work
+from __future__ import annotations
+import os, sys
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+np = utilz.lazy_import('numpy')
+import schema
+import scaling
+from moon import Moon
+
+#############################################################################################################
+# NOTE: each limit is checked against the raw (unscaled) value of a moon (Moon._raw), whatever it is       #
+#   scaled by, so limits are stated in raw units:                                                          #
+#   radius:   equaRadius (km)        distance: semimajorAxis (km)                                          #
+#   mass:     massRawKG (kg)         volume:   volumeRawKG (km^3)                                          #
+# limits are min_<name> / max_<name> keys, as in Moon._limits['moon'], None is unbounded                   #
+# the minimum on-screen size is checked against the plotted (scaled) equaRadius                            #
+#############################################################################################################
+FIELDS = {
+    "radius": "equaRadius",
+    "distance": "semimajorAxis",
+    "mass": "massRawKG",
+    "volume": "volumeRawKG"
+}
+
+
+def limits(overrides: dict = None) -> dict:
+    """
+    Returns Moon._limits['moon'] (raw units, see culling.FIELDS) merged with overrides, raises ValueError for unknown keys
+
+    Parameters
+    ----------
+
+    overrides: dict
+        limits to replace, eg. {'min_radius': 10.0} (km, None drops a limit)
+    """
+    merged = dict(Moon._limits['moon'])
+    for key, value in (overrides or {}).items():
+        if key not in merged:
+            raise ValueError(f"unknown moon limit `{key}`, valid limits are {tuple(merged)}")
+        merged[key] = value
+    return merged
+
+
+def screen_sizes(objs: list, pixel_scale: float) -> np.ndarray:
+    """
+    Returns the approximate on-screen diameter (pixels) of each body, float64
+
+    Parameters
+    ----------
+
+    objs: list
+        bodies (Moon objects)
+    pixel_scale: float
+        pixels per scene unit at the distance of the bodies from the camera (see blender.pixel_scale)
+    """
+    radius = np.fromiter((float(i.equaRadius) for i in objs), dtype=np.float64, count=len(objs))
+    return 2.0 * radius * pixel_scale
+
+
+def cull(objs, bounds: dict = None, min_pixels: float = 0.0, pixel_scale: float = None, debug: bool = False) -> tuple:
+    """
+    Splits moons into the moons to plot and the moons to exclude, every limit is evaluated as one vectorized mask over the moon columns
+
+    Nothing is modified, the moons are returned in their original order.
+
+        kept, excluded = culling.cull(planet.moonData, culling.limits({'min_radius': 5.0}), min_pixels=2, pixel_scale=blender.pixel_scale(planet))
+
+    Parameters
+    ----------
+
+    objs: iterable
+        Moon objects (eg. Planet.moonData, Hierarchy.children(planet))
+    bounds: dict
+        min_<name> / max_<name> limits in raw units, see culling.FIELDS (default: culling.limits(), Moon._limits['moon'])
+    min_pixels: float
+        exclude moons with a smaller on-screen diameter than this, needs pixel_scale (default: 0, no minimum)
+    pixel_scale: float
+        pixels per scene unit at the distance of the moons from the camera (see blender.pixel_scale), None skips the on-screen size check
+    debug: bool
+        print every excluded moon
+
+    Returns
+    -------
+    (list of kept moons, list of dicts with keys index, id and reasons (schema.Rejection, code 'limit'), like MoonData.rejected)
+    """
+    objs = list(objs)
+    bounds = limits() if bounds == None else bounds
+    checks = []
+    used = dict((name, attr) for name, attr in FIELDS.items() if bounds.get(f"min_{name}") != None or bounds.get(f"max_{name}") != None)
+    raw = scaling.raw_columns(objs, tuple(used.values())) if used else {}
+    for name, attr in used.items():
+        low, high = bounds.get(f"min_{name}"), bounds.get(f"max_{name}")
+        column = raw[attr]
+        if low != None:
+            checks.append((column < low, column, lambda v, a=attr, k=f"min_{name}", b=low: schema.Rejection(a, 'limit', f"{a} {v} is below {k} {b}")))
+        if high != None:
+            checks.append((column > high, column, lambda v, a=attr, k=f"max_{name}", b=high: schema.Rejection(a, 'limit', f"{a} {v} is above {k} {b}")))
+    if min_pixels and pixel_scale != None:
+        sizes = screen_sizes(objs, pixel_scale)
+        checks.append((sizes < min_pixels, sizes, lambda v: schema.Rejection('equaRadius', 'limit', f"on-screen diameter {v:.2f}px is below min_pixels {min_pixels}")))
+    elif min_pixels:
+        print(f"WARNING: min_pixels ({min_pixels}) is ignored without a pixel_scale") if debug else None
+    drop = np.logical_or.reduce([i[0] for i in checks]) if checks else np.zeros(len(objs), dtype=bool)
+    kept, excluded = [], []
+    for i, (obj, dropped) in enumerate(zip(objs, drop.tolist())):
+        if not dropped:
+            kept.append(obj)
+            continue
+        reasons = [reason(float(column[i])) for mask, column, reason in checks if mask[i]]
+        excluded.append({'index': i, 'id': obj.englishName, 'reasons': reasons})
+        print(f"INFO: excluding {obj.englishName} from plotting ({'; '.join(r.message for r in reasons)})") if debug else None
+    return kept, excluded
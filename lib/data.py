@@ -1,7 +1,11 @@
 
-import requests as cURL
+import os, sys
 from urllib.parse import urljoin
 import json
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+# NOTE: requests is imported on the first request, not when this module is imported
+cURL = utilz.lazy_import('requests', 'pip install requests')
 
 API_BASE = "https://api.le-systeme-solaire.net/rest/bodies/"
 REQ_HEADERS = {
@@ -0,0 +1,285 @@
+# lazily computed, cached derived quantities (density, surface gravity, escape velocity, Hill radius, orbital period..) for Sun, Planet and Moon objects
+from __future__ import annotations
+import os, sys, math, weakref
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+np = utilz.lazy_import('numpy')
+import registry
+import scaling
+
+# gravitational constant (m^3 kg^-1 s^-2)
+G = 6.6743e-11
+# fallback mass of the sun (kg), used for planets outside of any solar system when no Sun object is registered
+SUN_MASS_KG = 1.989e30
+SECONDS_PER_DAY = 86400.0
+
+
+class Quantity:
+    """
+    A derived quantity, computed for every body of a registry at once from its inputs
+
+    Instance Attributes
+    -------------------
+    name: str
+        name of the quantity (eg. 'density')
+    inputs: tuple
+        raw body fields (eg. 'massRawKG') or other quantities the quantity is computed from, passed to fn as float64 arrays in order
+    fn: callable
+        fn(*arrays) -> array, or fn(objs) -> array when inputs is empty
+    units: str
+        units of the quantity
+    doc: str
+        description of the quantity
+    """
+
+    def __init__(self, name: str, inputs: tuple, fn, units: str = "", doc: str = ""):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.fn = fn
+        self.units = units
+        self.doc = doc
+
+    def __repr__(self):
+        return f"<Quantity {self.name} ({self.units}) <- {self.inputs}>"
+
+
+QUANTITIES = {}
+
+
+def define(name: str, inputs: tuple = (), units: str = "", doc: str = ""):
+    """
+    Decorator registering a function as a derived quantity, see Quantity
+
+        @derived.define('density', ('massRawKG', 'meanRadius'), units='kg/m^3')
+        def density(mass, radius):
+            return mass / (4/3 * np.pi * (radius * 1e3)**3)
+
+    Parameters
+    ----------
+
+    name: str
+        name of the quantity
+    inputs: tuple
+        raw body fields or other quantities the function takes (as float64 arrays), empty for functions taking the list of bodies
+    units: str
+        units of the quantity
+    doc: str
+        description of the quantity (default: the functions docstring)
+    """
+    def register(fn):
+        if name in inputs:
+            raise ValueError(f"quantity {name!r} can not depend on itself")
+        QUANTITIES[name] = Quantity(name, inputs, fn, units=units, doc=doc or (fn.__doc__ or "").strip())
+        return fn
+    return register
+
+
+def dependencies(name: str) -> list:
+    """
+    Returns every quantity a quantity depends on (directly or not), in evaluation order
+
+    Parameters
+    ----------
+
+    name: str
+        name of the quantity
+    """
+    order = []
+    def visit(name, path):
+        if name in path:
+            raise ValueError(f"circular quantity dependency: {' -> '.join(path + (name,))}")
+        for i in QUANTITIES[name].inputs:
+            if i in QUANTITIES:
+                visit(i, path + (name,))
+        order.append(name) if name not in order else None
+    visit(name, ())
+    return order[:-1]
+
+
+def _raw(objs: list, field: str) -> np.ndarray:
+    # raw (unscaled) values of a field, nan where a body has no usable value
+    values = []
+    for obj in objs:
+        value = obj._raw.get(field) if hasattr(obj, '_raw') else getattr(obj, field, None)
+        values.append(float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan)
+    return np.array(values, dtype='float64')
+
+
+def _stamp() -> tuple:
+    # changes whenever any registry of the current context changes (bodies registered, removed or rescaled)
+    return tuple((k, r.generation) for k, r in registry.current().registries.items())
+
+
+def _evaluate(name: str, objs: list, computed: dict) -> np.ndarray:
+    if name not in computed:
+        quantity = QUANTITIES[name]
+        if quantity.inputs:
+            arrays = [_evaluate(i, objs, computed) if i in QUANTITIES else _raw(objs, i) for i in quantity.inputs]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                computed[name] = np.asarray(quantity.fn(*arrays), dtype='float64')
+        else:
+            computed[name] = np.asarray(quantity.fn(objs), dtype='float64')
+    return computed[name]
+
+
+def compute(objs, name: str) -> np.ndarray:
+    """
+    Returns a quantity for every body of objs (float64 array, nan where an input is missing), nothing is cached
+
+    Parameters
+    ----------
+
+    objs: iterable
+        bodies of one type
+    name: str
+        name of the quantity
+    """
+    if name not in QUANTITIES:
+        raise KeyError(f"unknown derived quantity {name!r} (known: {sorted(QUANTITIES)})")
+    dependencies(name)
+    return _evaluate(name, list(objs), {})
+
+
+def column(registry_: registry.Registry, name: str) -> tuple:
+    """
+    Returns (objects, values) of a quantity over every object of a registry, computed once and cached until a registry of the current context changes (see Registry.generation)
+
+    Parameters
+    ----------
+
+    registry_: registry.Registry|registry.ScopedRegistry
+        the registry (eg. Planet._instances)
+    name: str
+        name of the quantity
+    """
+    if name not in QUANTITIES:
+        raise KeyError(f"unknown derived quantity {name!r} (known: {sorted(QUANTITIES)})")
+    registry_ = registry_.registry if isinstance(registry_, registry.ScopedRegistry) else registry_
+    stamp = _stamp()
+    cache = registry_.derived
+    if cache.get('stamp') != stamp:
+        cache.clear()
+        # NOTE: objects are held by weak reference so the cache never keeps a body alive, a collected body changes the stamp
+        cache.update({'stamp': stamp, 'refs': [weakref.ref(i) for i in registry_], 'values': {}, 'positions': None})
+    objs = [i() for i in cache['refs']]
+    values = cache['values']
+    if name not in values:
+        dependencies(name)
+        _evaluate(name, objs, values)
+    return objs, values[name]
+
+
+def value(obj, name: str) -> float:
+    """
+    Returns a quantity of one body, read from the cached column of its registry when the body is registered
+
+    Parameters
+    ----------
+
+    obj: Sun|Planet|Moon
+        the body
+    name: str
+        name of the quantity
+    """
+    registry_ = obj.__class__._instances.registry
+    if obj in registry_:
+        objs, values = column(registry_, name)
+        cache = registry_.derived
+        if cache['positions'] == None:
+            cache['positions'] = dict((id(o), n) for n, o in enumerate(objs))
+        return float(values[cache['positions'][id(obj)]])
+    return float(compute([obj], name)[0])
+
+
+#############################################################################################################
+# NOTE: the raw magnitudes and orbit values the Sun, Planet and Moon constructors set (see scaling.magnitude #
+#   and scaling.orbit), as quantities over a whole registry, other quantities are computed from them        #
+#############################################################################################################
+@define('massRawKG', ('massValue', 'massExponent'), units='kg')
+def mass_raw(value, exponent):
+    """raw mass, massValue * 10**massExponent"""
+    return scaling.magnitudes(value, exponent)
+
+
+@define('volumeRawKG', ('volValue', 'volExponent'), units='km^3')
+def volume_raw(value, exponent):
+    """raw volume, volValue * 10**volExponent"""
+    return scaling.magnitudes(value, exponent)
+
+
+@define('semiminorAxis', ('semimajorAxis', 'eccentricity'), units='km')
+def semiminor_axis(axis, eccentricity):
+    """semi-minor axis of the orbit, see orbital.derive_semiminor_axis"""
+    return axis * np.sqrt(1.0 - eccentricity**2)
+
+
+@define('distanceFromSunInAU', ('semimajorAxis',), units='au')
+def distance_in_au(axis):
+    """semi-major axis in astronomical units"""
+    return axis * scaling.KM_IN_AU
+
+
+@define('harmonicFrequency', ('distanceFromSunInAU', 'sideralOrbit'), units='au^3/day^2')
+def harmonic_frequency(au, period):
+    """orbital harmony value, au**3 / period**2"""
+    return au**3 / period**2
+
+
+@define('parentMass', units='kg')
+def parent_mass(objs: list) -> np.ndarray:
+    """mass of the body being orbited (the sun for planets, the planet for moons)"""
+    # NOTE: a body of a SolarSystem orbits its parent in that system (see SolarSystem.hierarchy), several systems may share a registry context
+    owners = {}
+    for system in registry.current().get('systems'):
+        tree = system.hierarchy()
+        owners.update((id(i), tree) for i in tree.bodies)
+    suns = list(registry.current().get('sun'))
+    planets = {}
+    for i in registry.current().get('planet'):
+        planets.setdefault(getattr(i, 'id', None), []).append(i)
+    masses = []
+    for obj in objs:
+        tree = owners.get(id(obj))
+        if type(obj).__name__ == 'Sun':
+            masses.append(math.nan)
+        elif tree != None:
+            parent = tree.parent(obj)
+            masses.append(_raw([parent], 'massRawKG')[0] if parent != None else math.nan)
+        elif isinstance(getattr(obj, 'aroundPlanet', None), dict):
+            # NOTE: a moon outside of any solar system orbits the planet with its aroundPlanet id, when there is exactly one
+            found = planets.get(obj.aroundPlanet.get('planet'), [])
+            masses.append(_raw(found, 'massRawKG')[0] if len(found) == 1 else math.nan)
+        else:
+            # NOTE: a planet outside of any solar system orbits the sun of its context, when there is exactly one
+            masses.append(_raw(suns, 'massRawKG')[0] if len(suns) == 1 else (SUN_MASS_KG if not suns else math.nan))
+    return np.array(masses, dtype='float64')
+
+
+@define('density', ('massRawKG', 'meanRadius'), units='kg/m^3')
+def density(mass, radius):
+    """mean density"""
+    return mass / (4.0 / 3.0 * np.pi * (radius * 1e3)**3)
+
+
+@define('surfaceGravity', ('massRawKG', 'meanRadius'), units='m/s^2')
+def surface_gravity(mass, radius):
+    """gravitational acceleration at the mean radius"""
+    return G * mass / (radius * 1e3)**2
+
+
+@define('escapeVelocity', ('massRawKG', 'meanRadius'), units='m/s')
+def escape_velocity(mass, radius):
+    """escape velocity at the mean radius"""
+    return np.sqrt(2.0 * G * mass / (radius * 1e3))
+
+
+@define('orbitalPeriod', ('semimajorAxis', 'parentMass'), units='days')
+def orbital_period(axis, parent):
+    """Keplerian orbital period around the parent body"""
+    return 2.0 * np.pi * np.sqrt((axis * 1e3)**3 / (G * parent)) / SECONDS_PER_DAY
+
+
+@define('hillRadius', ('semimajorAxis', 'eccentricity', 'massRawKG', 'parentMass'), units='km')
+def hill_radius(axis, eccentricity, mass, parent):
+    """radius of the Hill sphere (at periapsis)"""
+    return axis * (1.0 - eccentricity) * np.cbrt(mass / (3.0 * parent))
@@ -2,8 +2,6 @@ import bpy
 import os, sys
 import importlib
 sys.path.extend([os.path.join('.', 'lib')])
-LIB_HOME='/Users/photon/DevOps/Projects/Solar_System_Model' 
-os.chdir(LIB_HOME)
 import data
 from planet import Planet 
 import moon 
@@ -15,9 +13,10 @@ import importlib
 def bpy_add_driver_namespace(func):
     bpy.app.driver_namespace[func] = getattr()
 
-def import_bpy_functions(funcs):
+def import_bpy_functions(funcs: list = blender.HELPERS):
+    """
+    Adds blender helper functions (default: blender.HELPERS) to blenders driver namespace, call this once before adding drivers (see blender.add_orbital_drivers)
+    """
     for func in funcs:
         print(f"importing function: {func}")    
         bpy.app.driver_namespace[func] = getattr(blender, func)
-
-import_bpy_functions(blender.HELPERS)
\ No newline at end of file
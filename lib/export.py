@@ -0,0 +1,155 @@
+# streaming NDJSON export of Sun, Planet and Moon objects (one compact JSON object per line)
+from __future__ import annotations
+import os, sys, io, json, math
+from collections.abc import Mapping
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+np = utilz.lazy_import('numpy')
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# rows are written to the output in chunks of this many lines
+CHUNK_SIZE = 1000
+
+
+def default(value):
+    """
+    Converts values which are not JSON serializable (numpy scalars and arrays, sets, bodies and other objects), for use as json.dumps(default=...)
+
+    Parameters
+    ----------
+
+    value: object
+        value to convert
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, Mapping):
+        return dict(value)
+    if hasattr(value, 'englishName'):
+        # NOTE: bodies are referenced, never inlined
+        return reference(value)
+    return str(value)
+
+
+def _finite(value):
+    # replaces nan and +/-inf (which are not valid JSON) by None, recursively
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return dict((k, _finite(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_finite(i) for i in value]
+    return value
+
+
+def reference(obj) -> dict:
+    """
+    Returns a reference to a body ({'type': ..., 'englishName': ...}), used in place of inlined bodies
+    """
+    return {'type': type(obj).__name__.lower(), 'englishName': obj.englishName}
+
+
+def row(obj) -> dict:
+    """
+    Returns the exported fields of a body: every public attribute (see inspect), a `type` field, and without the inlined moonData (moons are exported as rows of their own, and referenced by a planet's `moons`)
+
+    Parameters
+    ----------
+
+    obj: Sun|Planet|Moon
+        body to export
+    """
+    data = {k: v for k, v in obj.__dict__.items() if k[:1] != '_'}
+    data.pop('moonData', None)
+    data['type'] = type(obj).__name__.lower()
+    return data
+
+
+def encoder(backend: str = None):
+    """
+    Returns a function encoding a row dict to one line of compact JSON (bytes, with a trailing newline)
+
+    Parameters
+    ----------
+
+    backend: str
+        'orjson' or 'json' (default: orjson when it is installed, json otherwise)
+    """
+    backend = ('orjson' if orjson != None else 'json') if backend == None else backend
+    if backend == 'orjson':
+        if orjson == None:
+            raise ImportError("the orjson backend requires the orjson package (pip install orjson)")
+        options = orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        return lambda data: orjson.dumps(data, default=default, option=options)
+    if backend != 'json':
+        raise ValueError(f"unknown JSON backend {backend!r} (expected 'orjson' or 'json')")
+    dumps = json.JSONEncoder(separators=(',', ':'), default=default, allow_nan=False).encode
+
+    def encode(data: dict) -> bytes:
+        try:
+            line = dumps(data)
+        except ValueError:
+            line = dumps(_finite(data))
+        return (line + "\n").encode()
+    return encode
+
+
+def lines(objs, backend: str = None):
+    """
+    Yields one NDJSON line (bytes) per body, bodies are read one at a time
+
+    Parameters
+    ----------
+
+    objs: iterable
+        bodies to export
+    backend: str
+        'orjson' or 'json' (default: orjson when it is installed, json otherwise)
+    """
+    encode = encoder(backend)
+    for obj in objs:
+        yield encode(row(obj))
+
+
+def write(objs, out, backend: str = None, chunk: int = CHUNK_SIZE) -> int:
+    """
+    Writes every body as one compact NDJSON line to a file or pipe, memory use is bounded by `chunk` lines whatever the number of bodies, returns the number of rows written
+
+    Parameters
+    ----------
+
+    objs: iterable
+        bodies to export (eg. Moon._instances, or a generator)
+    out: str|file
+        filesystem path, '-' for stdout, or an open (binary or text) file object
+    backend: str
+        'orjson' or 'json' (default: orjson when it is installed, json otherwise)
+    chunk: int
+        number of lines written at once (default: 1000)
+    """
+    if isinstance(out, (str, os.PathLike)) and out != '-':
+        with open(out, "wb") as f:
+            return write(objs, f, backend=backend, chunk=chunk)
+    out = sys.stdout if out == '-' else out
+    text = isinstance(out, io.TextIOBase)
+    if text and hasattr(out, 'buffer'):
+        out.flush()
+        out, text = out.buffer, False
+    count, buffer = 0, []
+    for line in lines(objs, backend=backend):
+        buffer.append(line)
+        count += 1
+        if len(buffer) >= chunk:
+            out.write(b"".join(buffer).decode() if text else b"".join(buffer))
+            buffer = []
+    if buffer:
+        out.write(b"".join(buffer).decode() if text else b"".join(buffer))
+    out.flush() if hasattr(out, 'flush') else None
+    return count
@@ -0,0 +1,129 @@
+# stable content hashes for Sun, Planet and Moon objects, Merkle style hashes for SolarSystems, and fast diffs between systems
+from __future__ import annotations
+import os, sys, json, hashlib, weakref
+sys.path.extend([os.path.join('../', 'lib')])
+import export
+import scaling
+
+# fingerprints of raw payloads never change (raw values are immutable), they are computed once per body
+_raw_hashes = weakref.WeakKeyDictionary()
+
+
+def _digest(*parts) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode() if isinstance(part, str) else part)
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def _objtype(obj) -> str:
+    return type(obj).__name__.lower()
+
+
+def key(obj) -> str:
+    """
+    Returns the key identifying a body across systems ('<type>:<englishName>')
+    """
+    return f"{_objtype(obj)}:{obj.englishName}"
+
+
+def raw(obj) -> str:
+    """
+    Returns the fingerprint of the raw payload of a body (computed once, raw values never change)
+
+    Parameters
+    ----------
+
+    obj: Sun|Planet|Moon
+        the body
+    """
+    try:
+        return _raw_hashes[obj]
+    except KeyError:
+        canonical = json.dumps(obj._raw, sort_keys=True, separators=(',', ':'), default=export.default)
+        _raw_hashes[obj] = _digest(_objtype(obj), canonical)
+        return _raw_hashes[obj]
+
+
+def body(obj) -> str:
+    """
+    Returns the content fingerprint of a body: a stable hash of its raw payload and its scale state (the exponents it is currently scaled by)
+
+    Parameters
+    ----------
+
+    obj: Sun|Planet|Moon
+        the body
+    """
+    exps = [repr(float(getattr(obj, i, 0.0))) for i in scaling.SCALE_ATTRS.values()]
+    return _digest(raw(obj), *exps)
+
+
+def tree(sun, planets: list, name: str = "") -> dict:
+    """
+    Returns the Merkle tree of a system: the hash of every body, the hash of every planet node (the planet and its moons) and the root hash
+
+    Parameters
+    ----------
+
+    sun: sun.Sun
+        the sun of the system
+    planets: list
+        planets of the system (moons are taken from Planet.moonData)
+    name: str
+        name of the system
+
+    Returns
+    -------
+    dict with keys root, sun ({key: hash}) and planets ({key: {'node': hash, 'body': hash, 'moons': {key: hash}}})
+    """
+    nodes = {}
+    for planet in planets:
+        moons = dict((key(i), body(i)) for i in planet.moonData)
+        fingerprint = body(planet)
+        nodes[key(planet)] = {'node': _digest(fingerprint, *[f"{k}={v}" for k, v in sorted(moons.items())]), 'body': fingerprint, 'moons': moons}
+    suns = {key(sun): body(sun)} if sun != None else {}
+    root = _digest(name, *[f"{k}={v}" for k, v in sorted(suns.items())], *[f"{k}={v['node']}" for k, v in sorted(nodes.items())])
+    return {'root': root, 'sun': suns, 'planets': nodes}
+
+
+def _compare(a: dict, b: dict, added: list, removed: list, changed: list):
+    added.extend(k for k in b if k not in a)
+    removed.extend(k for k in a if k not in b)
+    changed.extend(k for k in a if k in b and a[k] != b[k])
+
+
+def diff(a: dict, b: dict) -> dict:
+    """
+    Compares two Merkle trees (see tree), only planet nodes whose hash differs are descended into
+
+    Parameters
+    ----------
+
+    a: dict
+        tree of the old system
+    b: dict
+        tree of the new system
+
+    Returns
+    -------
+    dict with keys added, removed and changed, lists of body keys ('<type>:<englishName>'), all empty when the roots match
+    """
+    added, removed, changed = [], [], []
+    if a['root'] == b['root']:
+        return {'added': added, 'removed': removed, 'changed': changed}
+    _compare(a['sun'], b['sun'], added, removed, changed)
+    for k, node in b['planets'].items():
+        old = a['planets'].get(k)
+        if old == None:
+            added.append(k)
+            added.extend(node['moons'])
+        elif old['node'] != node['node']:
+            changed.append(k) if old['body'] != node['body'] else None
+            _compare(old['moons'], node['moons'], added, removed, changed)
+    for k, node in a['planets'].items():
+        if k not in b['planets']:
+            removed.append(k)
+            removed.extend(node['moons'])
+    return {'added': added, 'removed': removed, 'changed': changed}
@@ -0,0 +1,159 @@
+# sun -> planet -> moon hierarchy of a solar system as flat parent / child offset (CSR) arrays, built once and shared by traversals
+from __future__ import annotations
+import os, sys
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+np = utilz.lazy_import('numpy')
+
+
+class Hierarchy:
+    """
+    The bodies of a solar system in depth order (the sun, the planets, then the moons of each planet in planet order), with the parent of every body and the children of every body as offsets into a child array (compressed sparse rows)
+
+    The children of body i are child_index[offsets[i]:offsets[i + 1]], so parent lookups are O(1) and child lookups O(children), no body is ever looked up by name.
+
+        tree = hierarchy.build(ss.sun, ss.planets)
+        tree.parent(moon)          # -> the planet
+        tree.children(planet)      # -> the moons of the planet
+        for body, depth in tree.traverse(): ...
+
+    Instance Attributes
+    -------------------
+    bodies: list
+        every body, in depth order (body index -> body)
+    parents: np.ndarray
+        index of the parent of each body (int64, -1 for the root)
+    offsets: np.ndarray
+        offsets of the children of each body in child_index (int64, len(bodies) + 1)
+    child_index: np.ndarray
+        index of the children of every body, grouped by parent (int64)
+    depths: np.ndarray
+        depth of each body (int64, 0 for the sun, 1 for planets, 2 for moons)
+    """
+
+    def __init__(self, bodies: list, parents):
+        """
+        Parameters
+        ----------
+
+        bodies: list
+            every body, a parent always comes before its children
+        parents: list
+            index of the parent of each body (-1 for a root)
+        """
+        self.bodies = list(bodies)
+        self.parents = np.asarray(parents, dtype=np.int64)
+        if len(self.parents) != len(self.bodies):
+            raise ValueError(f"got {len(self.parents)} parents for {len(self.bodies)} bodies")
+        if np.any(self.parents >= np.arange(len(self.bodies))):
+            raise ValueError("a parent must come before its children")
+        # NOTE: a stable sort keeps the children of each body in body order
+        order = np.argsort(self.parents, kind='stable')
+        roots = int(np.count_nonzero(self.parents < 0))
+        self.child_index = order[roots:]
+        self.offsets = np.searchsorted(self.parents[self.child_index], np.arange(len(self.bodies) + 1)).astype(np.int64)
+        self.depths = np.zeros(len(self.bodies), dtype=np.int64)
+        for i, parent in enumerate(self.parents.tolist()):
+            self.depths[i] = self.depths[parent] + 1 if parent >= 0 else 0
+        self._index = dict((id(body), i) for i, body in enumerate(self.bodies))
+
+    def index(self, obj) -> int:
+        """
+        Returns the index of a body, raises KeyError when the body is not part of the hierarchy
+        """
+        try:
+            return self._index[id(obj)]
+        except KeyError:
+            raise KeyError(f"{getattr(obj, 'englishName', obj)!r} is not part of the hierarchy") from None
+
+    def parent(self, obj):
+        """
+        Returns the parent of a body (the sun for a planet, the planet for a moon), None for the sun
+        """
+        parent = int(self.parents[self.index(obj)])
+        return self.bodies[parent] if parent >= 0 else None
+
+    def children(self, obj) -> list:
+        """
+        Returns the children of a body (the planets of the sun, the moons of a planet)
+        """
+        i = self.index(obj)
+        return [self.bodies[j] for j in self.child_index[self.offsets[i]:self.offsets[i + 1]].tolist()]
+
+    def ancestors(self, obj) -> list:
+        """
+        Returns the parent, grand parent.. of a body, closest first
+        """
+        found, i = [], int(self.parents[self.index(obj)])
+        while i >= 0:
+            found.append(self.bodies[i])
+            i = int(self.parents[i])
+        return found
+
+    def subtree(self, obj=None):
+        """
+        Yields a body and every body below it, depth first (parents before their children, children in order)
+
+        Parameters
+        ----------
+
+        obj: Sun|Planet|Moon
+            the top body (default: every root)
+        """
+        stack = [self.index(obj)] if obj != None else np.flatnonzero(self.parents < 0).tolist()[::-1]
+        offsets, children = self.offsets, self.child_index
+        while stack:
+            i = stack.pop()
+            yield self.bodies[i]
+            stack.extend(children[offsets[i]:offsets[i + 1]].tolist()[::-1])
+
+    def traverse(self):
+        """
+        Yields (body, depth) of every body in depth order: the sun, every planet, then every moon
+        """
+        order = np.argsort(self.depths, kind='stable')
+        depths = self.depths.tolist()
+        for i in order.tolist():
+            yield self.bodies[i], depths[i]
+
+    def level(self, depth: int) -> list:
+        """
+        Returns every body at a depth (0: the sun, 1: the planets, 2: the moons)
+        """
+        return [self.bodies[i] for i in np.flatnonzero(self.depths == depth).tolist()]
+
+    def __len__(self):
+        return len(self.bodies)
+
+    def __iter__(self):
+        return iter(self.bodies)
+
+    def __contains__(self, obj):
+        return id(obj) in self._index
+
+    def __repr__(self):
+        return f"<Hierarchy {len(self)} bodies, {int(self.depths.max()) + 1 if len(self) else 0} levels>"
+
+
+def build(sun, planets: list) -> Hierarchy:
+    """
+    Returns the Hierarchy of a sun, its planets and their moons (taken from Planet.moonData)
+
+    Parameters
+    ----------
+
+    sun: sun.Sun
+        the sun (the root), None builds a hierarchy rooted at each planet
+    planets: list
+        planet.Planet objects
+    """
+    planets = list(planets)
+    bodies, parents = ([sun], [-1]) if sun != None else ([], [])
+    root = 0 if sun != None else -1
+    bodies.extend(planets)
+    parents.extend([root] * len(planets))
+    for n, planet in enumerate(planets):
+        moons = list(planet.moonData)
+        bodies.extend(moons)
+        parents.extend([n + (1 if sun != None else 0)] * len(moons))
+    return Hierarchy(bodies, parents)
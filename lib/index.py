@@ -0,0 +1,137 @@
+# lazily built sorted attribute indexes over the registered Sun, Planet and Moon objects
+from __future__ import annotations
+import os, sys, math, weakref
+from bisect import bisect_left, bisect_right
+sys.path.extend([os.path.join('../', 'lib')])
+import registry
+
+
+class SortedIndex:
+    """
+    The objects of a registry sorted by one attribute, supports range, top-k/bottom-k and rank lookups in O(log n + k)
+
+    Objects whose value is None (or nan) are not indexed, ties keep registration order. An index is a snapshot of the registry at one generation, use index.of to get an up to date index (it is rebuilt after objects are registered, removed or rescaled).
+
+    Objects are held by weak reference, so an index never keeps a body alive (a collected object reads as None in an index which outlived its generation).
+
+    Instance Attributes
+    -------------------
+    attrib: str
+        the indexed attribute
+    generation: int
+        generation of the registry the index was built at
+    keys: list
+        the sorted attribute values
+    objects: list
+        the indexed objects, in the same order as keys (resolved from weak references)
+    """
+
+    def __init__(self, attrib: str, objs, generation: int = 0):
+        """
+        Returns a SortedIndex
+
+        Parameters
+        ----------
+
+        attrib: str
+            attribute to index
+        objs: iterable
+            objects to index, raises AttributeError when an object has no such attribute
+        generation: int
+            generation of the registry the objects were read from
+        """
+        self.attrib = attrib
+        self.generation = generation
+        pairs = [(getattr(i, attrib), i) for i in objs]
+        pairs = sorted([i for i in pairs if i[0] is not None and not (isinstance(i[0], float) and math.isnan(i[0]))], key=lambda i: i[0])
+        self.keys = [i[0] for i in pairs]
+        self._refs = [weakref.ref(i[1]) for i in pairs]
+        self._positions = None
+
+    @property
+    def objects(self) -> list:
+        return [i() for i in self._refs]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def range(self, low=None, high=None, inclusive: bool = True) -> list:
+        """
+        Returns the objects with low <= value <= high in ascending order (low < value < high when inclusive is False), a bound of None is open
+
+        Parameters
+        ----------
+
+        low: number|str
+            lower bound (default: None)
+        high: number|str
+            upper bound (default: None)
+        inclusive: bool
+            include objects equal to the bounds (default: True)
+        """
+        start = 0 if low == None else (bisect_left if inclusive else bisect_right)(self.keys, low)
+        end = len(self.keys) if high == None else (bisect_right if inclusive else bisect_left)(self.keys, high)
+        return [i() for i in self._refs[start:max(start, end)]]
+
+    def top(self, k: int) -> list:
+        """
+        Returns the k objects with the largest values, largest first
+        """
+        return [i() for i in self._refs[max(len(self._refs) - k, 0):][::-1]] if k > 0 else []
+
+    def bottom(self, k: int) -> list:
+        """
+        Returns the k objects with the smallest values, smallest first
+        """
+        return [i() for i in self._refs[:max(k, 0)]]
+
+    def rank(self, value) -> int:
+        """
+        Returns the number of indexed objects with a value smaller than `value` (the 0 based rank of an object, when passed an indexed object)
+
+        Parameters
+        ----------
+
+        value: object|number|str
+            an indexed object, or a value
+        """
+        if hasattr(value, self.attrib) and not isinstance(value, (int, float, str)):
+            if self._positions == None:
+                self._positions = dict((id(o), n) for n, o in enumerate(self.objects) if o is not None)
+            try:
+                n = self._positions[id(value)]
+                if self._refs[n]() is not value:
+                    raise KeyError(id(value))
+                return bisect_left(self.keys, self.keys[n])
+            except KeyError:
+                raise ValueError(f"object is not indexed by {self.attrib}") from None
+        return bisect_left(self.keys, value)
+
+    def items(self) -> list:
+        """
+        Returns (englishName, value) tuples in ascending order of value
+        """
+        return [(o.englishName, k) for o, k in zip(self.objects, self.keys)]
+
+    def __repr__(self):
+        return f"<SortedIndex {self.attrib} ({len(self)} objects, generation {self.generation})>"
+
+
+def of(registry_: registry.Registry, attrib: str) -> SortedIndex:
+    """
+    Returns the SortedIndex of a registry (or ScopedRegistry) for an attribute, building it on first use and rebuilding it once the registry changed (see Registry.generation)
+
+    Parameters
+    ----------
+
+    registry_: registry.Registry|registry.ScopedRegistry
+        the registry to index (eg. Planet._instances)
+    attrib: str
+        attribute to index
+    """
+    registry_ = registry_.registry if isinstance(registry_, registry.ScopedRegistry) else registry_
+    index = registry_.indexes.get(attrib)
+    if index == None or index.generation != registry_.generation:
+        index = SortedIndex(attrib, registry_, generation=registry_.generation)
+        registry_.indexes[attrib] = index
+    return index
@@ -5,7 +5,16 @@ import data
 from orbital import derive_semiminor_axis
 import json
 import utilz
-import numpy as np
+import scaling
+import registry
+import predicate
+import export
+import stats
+import index
+import derived
+import schema
+import fingerprint
+np = utilz.lazy_import('numpy')
 
 class Moon:
     """
@@ -16,15 +25,14 @@ class Moon:
     Class Attributes
     ----------------
 
-    _instances: list 
-        A list containing all defined instances of Moon objects
+    _instances: registry.ScopedRegistry 
+        A weak registry of all defined instances of Moon objects in the current registry context (see registry.Context), moons drop out of it once nothing else references them
     _moons: list
     A list containing all known moon in the solar system
     _default_scale_data: dict 
         A nervous addition of the default scale dictionary to the class for convenienence =)!!
     _limits: dict 
-        An artifact which may possibly used at some point which will control the limits of objects
-        TODO: move this type of function/data to blender module, where limits of things will matter for plotting in 3 dimensions.
+        The default limits of moons which are plotted, as raw values (min/max radius and distance in km, mass in kg, volume in km^3, None is unbounded), moons outside them are excluded before plotting when limits are requested (see culling.cull, blender.plot_natural_satellites)
 
 
     Instance Attributes
@@ -132,6 +140,10 @@ class Moon:
         the moons calculated harmonic frequency
     keys: list
         the list of attributes(keys) associated with the moon object
+    _raw: scaling.RawData
+        read-only raw (unscaled) values captured on initialization, scaling always starts from these values
+    _views: scaling.ViewCache
+        cache of scaled views of the moon, keyed by scale profile (see Moon.view)
 
     
     debug : bool
@@ -142,7 +154,7 @@ class Moon:
     ----------------
     """
 
-    _instances = []
+    _instances = registry.scoped('moon')
     _moons = {
         "Adrast\u00e9e": {
             "englishName": "Adrastea",
@@ -1076,6 +1088,7 @@ class Moon:
                 }
             }
 
+    # NOTE: limits are raw (unscaled) values: radius and distance in km, mass in kg, volume in km^3, None is unbounded (see culling.cull)
     _limits = {
         "moon": {
             "min_radius": 750.00,
@@ -1083,13 +1096,13 @@ class Moon:
             "min_distance": 0,
             "max_distance": ctypes.c_uint(-1).value - 100000.00,
             "min_mass": 0,
-            "max_mass": ctypes.c_uint(-1).value - 100000.00,
+            "max_mass": None,
             "min_volume": 0,
-            "max_volume": ctypes.c_uint(-1).value - 100000.00
+            "max_volume": None
             }
     }
 
-    def __init__(self, rel: str, scale_data: dict = None,debug: bool = False):
+    def __init__(self, rel: str, scale_data: dict = None, payload: dict = None, debug: bool = False):
         """
         Returns an object of class moon.Moon 
 
@@ -1098,7 +1111,7 @@ class Moon:
 
         rel: str 
             relational url of a moon within data source (https://api.le-systeme-solaire.net/en/)
-        scale_data: dict
+        scale_data: dict|scaling.ScaleProfile
             A dict which overrides any default settings with user provided settings (default: see below for format..)
             {
                 "moon": {
@@ -1106,6 +1119,8 @@ class Moon:
                     "scale_mass": 8.5
                 }
             }
+        payload: dict
+            the raw payload of the moon (as returned by data.get_moon_data), fetched from rel when omitted (default: None)
         debug (bool): output useful debugging information
         """
         self.default_scale_data = {
@@ -1117,16 +1132,12 @@ class Moon:
                 "scale_size": 0.5
             }
         }
-        self.user_scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        _moon = data.get_moon_data(rel)
-        NoneType = type(None)
-        # NOTE: some moons have poorly formatted JSON strings and will be skipped
-        if isinstance(_moon, NoneType): 
-            print(f"WARNING: the moon with relational URL {rel} was not available due to some parsing error, it will be skipped in plotting") if debug else None
-            return None
-        # NOTE: some moons have null (None) values for `mass` and/or `vol`
-        if _moon['mass'] == None or _moon['vol'] == None:
-            print(f"WARNING: the moon with relational URL {rel} has `None` mass or volume values, it will be skipped in plotting") if debug else None
+        self.user_scale_data = scaling.profile(self.default_scale_data, scale_data).todict()
+        _moon = data.get_moon_data(rel) if payload == None else payload
+        # NOTE: some moons have poorly formatted JSON strings, or null (None) values for `mass` and/or `vol`, they will be skipped (see schema.MOON)
+        reasons = schema.validate('moon', _moon)
+        if reasons:
+            print(f"WARNING: the moon with relational URL {rel} is invalid ({'; '.join(i.message for i in reasons)}), it will be skipped in plotting") if debug else None
             return None
         for k in _moon.keys():
             print(f"INFO: adding attribute for moon {_moon['englishName']} around {_moon['aroundPlanet']['planet']} ({k}) with value ({_moon[k]})") if debug else None
@@ -1139,81 +1150,113 @@ class Moon:
         self.scaleSizeExp = 0.0 
         self.scaleDistExp = 0.0
         self.scaleVolExp = 0.0
-        self.semiminorAxis = round(derive_semiminor_axis(self))
+        self.semiminorAxis = derive_semiminor_axis(self)
         self.semimajorAxis = float(self.semimajorAxis)
         self.volValue = self.vol['volValue']
         self.volExponent = self.vol['volExponent']
         self.massValue = self.mass['massValue']
         self.massExponent = self.mass['massExponent']
-        self.volumeRawKG = float( f"{float(self.volValue*(10**self.volExponent)):f}" )
-        self.massRawKG = float( f"{float(self.massValue*(10**self.massExponent)):f}" )
+        self.volumeRawKG = scaling.magnitude(self.volValue, self.volExponent)
+        self.massRawKG = scaling.magnitude(self.massValue, self.massExponent)
         self.keys = list(_moon.keys()) + list(('volValue', 'volExponent', 'massValue', 'massExponent', 'volumeRawKG', 'massRawKG', 'scaleMassExp','scaleSizeExp','scaleDistExp', 'scaleVolExp'))
         # NOTE: some moons may have no equaRadius data (see jupiter), in these cases fall back to setting radius by meanRadius value
         if self.equaRadius == 0:
             self.equaRadius = self.meanRadius
         if self.englishName == "":
             self.englishName = self.name
+        # NOTE: raw values are never modified, every scale operation starts from them
+        self._raw = scaling.freeze(self)
+        self._views = scaling.ViewCache()
         self.__class__._instances.append(self) 
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # NOTE: writes after construction (eg. planet.meanRadius = 1.0) invalidate the caches built over the registries holding the body, see registry.touch
+        if '_raw' in self.__dict__ and not name.startswith('_'):
+            registry.touch(self)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_views', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._views = scaling.ViewCache()
+
+    def fingerprint(self) -> str:
+        """
+        Returns a stable content hash of the Moon object (its raw payload and the exponents it is currently scaled by), see fingerprint.body
+        """
+        return fingerprint.body(self)
+
+    def view(self, scale_data: dict = None) -> scaling.ScaledView:
+        """
+        Returns a read-only view of the moon with scaled values, the moon itself is not modified
+        scaled values are computed from raw values on first access, views are cached per scale profile
+
+        Parameters
+        ----------
+
+        scale_data: dict|scaling.ScaleProfile 
+            dictionary of overrides for default scale_data
+        """
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        return scaling.view(self, 'moon', scale_data)
+
     # Scaling functions
     def scale_distance(self, scale_data: dict = None, debug: bool = False) -> Moon:
         """
-        Returns a moon object with scaled distance values (semimajorAxis, semiminorAxis)
+        Returns a moon object with scaled distance values (semimajorAxis, semiminorAxis), computed from the moons raw values
         standard scaling is performed by the function f(x) = x/(10**scaleExponent)
 
         Parameters
         ----------
 
-        scale_data: dict 
+        scale_data: dict|scaling.ScaleProfile 
             dictionary of overrides for default scale_data
         debug: bool
             output informational messages (default: False)
         """
-        scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        print(f"INFO: {self.englishName} raw values [semimajorAxis -> {self.semimajorAxis}] [semiminorAxis -> ({self.semiminorAxis}]") if debug else None
-        self.scaleDistExp  = scale_data['moon']['scale_dist'] 
-        self.semimajorAxis = self.semimajorAxis/(10**float(self.scaleDistExp))
-        self.semiminorAxis = self.semiminorAxis/(10**float(self.scaleDistExp))
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        print(f"INFO: {self.englishName} raw values [semimajorAxis -> {self._raw['semimajorAxis']}] [semiminorAxis -> ({self._raw['semiminorAxis']}]") if debug else None
+        scaling.apply(self, 'moon', self._raw, scale_data['moon'], groups=('dist',))
         print(f"INFO: {self.englishName} scaled with [values/(10**{self.scaleDistExp})] [semimajorAxis -> {self.semimajorAxis}] [semiminorAxis -> {self.semiminorAxis}]") if debug else None
         return self
 
     def scale_mass(self, scale_data: dict = None, debug: bool = False) -> Moon:
         """
-        Returns a moon object with scaled calculated mass value (massRawKG)
+        Returns a moon object with scaled calculated mass value (massRawKG), computed from the moons raw values
         standard scaling is performed by the function f(x) = x/(10**scaleExponent)
 
         Parameters
         ----------
 
-        scale_data: dict 
+        scale_data: dict|scaling.ScaleProfile 
             (dictionary of overrides for default scale_data)
         debug: bool
             output informational messages (default: False)
         """
-        scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        print(f"INFO: {self.englishName} raw values [mass -> {self.massRawKG}]") if debug else None
-        self.scaleMassExp = scale_data['moon']['scale_mass']
-        self.massExponent = self.massExponent - (self.scaleMassExp)
-        self.massRawKG = float( f"{float(self.massValue*(10**self.scaleMassExp)):f}" )
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        print(f"INFO: {self.englishName} raw values [mass -> {self._raw['massRawKG']}]") if debug else None
+        scaling.apply(self, 'moon', self._raw, scale_data['moon'], groups=('mass',))
         print(f"INFO: {self.englishName} scaled with [values/(10**{self.scaleMassExp})] [mass ->{self.massRawKG}]") if debug else None
         return self
 
     def scale_vol(self, scale_data: dict = None, debug: bool = False) -> Moon:
         """
-        Returns a moon object with scaled calculated volume value (volumeRawKG)
+        Returns a moon object with scaled calculated volume value (volumeRawKG), computed from the moons raw values
         standard scaling is performed by the function f(x) = x/(10**scaleExponent)
 
         Parameters
         ----------
 
-        scale_data: dict (dictionary of overrides for default scale_data)
+        scale_data: dict|scaling.ScaleProfile (dictionary of overrides for default scale_data)
         output informational messages (default: False)
         """
-        scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        print(f"INFO: {self.englishName} raw values [volume -> {self.volumeRawKG}]") if debug else None
-        self.scaleVolExp = scale_data['moon']['scale_vol']
-        self.volExponent = self.volExponent - (self.scaleVolExp)
-        self.volumeRawKG = float( f"{float(self.volValue*(10**self.scaleVolExp)):f}" )
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        print(f"INFO: {self.englishName} raw values [volume -> {self._raw['volumeRawKG']}]") if debug else None
+        scaling.apply(self, 'moon', self._raw, scale_data['moon'], groups=('vol',))
         print(f"INFO: {self.englishName} scaled with [values/(10**{self.scaleVolExp})] [volume -> {self.volumeRawKG}]") if debug else None 
         return self
     
@@ -1221,29 +1264,17 @@ class Moon:
         """
         Returns a moon object with scaled distance, size, calculated mass & volume values (equaRadius, meanRadius, massRawKG, volumeRawKG, semimajorAxis, semiminorAxis)
         standard scaling is performed by the function f(x) = x/(10**scaleExponent)
+        values are computed from the moons raw values, calling scale_moon again with different scale_data does not compound
 
         Parameters
         ----------
 
-        scale_data: dict (dictionary of overrides for default scale_data)
+        scale_data: dict|scaling.ScaleProfile (dictionary of overrides for default scale_data)
         output informational messages (default: False)
         """
-        scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        self.meanRadius = self.meanRadius
-        
-        
-        self.scaleDistExp = scale_data['moon']['scale_dist']
-        self.scaleMassExp = scale_data['moon']['scale_mass'] 
-        self.scaleSizeExp = scale_data['moon']['scale_size']
-        self.scaleVolExp  = scale_data['moon']['scale_vol']
-        self.semimajorAxis = self.semimajorAxis/(10**self.scaleDistExp)
-        self.semiminorAxis = self.semiminorAxis/(10**self.scaleDistExp)
-        self.volExponent = self.volExponent - (self.scaleVolExp)
-        self.massExponent = self.massExponent - (self.scaleMassExp)
-        self.massRawKG = float( f"{float(self.massValue*(10**self.scaleMassExp)):f}" )
-        self.volumeRawKG = float( f"{float(self.volValue*(10**self.scaleVolExp)):f}" )
-        self.meanRadius = self.meanRadius / (10**(self.scaleSizeExp)) 
-        self.equaRadius = self.equaRadius / (10**(self.scaleSizeExp))
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        # NOTE: scaled values are always derived from the raw values, scaling twice does not compound
+        scaling.apply(self, 'moon', self._raw, scale_data['moon'])
         print(f"INFO: {self.englishName} scaled values [meanRadius -> {self.meanRadius}] [equaRadius -> {self.equaRadius}] [semimajorAxis -> {self.semimajorAxis}] [semiminorAxis -> {self.semiminorAxis}]  [volValueRawKG -> {self.volumeRawKG}] [massRawKG -> {self.massRawKG}]") if debug else None
         return self
 
@@ -1252,23 +1283,23 @@ class Moon:
         """
         Returns list containing attributes defined on Moon object
         """
-        return list(self.__dict__.keys())
+        return [k for k in self.__dict__.keys() if not k.startswith('_')]
 
     def inspect(self) -> dict:
         """
         Returns dict containing all attributes, attribute values defined on Moon object 
         """
         #return dict({k:v for k,v in zip(list(self.__dict__.values())[-1], list(self.__dict__.values())[0:-2])})
-        return dict({k:v for k,v in self.__dict__.items()})
+        return dict({k:v for k,v in self.__dict__.items() if not k.startswith('_')})
         #return list(zip(list(self.__dict__.values())[-1], list(self.__dict__.values())[0:-2]))
 
     def tostring(self) -> str:
         """
         Returns JSON str representing all attributes defined on Moon object
         """
-        data = dict({k:v for k,v in self.__dict__.items()})
+        data = dict({k:v for k,v in self.__dict__.items() if not k.startswith('_')})
         return str( 
-            json.dumps(data, separators=(',',':'), indent=2)
+            json.dumps(data, separators=(',',':'), indent=2, default=export.default)
         )
 
     def save(self, path: str = "/tmp"):
@@ -1282,24 +1313,27 @@ class Moon:
             str filesystem path where object will be saved
 
         """
-        pickle.dump(self, open(f"{path}/_moon_{self.englishName.replace(' ','_')}.pickle", "wb"))
+        with open(f"{path}/_moon_{self.englishName.replace(' ','_')}.pickle", "wb") as f:
+            pickle.dump(self, f)
 
     @classmethod
     def scale_moons(cls, scale_data: dict = None, debug: bool = False):
         """
         Returns a list of moon objects with scaled distance, size, calculated mass & volume values (equaRadius, meanRadius, massRawKG, volumeRawKG, semimajorAxis, semiminorAxis)
         standard scaling is performed by the function f(x) = x/(10**scaleExponent)
+        all moons are scaled in one pass of vectorized array operations, results match calling scale_moon on each moon
 
         Parameters
         ----------
 
-        scale_data: dict 
+        scale_data: dict|scaling.ScaleProfile 
             dictionary of overrides for default scale_data
         debug: bool
             output informational messages (default: False)
         """
-        scale_data = cls._default_scale_data if scale_data == None else utilz.merge_attributes(cls._default_scale_data, scale_data)
-        return [i.scale_moon(scale_data=scale_data,debug=debug) for i in cls._instances]
+        scale_data = scaling.profile(cls._default_scale_data, scale_data)
+        # NOTE: all moons are scaled at once with array operations (see scaling.scale_many)
+        return scaling.scale_many(cls._instances, 'moon', scale_data['moon'], debug=debug)
 
     @classmethod
     def byname(cls, name: str):
@@ -1350,7 +1384,7 @@ class Moon:
             attribute on Moon class to output
         """
         try:
-            return sorted([i[-1] for i in cls.query(attrib)])
+            return list(index.of(cls._instances, attrib).keys)
         except AttributeError:
             print(f"WARNING: an attribute named `{attrib}` does not exist")
             return None
@@ -1404,14 +1438,28 @@ class Moon:
             attribute on Planet class to outpu
         """
         try:
-            return sorted({
-                i.englishName: i.__getattribute__(attrib) for i in cls._instances
-            }.items(), key=lambda x: x[1])
+            # NOTE: served from the sorted index of the attribute (see index.of), it is only rebuilt after moons are registered, removed or rescaled
+            return index.of(cls._instances, attrib).items()
         except AttributeError:
             print(f"WARNING: an attribute named `{attrib}` does not exist")
             return None
 
 
+    @classmethod
+    def export(cls, out, backend: str = None) -> int:
+        """
+        Streams all defined Moon objects to a file or pipe as NDJSON (one compact JSON object per moon), returns the number of rows written, see export.write
+
+        Parameters
+        ----------
+
+        out: str|file
+            filesystem path, '-' for stdout, or an open file object
+        backend: str
+            'orjson' or 'json' (default: orjson when it is installed)
+        """
+        return export.write(cls._instances, out, backend=backend)
+
     @classmethod
     def saveall(cls, path: str = "/tmp"):
         """
@@ -1438,7 +1486,10 @@ class Moon:
             filesystem path where objects to be loaded were saved
         """
         pkls = glob.glob(f"{path}/_moon_*.pickle")
-        [cls._instances.append(pickle.load(i)) for i in pkls]
+        # NOTE: the registry is the only owner of loaded objects, they are pinned until disposed
+        for i in pkls:
+            with open(i, "rb") as f:
+                cls._instances.append(pickle.load(f), pin=True)
 
     @classmethod
     def minmax(cls, attrib: str) -> tuple:
@@ -1457,6 +1508,111 @@ class Moon:
         maxi = max([i for i in cls._instances], key=lambda i: i.__getattribute__(attrib))
         return (mini,maxi)
 
+    @classmethod
+    def summary(cls, attrib: str, verify: bool = None) -> dict:
+        """
+        Returns count, mean, variance, std, min and max of a numeric attribute across all defined Moon objects, maintained incrementally as moons are registered, removed and rescaled (see stats.Tracker)
+
+        Parameters
+        ----------
+
+        attrib: str
+            numeric attribute on Moon class to summarize
+        verify: bool
+            compare the incremental values against a full recompute, raises stats.StatsError when they differ (default: off)
+        """
+        return stats.summary('moon', attrib, verify=verify)
+
+    @classmethod
+    def derive(cls, name: str) -> list:
+        """
+        Returns list of tuples (englishName, value) of a derived quantity (eg. 'density', 'surfaceGravity', 'escapeVelocity', 'hillRadius', 'orbitalPeriod') across all defined Moon objects, values are computed at once and cached until a moon is registered, removed or rescaled (see derived.QUANTITIES)
+
+        Parameters
+        ----------
+
+        name: str
+            name of the derived quantity
+        """
+        objs, values = derived.column(cls._instances, name)
+        return list(zip([i.englishName for i in objs], values.tolist()))
+
+    def quantity(self, name: str) -> float:
+        """
+        Returns a derived quantity of the Moon object (eg. 'density', 'surfaceGravity', 'escapeVelocity', 'hillRadius', 'orbitalPeriod'), see derived.value
+
+        Parameters
+        ----------
+
+        name: str
+            name of the derived quantity
+        """
+        return derived.value(self, name)
+
+    @classmethod
+    def range(cls, attrib: str, low = None, high = None, inclusive: bool = True) -> list:
+        """
+        Returns the Moon objects with low <= attrib <= high, in ascending order of attrib (served from a sorted index, see index.SortedIndex)
+
+        Parameters
+        ----------
+
+        attrib: str
+            attribute on Moon class to compare
+        low: number
+            lower bound, None for no lower bound (default: None)
+        high: number
+            upper bound, None for no upper bound (default: None)
+        inclusive: bool
+            include objects equal to the bounds (default: True)
+        """
+        return index.of(cls._instances, attrib).range(low, high, inclusive=inclusive)
+
+    @classmethod
+    def top(cls, attrib: str, k: int = 10) -> list:
+        """
+        Returns the k Moon objects with the largest values of attrib, largest first
+
+        Parameters
+        ----------
+
+        attrib: str
+            attribute on Moon class to compare
+        k: int
+            number of objects to return (default: 10)
+        """
+        return index.of(cls._instances, attrib).top(k)
+
+    @classmethod
+    def bottom(cls, attrib: str, k: int = 10) -> list:
+        """
+        Returns the k Moon objects with the smallest values of attrib, smallest first
+
+        Parameters
+        ----------
+
+        attrib: str
+            attribute on Moon class to compare
+        k: int
+            number of objects to return (default: 10)
+        """
+        return index.of(cls._instances, attrib).bottom(k)
+
+    @classmethod
+    def rank(cls, attrib: str, value) -> int:
+        """
+        Returns the 0 based rank (number of Moon objects with a smaller value of attrib) of a Moon object, or of a value
+
+        Parameters
+        ----------
+
+        attrib: str
+            attribute on Moon class to compare
+        value: Moon|number
+            a Moon object, or a value of attrib
+        """
+        return index.of(cls._instances, attrib).rank(value)
+
     @classmethod
     def min(cls, attrib: str) -> Moon:
         """
@@ -1544,13 +1700,175 @@ class Moon:
         attrib: str
             attribute on Planet class to output 
         evalstr: string 
-            representing `code` to be evaluated, the word `attrib` evaluatess to the attributes name, and the word `val` evaluates to the attributes value. eg: 'val/(10**5)' or 'val >= ctypes.c_uint(-1).value' or 'type(val)'
+            representing `code` to be evaluated, the word `attrib` evaluatess to the attributes name, and the word `val` evaluates to the attributes value. eg: 'val/(10**5)' or 'val >= UINT_MAX' or 'type(val)', see predicate.Predicate for the expression language (arbitrary python code is rejected)
         Returns: list
         """
-        vals = []
-        for i in cls._instances:
-            val = i.__getattribute__(attrib)
-            vals.append(
-                (i.englishName, val, eval(evalstr))
-            )
-        return vals
+        # NOTE: the expression is compiled once (see predicate.compile), and evaluated over all values at once
+        evaluator = predicate.compile(evalstr)
+        objs = list(cls._instances)
+        vals = [i.__getattribute__(attrib) for i in objs]
+        return list(zip([i.englishName for i in objs], vals, evaluator.evaluate(vals, attrib)))
+
+
+class MoonData:
+    """
+        A lazily resolved list of the moons orbiting a planet (Planet.moonData)
+
+    ...
+
+    Moon objects are only created (fetched from the data source and validated) when they are first accessed. Iterating resolves moons one at a time, indexing resolves moons up to the requested index, and len(), slicing or prefetch() resolve every moon at once. Moons which are not parseable, or are missing required attributes, are skipped.
+
+    Moons are registered in the registry context which was current when the MoonData was created, even when they are resolved later.
+
+    Instance Attributes
+    -------------------
+    pending: int
+        the number of moons which have not been resolved yet
+    resolved: bool
+        True once every moon has been resolved
+    rejected: list
+        moons which were skipped, dicts with keys rel and reasons (a list of schema.Rejection)
+    debug: bool
+        output informational messages (default: False)
+    """
+
+    def __init__(self, moons: list = None, debug: bool = False):
+        """
+        Returns an unresolved MoonData
+
+        Parameters
+        ----------
+
+        moons: list
+            the `moons` list of a planet (dicts with keys 'moon' and 'rel')
+        debug: bool
+            output informational messages (default: False)
+        """
+        self._pending = list(moons) if moons != None else []
+        self._pending.reverse()
+        self._moons = []
+        self._context = registry.current()
+        self.rejected = []
+        self.debug = debug
+
+    @classmethod
+    def of(cls, moons: list, debug: bool = False) -> MoonData:
+        """
+        Returns a resolved MoonData holding already constructed moons (eg. moons read from a snapshot, or cloned)
+
+        Parameters
+        ----------
+
+        moons: list
+            Moon objects
+        debug: bool
+            output informational messages (default: False)
+        """
+        moondata = cls(debug=debug)
+        moondata._moons = list(moons)
+        return moondata
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def resolved(self) -> bool:
+        return len(self._pending) == 0
+
+    def _fetch(self, moon: dict):
+        # returns (rel, payload) of a pending moon, payload is None for unparseable moons
+        if moon == None:
+            print(f"INFO: the moon {moon} is not parseable, it will be skipped in plotting") if self.debug else None
+            self.rejected.append({'rel': None, 'reasons': [schema.Rejection('', 'payload', "moon reference is null")]})
+            return None, None
+        return moon['rel'], data.get_moon_data(moon['rel'])
+
+    def _build(self, rel: str, payload: dict, reasons: list):
+        # creates (and keeps) a moon from a validated payload, payloads which were rejected are recorded and skipped without creating a Moon
+        if reasons:
+            print(f"INFO: the moon with relational URL {rel} is invalid ({'; '.join(i.message for i in reasons)}), it will be skipped in plotting") if self.debug else None
+            self.rejected.append({'rel': rel, 'reasons': reasons})
+            return
+        with self._context:
+            moonobj = Moon(rel, payload=payload, debug=self.debug)
+        print(f"INFO: adding moon with relational URL {rel}") if self.debug else None
+        self._moons.append(moonobj)
+
+    def _resolve_next(self):
+        rel, payload = self._fetch(self._pending.pop())
+        if rel != None:
+            self._build(rel, payload, schema.validate('moon', payload))
+
+    def prefetch(self) -> MoonData:
+        """
+        Resolves every pending moon (payloads are fetched, then validated and created), returns the MoonData
+        """
+        fetched = [i for i in (self._fetch(i) for i in reversed(self._pending)) if i[0] != None]
+        self._pending = []
+        [self._build(rel, payload, schema.validate('moon', payload)) for rel, payload in fetched]
+        return self
+
+    def append(self, moon: Moon):
+        """
+        Adds an already constructed moon (after every pending moon)
+
+        Parameters
+        ----------
+
+        moon: Moon
+            moon to add
+        """
+        self.prefetch()
+        self._moons.append(moon)
+
+    def rebind(self, context: registry.Context = None):
+        """
+        Registers the resolved moons in another registry context, moons resolved later register there too (used when planets are built in a worker)
+
+        Parameters
+        ----------
+
+        context: registry.Context
+            context to register into (default: the current context)
+        """
+        self._context = registry.current() if context == None else context
+        with self._context:
+            Moon._instances.extend(self._moons)
+
+    def __iter__(self):
+        i = 0
+        while True:
+            while i >= len(self._moons) and self._pending:
+                self._resolve_next()
+            if i >= len(self._moons):
+                return
+            yield self._moons[i]
+            i += 1
+
+    def __len__(self):
+        return len(self.prefetch()._moons)
+
+    def __bool__(self):
+        while not self._moons and self._pending:
+            self._resolve_next()
+        return len(self._moons) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and index >= 0:
+            while index >= len(self._moons) and self._pending:
+                self._resolve_next()
+            return self._moons[index]
+        return self.prefetch()._moons[index]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_context', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._context = registry.current()
+
+    def __repr__(self):
+        return f"<MoonData {len(self._moons)} resolved, {len(self._pending)} pending>"
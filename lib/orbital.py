@@ -1,7 +1,7 @@
 import os, sys
 sys.path.extend([os.path.join('../', 'lib')])
 from math import sqrt
-from blender import frame, frames, normalized_frame
+# NOTE: the driver expressions below call frame() and normalized_frame() from blenders driver namespace (see blender.HELPERS), this module never imports bpy
 
 
 
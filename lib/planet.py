@@ -1,12 +1,22 @@
 from __future__ import annotations
-import os, sys, weakref, pickle, glob, ctypes
+import os, sys, weakref, pickle, glob, ctypes, time
 sys.path.extend([os.path.join('../', 'lib')])
 import data
 import utilz
+import scaling
+import registry
+import predicate
+import export
+import fingerprint
+import stats
+import index
+import derived
+import schema
 from orbital import derive_semiminor_axis
-from moon import Moon
+from moon import Moon, MoonData
 import json
-import numpy as np
+np = utilz.lazy_import('numpy')
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 
 
@@ -19,12 +29,14 @@ class Planet:
     Class Attributes
     ----------------
 
-    _instances: list 
-        A list containing all defined instances of Planet objects
+    _instances: registry.ScopedRegistry 
+        A weak registry of all defined instances of Planet objects in the current registry context (see registry.Context), planets drop out of it once nothing else references them
     _default_scale_data: dict 
         A nervous addition of the default scale dictionary to the class for convenienence =)!!
     _planets: list
         A list of known and recognized planets in the solar system (there are 8!, and no pluto is not one)
+    rejected: list
+        planets skipped by the last make_planets call, dicts with keys name and reasons (a list of schema.Rejection), like MoonData.rejected
 
     Instance Attributes
     -------------------
@@ -133,8 +145,8 @@ class Planet:
         the planets axial tilt
     semiminorAxis: float 
         the semimajor axis of the orbital ellipse
-    moonData: list
-        a list of moons orbiting the planet
+    moonData: moon.MoonData
+        a lazily resolved list of moons orbiting the planet, moons are fetched and created on first access (see MoonData.prefetch)
     scaleMassExp: int 
         when using scale_data param, the mass scale value will be stored here
     scaleSizeExp: float
@@ -161,6 +173,10 @@ class Planet:
         the planets calculated harmonic frequency
     keys: list
         the list of attributes(keys) associated with the planet object
+    _raw: scaling.RawData
+        read-only raw (unscaled) values captured on initialization, scaling always starts from these values
+    _views: scaling.ViewCache
+        cache of scaled views of the planet, keyed by scale profile (see Planet.view)
 
     
     debug : bool
@@ -204,8 +220,9 @@ class Planet:
         'uranus',
         'neptune'
     ]
-    _instances = []
-    def __init__(self, name: str, scale_data: dict = None, debug: bool = False) -> Planet:
+    _instances = registry.scoped('planet')
+    rejected = []
+    def __init__(self, name: str, scale_data: dict = None, prefetch: bool = False, register: bool = True, payload: dict = None, debug: bool = False) -> Planet:
         """
         Returns an object of class planet.Planet 
 
@@ -214,7 +231,7 @@ class Planet:
 
         name: str
             English name of a planet in the Solar System
-        scale_data: dict
+        scale_data: dict|scaling.ScaleProfile
             A dict which overrides any default settings with user provided settings (default: see below for format..)
             {
                 "planet": {
@@ -225,6 +242,12 @@ class Planet:
                     "scale_mass": 8.5
                 }
             }
+        prefetch: bool
+            resolve every moon in moonData immediately instead of on first access (default: False)
+        register: bool
+            add the planet to Planet._instances (default: True), make_planets registers parallel builds itself to keep the registry order
+        payload: dict
+            the raw payload of the planet (as returned by data.get_planet_data, or built from a catalog, see catalog.bodies), fetched by name when omitted (default: None)
         debug (bool): output useful debugging information
         """
         self.default_scale_data = {
@@ -243,36 +266,28 @@ class Planet:
                 "scale_size": 1.5
             }
         }
-        self.user_scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        _planet = data.get_planet_data(name)
-
+        self.user_scale_data = scaling.profile(self.default_scale_data, scale_data).todict()
+        _planet = data.get_planet_data(name) if payload == None else payload
+        # NOTE: the planet payload may be poorly formatted, or have null (None) values for `mass` and/or `vol`, it will be skipped (see schema.PLANET)
+        reasons = schema.validate('planet', _planet)
+        if reasons:
+            print(f"WARNING: the planet {name} is invalid ({'; '.join(i.message for i in reasons)}), it will be skipped in plotting") if debug else None
+            return None
         for k in _planet.keys():
             print(f"INFO: adding attribute for planet {_planet['englishName']} ({k}) with value ({_planet[k]}) to {_planet['englishName']}") if debug else None
             setattr(self, k,  _planet[k])
 
-        self.semiminorAxis = round(derive_semiminor_axis(self))
+        self.semiminorAxis = derive_semiminor_axis(self)
         self.semimajorAxis = float(self.semimajorAxis)
         # NOTE: hack to avoid IDE errors, key is dynamically set from returned `planet` JSON object
         self.moons = self.moons
         self.vol = self.vol
         self.mass = self.mass
         self.sideralOrbit = self.sideralOrbit
-        if self.moons == None:
-            self.moonData = []
-        else:
-            self.moonData = []
-            
-            for moon in self.moons:
-                if moon == None:
-                    print(f"INFO: the moon {moon} is not parseable, it will be skipped in plotting") if debug else None
-                    continue              
-                moonobj = Moon(moon['rel'], debug=debug)
-                if not hasattr(moonobj, 'id') or not hasattr(moonobj, 'semimajorAxis') or not hasattr(moonobj, 'semiminorAxis') or not hasattr(moonobj, 'equaRadius') or not hasattr(moonobj, 'meanRadius') or not hasattr(moonobj, 'vol') or not hasattr(moonobj, 'mass'):
-                    print(f"INFO: the moon with relational URL {moon['rel']} is missing required attributes, it will be skipped in plotting") if debug else None
-                    continue
-                # TODO: do filtering based on attribute limits, in blender module...
-                print(f"INFO: adding moon with relational URL {moon['rel']}") if debug else None
-                self.moonData.append(moonobj)
+        # NOTE: moons are resolved (fetched, validated and created) on first access, see moon.MoonData
+        self.moonData = MoonData(self.moons, debug=debug)
+        if prefetch:
+            self.moonData.prefetch()
 
         # scales are zeroed on initialization and updated when scale_planets, or scale_planet is called against the object
         self.scaleMassExp = 0.0 
@@ -285,8 +300,8 @@ class Planet:
         self.volExponent = self.vol['volExponent']
         self.massValue = self.mass['massValue']
         self.massExponent = self.mass['massExponent']
-        self.volumeRawKG = float( f"{float(self.volValue*(10**self.volExponent)):f}" )
-        self.massRawKG = float( f"{float(self.massValue*(10**self.massExponent)):f}" )
+        self.volumeRawKG = scaling.magnitude(self.volValue, self.volExponent)
+        self.massRawKG = scaling.magnitude(self.massValue, self.massExponent)
         ############################################################################################################
         # NOTE: calculate distance from sun in AU                                                                  #
         # NOTE: calculate harmonic frequency value                                                                 #
@@ -296,69 +311,103 @@ class Planet:
         # 1.496*(10**(8-scale_exp)) -> 1 au in km (scaled)                                                         #
         # 6.685*(10**-(9-scale_exp)) -> 1 km in au (scaled)                                                        #     
         ############################################################################################################
-        self.distanceFromSunInAU = float(f"{float(self.semimajorAxis*( 6.685 * (10**-float(9) ) )):f}")
-        self.harmonicFrequency = float(f"{float((self.distanceFromSunInAU**3)/(self.sideralOrbit**2)):f}")        
+        self.distanceFromSunInAU, self.harmonicFrequency = scaling.orbit(self.semimajorAxis, self.sideralOrbit)
+        # NOTE: semiminorAxis, volumeRawKG, massRawKG, distanceFromSunInAU and harmonicFrequency are also derived quantities (see derived.QUANTITIES),
+        #   they stay eager attributes because they are part of the raw snapshot every scale operation, view and fingerprint starts from
         self.keys = list(_planet.keys()) + list(('semiminorAxis', 'volValue', 'volExponent', 'massValue', 'massExponent', 'volumeRawKG', 'massRawKG', 'distanceFromSunInAU','harmonicFrequency', 'scaleMassExp','scaleSizeExp','scaleDistExp', 'scaleVolExp'))
-        self.__class__._instances.append(self) 
+        # NOTE: raw values are never modified, every scale operation starts from them
+        self._raw = scaling.freeze(self)
+        self._views = scaling.ViewCache()
+        if register:
+            self.__class__._instances.append(self) 
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # NOTE: writes after construction (eg. planet.meanRadius = 1.0) invalidate the caches built over the registries holding the body, see registry.touch
+        if '_raw' in self.__dict__ and not name.startswith('_'):
+            registry.touch(self)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_views', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._views = scaling.ViewCache()
+
+    def fingerprint(self) -> str:
+        """
+        Returns a stable content hash of the Planet object (its raw payload and the exponents it is currently scaled by), see fingerprint.body
+        """
+        return fingerprint.body(self)
+
+    def view(self, scale_data: dict = None) -> scaling.ScaledView:
+        """
+        Returns a read-only view of the planet with scaled values, the planet itself is not modified
+        scaled values are computed from raw values on first access, views are cached per scale profile
+
+        Parameters
+        ----------
+
+        scale_data: dict|scaling.ScaleProfile 
+            dictionary of overrides for default scale_data
+        """
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        return scaling.view(self, 'planet', scale_data)
 
     def scale_distance(self, scale_data: dict = None, debug: bool = False) -> Planet:
         """
-        Returns a planet object with scaled distance values (semimajorAxis, semiminorAxis)
+        Returns a planet object with scaled distance values (semimajorAxis, semiminorAxis), computed from the planets raw values
         standard scaling is performed by the function f(x) = x/(10**scaleExponent)
 
         Parameters
         ----------
 
-        scale_data: dict 
+        scale_data: dict|scaling.ScaleProfile 
             dictionary of overrides for default scale_data
         debug: bool
             output informational messages (default: False)
         """
-        scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        print(f"INFO: {self.englishName} raw values [semimajorAxis -> {self.semimajorAxis}] [semiminorAxis -> ({self.semiminorAxis}]") if debug else None
-        self.scaleDistExp  = scale_data['planet']['scale_dist'] 
-        self.semimajorAxis = float(self.semimajorAxis/(10**self.scaleDistExp))
-        self.semiminorAxis = float(self.semiminorAxis/(10**self.scaleDistExp))
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        print(f"INFO: {self.englishName} raw values [semimajorAxis -> {self._raw['semimajorAxis']}] [semiminorAxis -> ({self._raw['semiminorAxis']}]") if debug else None
+        scaling.apply(self, 'planet', self._raw, scale_data['planet'], groups=('dist',))
         print(f"INFO: {self.englishName} scaled with [values/(10**{self.scaleDistExp})] [semimajorAxis -> {self.semimajorAxis}] [semiminorAxis -> {self.semiminorAxis}]") if debug else None
         return self
 
     def scale_mass(self, scale_data: dict = None, debug: bool = False) -> Planet:
         """
-        Returns a planet object with scaled calculated mass value (massRawKG)
+        Returns a planet object with scaled calculated mass value (massRawKG), computed from the planets raw values
         standard scaling is performed by the function f(x) = x/(10**scaleExponent)
 
         Parameters
         ----------
 
-        scale_data: dict 
+        scale_data: dict|scaling.ScaleProfile 
             (dictionary of overrides for default scale_data)
         debug: bool
             output informational messages (default: False)
         """
-        scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        print(f"INFO: {self.englishName} raw values [mass -> {self.massRawKG}]") if debug else None
-        self.scaleMassExp = scale_data['planet']['scale_mass']
-        self.massExponent = self.massExponent - (self.scaleMassExp)
-        self.massRawKG = float( f"{float(self.massValue*(10**self.scaleMassExp)):f}" )
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        print(f"INFO: {self.englishName} raw values [mass -> {self._raw['massRawKG']}]") if debug else None
+        scaling.apply(self, 'planet', self._raw, scale_data['planet'], groups=('mass',))
         print(f"INFO: {self.englishName} scaled with [values/(10**{self.scaleMassExp})] [mass ->{self.massRawKG}]") if debug else None
         return self
 
     def scale_vol(self, scale_data: dict = None, debug: bool = False) -> Moon:
         """
-        Returns a planet object with scaled calculated volume value (volumeRawKG)
+        Returns a planet object with scaled calculated volume value (volumeRawKG), computed from the planets raw values
         standard scaling is performed by the function f(x) = x/(10**scaleExponent)
 
         Parameters
         ----------
 
-        scale_data: dict (dictionary of overrides for default scale_data)
+        scale_data: dict|scaling.ScaleProfile (dictionary of overrides for default scale_data)
         output informational messages (default: False)
         """
-        scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        print(f"INFO: {self.englishName} raw values [volume -> {self.volumeRawKG}]") if debug else None
-        self.scaleVolExp = scale_data['planet']['scale_vol']
-        self.volExponent = self.volExponent - (self.scaleVolExp)
-        self.volumeRawKG = float( f"{float(self.volValue*(10**self.scaleVolExp)):f}" )
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        print(f"INFO: {self.englishName} raw values [volume -> {self._raw['volumeRawKG']}]") if debug else None
+        scaling.apply(self, 'planet', self._raw, scale_data['planet'], groups=('vol',))
         print(f"INFO: {self.englishName} scaled with [values/(10**{self.scaleVolExp})] [volume -> {self.volumeRawKG}]") if debug else None 
         return self
     
@@ -366,36 +415,24 @@ class Planet:
         """
         Returns a planet object with scaled distance, size, calculated mass & volume values (equaRadius, meanRadius, massRawKG, volumeRawKG, semimajorAxis, semiminorAxis)
         standard scaling is performed by the function f(x) = x/(10**scaleExponent)
+        values are computed from the planets raw values, calling scale_planet again with different scale_data does not compound
 
         Parameters
         ----------
 
-        scale_data: dict (dictionary of overrides for default scale_data)
+        scale_data: dict|scaling.ScaleProfile (dictionary of overrides for default scale_data)
         output informational messages (default: False)
         """
-        scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        self.meanRadius = self.meanRadius
-        self.equaRadius = self.equaRadius
-        self.englishName = self.englishName
-        print(f"INFO: {self.englishName} raw values [meanRadius -> {self.meanRadius}] [equaRadius -> {self.equaRadius}] [semimajorAxis -> {self.semimajorAxis}] [semiminorAxis -> {self.semiminorAxis}]  [volValueRawKG -> {self.volumeRawKG}] [massRawKG -> {self.massRawKG}]") if debug else None
-        self.scaleDistExp = scale_data['planet']['scale_dist'] 
-        self.scaleMassExp = scale_data['planet']['scale_mass'] 
-        self.scaleSizeExp = scale_data['planet']['scale_size']
-        self.scaleVolExp  = scale_data['planet']['scale_vol']
-        self.semimajorAxis = self.semimajorAxis/(10**self.scaleDistExp)
-        self.semiminorAxis = self.semiminorAxis/(10**self.scaleDistExp)
-        self.volExponent = self.volExponent - (self.scaleVolExp)
-        self.massExponent = self.massExponent - (self.scaleMassExp)
-        self.massRawKG = float( f"{float(self.massValue*(10**self.scaleMassExp)):f}" )
-        self.volumeRawKG = float( f"{float(self.volValue*(10**self.scaleVolExp)):f}" )
-
-        self.meanRadius = self.meanRadius / (10**(self.scaleSizeExp)) 
-        self.equaRadius = self.equaRadius / (10**(self.scaleSizeExp))
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        raw = self._raw
+        print(f"INFO: {self.englishName} raw values [meanRadius -> {raw['meanRadius']}] [equaRadius -> {raw['equaRadius']}] [semimajorAxis -> {raw['semimajorAxis']}] [semiminorAxis -> {raw['semiminorAxis']}]  [volValueRawKG -> {raw['volumeRawKG']}] [massRawKG -> {raw['massRawKG']}]") if debug else None
+        # NOTE: scaled values are always derived from the raw values, scaling twice does not compound
+        scaling.apply(self, 'planet', raw, scale_data['planet'])
         #self.distanceFromSunInAU = self.distanceFromSunInAU / (10**(scale_dist))
         # NOTE: you should scale moons with the planet accordingly
         # scale_size: float = 0.5,scale_mass: float = 8.5, scale_vol: float = 8.5, scale_dist: float = 4.2, debug: bool = False
         if do_moons:
-            [i.scale_moon(scale_data = scale_data, debug=debug) for i in self.moonData]
+            scaling.scale_many(self.moonData, 'moon', scale_data['moon'], debug=debug)
 
         print(f"INFO: {self.englishName} scaled values [meanRadius -> {self.meanRadius}] [equaRadius -> {self.equaRadius}] [semimajorAxis -> {self.semimajorAxis}] [semiminorAxis -> {self.semiminorAxis}]  [volValueRawKG -> {self.volumeRawKG}] [massRawKG -> {self.massRawKG}]") if debug else None
         return self
@@ -405,13 +442,13 @@ class Planet:
         """
         Returns a list containing attributes defined on a Planet object
         """
-        return list(self.__dict__.keys())
+        return [k for k in self.__dict__.keys() if not k.startswith('_')]
 
     def inspect(self) -> dict:
         """
         Returns dict containing k->v for all attributes defined on Planet object (recursively calls Moon.inspect on contained Moon objects)
         """
-        data = dict({k:v for k,v in self.__dict__.items()})
+        data = dict({k:v for k,v in self.__dict__.items() if not k.startswith('_')})
         moons = list(map(Moon.inspect, data['moonData']))
         data['moonData'] = moons
         return data
@@ -420,11 +457,11 @@ class Planet:
         """
         Returns JSON formatted str representing all attributes defined on Planet object (recursively calls Moon.inspect on contained Moon objects)
         """
-        data = dict({k:v for k,v in self.__dict__.items()})
+        data = dict({k:v for k,v in self.__dict__.items() if not k.startswith('_')})
         moons = list(map(Moon.inspect, data['moonData']))
         data['moonData'] = moons
         return str( 
-            json.dumps(data, separators=(',',':'), indent=2)
+            json.dumps(data, separators=(',',':'), indent=2, default=export.default)
         )
 
     def save(self, path: str = "/tmp"):
@@ -438,7 +475,23 @@ class Planet:
             str filesystem path where object will be saved
 
         """
-        pickle.dump(self, open(f"{path}/_planet_{self.englishName.replace(' ', '')}.pickle", "wb"))
+        with open(f"{path}/_planet_{self.englishName.replace(' ', '')}.pickle", "wb") as f:
+            pickle.dump(self, f)
+
+    @classmethod
+    def export(cls, out, backend: str = None) -> int:
+        """
+        Streams all defined Planet objects to a file or pipe as NDJSON (one compact JSON object per planet), returns the number of rows written, see export.write
+
+        Parameters
+        ----------
+
+        out: str|file
+            filesystem path, '-' for stdout, or an open file object
+        backend: str
+            'orjson' or 'json' (default: orjson when it is installed)
+        """
+        return export.write(cls._instances, out, backend=backend)
 
     @classmethod
     def saveall(cls, path: str = "/tmp"):
@@ -466,17 +519,21 @@ class Planet:
             filesystem path where objects to be loaded were saved
         """
         pkls = glob.glob(f"{path}/_planet_*.pickle")
-        [cls._instances.append(pickle.load(i)) for i in pkls]
+        # NOTE: the registry is the only owner of loaded objects, they are pinned until disposed
+        for i in pkls:
+            with open(i, "rb") as f:
+                cls._instances.append(pickle.load(f), pin=True)
 
     @classmethod
     def scale_planets(cls, scale_data: dict = None, do_moons: bool = True, debug: bool = False):
         """
         Scales all defined planets to scales specified by scale_data 
+        all planets (and moons) are scaled in one pass of vectorized array operations, results match calling scale_planet on each planet
 
         Parameters
         ----------
 
-        scale_data: dict 
+        scale_data: dict|scaling.ScaleProfile 
             A dictionary 
         do_moons: bool 
             scale moons aroundPlanet
@@ -485,10 +542,12 @@ class Planet:
         debug (bool): 
             enables debug messages
         """
-        scale_data = cls._default_scale_data if scale_data == None else utilz.merge_attributes(cls._default_scale_data, scale_data)
-        [i.scale_planet(scale_data=scale_data, debug=debug) for i in cls._instances]
+        scale_data = scaling.profile(cls._default_scale_data, scale_data)
+        # NOTE: all planets (and moons) are scaled at once with array operations (see scaling.scale_many)
+        scaling.scale_many(cls._instances, 'planet', scale_data['planet'], debug=debug)
         if do_moons:
-            [i.scale_moon(scale_data=scale_data, debug=debug) for i in Moon._instances]
+            [i.moonData.prefetch() for i in cls._instances]
+            scaling.scale_many(Moon._instances, 'moon', scale_data['moon'], debug=debug)
 
     @classmethod
     def byname(cls, name: str):
@@ -539,9 +598,8 @@ class Planet:
 
         """
         try:
-            return sorted({
-                i.englishName: i.__getattribute__(attrib) for i in cls._instances
-            }.items(), key=lambda x: x[1])
+            # NOTE: served from the sorted index of the attribute (see index.of), it is only rebuilt after planets are registered, removed or rescaled
+            return index.of(cls._instances, attrib).items()
         except AttributeError:
             print(f"WARNING: an attribute named `{attrib}` does not exist")
             return None
@@ -559,7 +617,7 @@ class Planet:
 
         """
         try:
-            return sorted([i[-1] for i in cls.query(attrib)])
+            return list(index.of(cls._instances, attrib).keys)
         except AttributeError:
             print(f"WARNING: an attribute named `{attrib}` does not exist")
             return None
@@ -628,6 +686,111 @@ class Planet:
         maxi = max([i for i in cls._instances], key=lambda i: i.__getattribute__(attrib))
         return (mini,maxi)
 
+    @classmethod
+    def summary(cls, attrib: str, verify: bool = None) -> dict:
+        """
+        Returns count, mean, variance, std, min and max of a numeric attribute across all defined Planet objects, maintained incrementally as planets are registered, removed and rescaled (see stats.Tracker)
+
+        Parameters
+        ----------
+
+        attrib: str
+            numeric attribute on Planet class to summarize
+        verify: bool
+            compare the incremental values against a full recompute, raises stats.StatsError when they differ (default: off)
+        """
+        return stats.summary('planet', attrib, verify=verify)
+
+    @classmethod
+    def derive(cls, name: str) -> list:
+        """
+        Returns list of tuples (englishName, value) of a derived quantity (eg. 'density', 'surfaceGravity', 'escapeVelocity', 'hillRadius', 'orbitalPeriod') across all defined Planet objects, values are computed at once and cached until a planet is registered, removed or rescaled (see derived.QUANTITIES)
+
+        Parameters
+        ----------
+
+        name: str
+            name of the derived quantity
+        """
+        objs, values = derived.column(cls._instances, name)
+        return list(zip([i.englishName for i in objs], values.tolist()))
+
+    def quantity(self, name: str) -> float:
+        """
+        Returns a derived quantity of the Planet object (eg. 'density', 'surfaceGravity', 'escapeVelocity', 'hillRadius', 'orbitalPeriod'), see derived.value
+
+        Parameters
+        ----------
+
+        name: str
+            name of the derived quantity
+        """
+        return derived.value(self, name)
+
+    @classmethod
+    def range(cls, attrib: str, low = None, high = None, inclusive: bool = True) -> list:
+        """
+        Returns the Planet objects with low <= attrib <= high, in ascending order of attrib (served from a sorted index, see index.SortedIndex)
+
+        Parameters
+        ----------
+
+        attrib: str
+            attribute on Planet class to compare
+        low: number
+            lower bound, None for no lower bound (default: None)
+        high: number
+            upper bound, None for no upper bound (default: None)
+        inclusive: bool
+            include objects equal to the bounds (default: True)
+        """
+        return index.of(cls._instances, attrib).range(low, high, inclusive=inclusive)
+
+    @classmethod
+    def top(cls, attrib: str, k: int = 10) -> list:
+        """
+        Returns the k Planet objects with the largest values of attrib, largest first
+
+        Parameters
+        ----------
+
+        attrib: str
+            attribute on Planet class to compare
+        k: int
+            number of objects to return (default: 10)
+        """
+        return index.of(cls._instances, attrib).top(k)
+
+    @classmethod
+    def bottom(cls, attrib: str, k: int = 10) -> list:
+        """
+        Returns the k Planet objects with the smallest values of attrib, smallest first
+
+        Parameters
+        ----------
+
+        attrib: str
+            attribute on Planet class to compare
+        k: int
+            number of objects to return (default: 10)
+        """
+        return index.of(cls._instances, attrib).bottom(k)
+
+    @classmethod
+    def rank(cls, attrib: str, value) -> int:
+        """
+        Returns the 0 based rank (number of Planet objects with a smaller value of attrib) of a Planet object, or of a value
+
+        Parameters
+        ----------
+
+        attrib: str
+            attribute on Planet class to compare
+        value: Planet|number
+            a Planet object, or a value of attrib
+        """
+        return index.of(cls._instances, attrib).rank(value)
+
     @classmethod
     def min(cls, attrib: str) -> Planet:
         """
@@ -734,26 +897,77 @@ class Planet:
         attrib: str
             attribute on Planet class to output 
         evalstr: string 
-            representing `code` to be evaluated, the word `attrib` evaluatess to the attributes name, and the word `val` evaluates to the attributes value. eg: 'val/(10**5)' or 'val >= ctypes.c_uint(-1).value' or 'type(val)'
+            representing `code` to be evaluated, the word `attrib` evaluatess to the attributes name, and the word `val` evaluates to the attributes value. eg: 'val/(10**5)' or 'val >= UINT_MAX' or 'type(val)', see predicate.Predicate for the expression language (arbitrary python code is rejected)
         Returns: list
         """
-        vals = []
-        for i in cls._instances:
-            val = i.__getattribute__(attrib)
-            vals.append(
-                (i.englishName, val, eval(evalstr))
-            )
-        return vals
+        # NOTE: the expression is compiled once (see predicate.compile), and evaluated over all values at once
+        evaluator = predicate.compile(evalstr)
+        objs = list(cls._instances)
+        vals = [i.__getattribute__(attrib) for i in objs]
+        return list(zip([i.englishName for i in objs], vals, evaluator.evaluate(vals, attrib)))
 
     @classmethod 
-    def make_planets(cls, debug: bool = False):
+    def make_planets(cls, prefetch: bool = False, parallel: bool = False, workers: int = None, executor: str = "thread", report: bool = False, debug: bool = False):
         """
-        Create all known planets in the solar system (makes moons also)
+        Create all known planets in the solar system (moons are created on first access of Planet.moonData, or immediately with prefetch)
+
+        In parallel mode every planet (and its moons, with prefetch) is built concurrently, the planets are then registered in `_planets` order so Planet._instances and Moon._instances match a sequential build.
 
         Parameters
         ----------
 
+        prefetch: bool
+            resolve every planets moons immediately (default: False)
+        parallel: bool
+            build the planets concurrently (default: False)
+        workers: int
+            number of workers used in parallel mode (default: one per planet)
+        executor: str
+            'thread' or 'process' pool used in parallel mode (default: 'thread')
+        report: bool
+            also return a dict of build times in seconds, by planet name (plus 'total') (default: False)
         debug: bool
             print info messages
+
+        Returns
+        -------
+        list of Planet, or (list of Planet, dict) when report is True, keep the list: Planet._instances only holds weak references, so the planets (and Planet.byname) are gone once nothing references them
         """
-        return [cls(i,debug=debug) for i in cls._planets]
\ No newline at end of file
+        start = time.perf_counter()
+        if not parallel:
+            built = [_build_planet(cls, i, prefetch, True, debug) for i in cls._planets]
+        else:
+            if executor not in ('thread', 'process'):
+                raise ValueError(f"executor must be 'thread' or 'process', got {executor!r}")
+            pool = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+            with pool(max_workers=workers or len(cls._planets)) as ex:
+                built = list(ex.map(_build_planet, *zip(*[(cls, i, prefetch, False, debug) for i in cls._planets])))
+        # NOTE: planets with an invalid payload are skipped, and recorded in Planet.rejected
+        cls.rejected = [{'name': name, 'reasons': reasons} for name, (planet, reasons, _) in zip(cls._planets, built) if reasons]
+        [print(f"INFO: the planet {i['name']} is invalid ({'; '.join(r.message for r in i['reasons'])}), it will be skipped in plotting") for i in cls.rejected] if debug else None
+        built = [(planet, t) for planet, reasons, t in built if not reasons]
+        if parallel:
+            context = registry.current()
+            for planet, _ in built:
+                cls._instances.append(planet)
+                planet.moonData.rebind(context)
+        planets = [i[0] for i in built]
+        timings = dict((i.englishName, t) for i, t in built)
+        timings['total'] = time.perf_counter() - start
+        [print(f"INFO: built planet {k} in {v:.3f}s") for k, v in timings.items()] if debug else None
+        return (planets, timings) if report else planets
+
+
+def _build_planet(cls, name: str, prefetch: bool, register: bool, debug: bool) -> tuple:
+    # builds one planet for make_planets, returns (planet, rejections, seconds), planet is None when its payload is rejected (see schema.PLANET), unregistered builds use a throwaway registry context
+    start = time.perf_counter()
+    payload = data.get_planet_data(name)
+    reasons = schema.validate('planet', payload)
+    if reasons:
+        return None, reasons, time.perf_counter() - start
+    if register:
+        planet = cls(name, prefetch=prefetch, payload=payload, debug=debug)
+    else:
+        with registry.Context(f"build-{name}"):
+            planet = cls(name, prefetch=prefetch, register=False, payload=payload, debug=debug)
+    return planet, reasons, time.perf_counter() - start
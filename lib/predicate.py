@@ -0,0 +1,416 @@
+# safe, compiled filter expressions for Sun, Planet, Moon and SolarSystem queries
+from __future__ import annotations
+import os, sys, ast, math, ctypes, operator
+from functools import lru_cache
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+np = utilz.lazy_import('numpy')
+
+# names which may be used in an expression, besides `val` and `attrib`
+CONSTANTS = {
+    "True": True,
+    "False": False,
+    "None": None,
+    "pi": math.pi,
+    "UINT_MAX": ctypes.c_uint(-1).value
+}
+
+# functions which may be called in an expression, with their vectorized counterpart (the name of a numpy function, a function, or None when only the python version exists)
+FUNCTIONS = {
+    "abs": (abs, "abs"),
+    "round": (round, lambda *args: _round(*args)),
+    "min": (min, "minimum"),
+    "max": (max, "maximum"),
+    "sqrt": (math.sqrt, "sqrt"),
+    "log10": (math.log10, "log10"),
+    "float": (float, lambda v: np.asarray(v, dtype=np.float64)),
+    "int": (int, lambda v: _int(v)),
+    "str": (str, None),
+    "bool": (bool, None),
+    "len": (len, None),
+    "type": (type, None)
+}
+
+BINOPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: lambda a, b: _mul(a, b),
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: lambda a, b: _pow(a, b)
+}
+
+UNARYOPS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos
+}
+
+COMPAREOPS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b
+}
+
+# largest integer result (in bits) and sequence (str or tuple length) `*` and `**` may build, bounds expressions like 10**10**10, ((val**4096)**4096)**4096 or "x" * 10**10 before they are computed
+MAX_INT_BITS = 65536
+MAX_SEQUENCE = 65536
+
+# ints beyond this magnitude have no exact float64 value, columns holding them are evaluated per value (python compares ints and floats exactly)
+MAX_EXACT_INT = 2**53
+
+# integer results of vectorized arithmetic must stay below this magnitude, larger results (which int64 would wrap) are evaluated per value with python ints
+INT_LIMIT = 2.0**62
+
+
+class PredicateError(ValueError):
+    """
+    Raised when an expression can not be parsed, or uses anything outside of the expression language
+    """
+
+
+class _Vectorize(Exception):
+    # raised while building a vectorized result when an expression can only be evaluated per value
+    pass
+
+
+def _int(values):
+    # vectorized int(): truncates floats to int64, evaluated per value when a value is not finite or does not fit
+    if values.dtype.kind in 'iu':
+        return values
+    if not np.all(np.isfinite(values)) or np.any(np.abs(values) >= INT_LIMIT):
+        raise _Vectorize()
+    return np.trunc(values).astype(np.int64)
+
+
+def _round(values, ndigits=None):
+    # vectorized round(): round(x) is an int (half to even, as np.rint), round(x, 0) a float, other ndigits are evaluated per value (python rounds them exactly)
+    if ndigits == None:
+        return _int(np.rint(values) if values.dtype.kind == 'f' else values)
+    if values.dtype.kind == 'f' and ndigits == 0:
+        return np.rint(values)
+    if values.dtype.kind in 'iu' and isinstance(ndigits, int) and ndigits >= 0:
+        return values
+    raise _Vectorize()
+
+
+def _isint(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _pow(base, exp):
+    # NOTE: bit_length(base) * exp bounds the size of an integer power
+    if _isint(base) and _isint(exp) and exp > 0 and abs(base).bit_length() * exp > MAX_INT_BITS:
+        raise PredicateError(f"{base}**{exp} is too large (max: {MAX_INT_BITS} bits)")
+    return operator.pow(base, exp)
+
+
+def _mul(a, b):
+    if _isint(a) and _isint(b) and abs(a).bit_length() + abs(b).bit_length() > MAX_INT_BITS:
+        raise PredicateError(f"product is too large (max: {MAX_INT_BITS} bits)")
+    for seq, n in ((a, b), (b, a)):
+        if isinstance(seq, (str, tuple)) and _isint(n) and len(seq) * n > MAX_SEQUENCE:
+            raise PredicateError(f"sequence of {len(seq) * n} items is too large (max: {MAX_SEQUENCE})")
+    return operator.mul(a, b)
+
+
+def _inexact(a, b) -> bool:
+    # comparing an int beyond MAX_EXACT_INT with a float rounds the int in numpy, python compares them exactly
+    kinds = ['f' if isinstance(i, float) or isinstance(i, np.ndarray) and i.dtype.kind == 'f' else 'i' if _isint(i) or isinstance(i, np.ndarray) and i.dtype.kind in 'iu' else None for i in (a, b)]
+    if 'f' not in kinds or 'i' not in kinds:
+        return False
+    ints = a if kinds[0] == 'i' else b
+    return bool(np.any(np.abs(ints) > MAX_EXACT_INT)) if isinstance(ints, np.ndarray) else abs(ints) > MAX_EXACT_INT
+
+
+class Predicate:
+    """
+    A compiled expression over an attribute value
+
+    The expression language supports numbers, strings, tuples/lists (for `in`), arithmetic (+ - * / // % **), comparisons (== != < <= > >= in, not in, chained comparisons), boolean operators (and, or, not), the names `val` (the attribute value) and `attrib` (the attribute name), the constants in CONSTANTS and calls to the functions in FUNCTIONS. Anything else (attribute access, subscripts, lambdas, comprehensions, other names) is rejected when the expression is compiled.
+
+    An expression is parsed once, then evaluated either as a python closure for a single value (Predicate(val, attrib)), or vectorized over an array of values (Predicate.mask / Predicate.evaluate).
+
+    Instance Attributes
+    -------------------
+    expr: str
+        the source expression
+    tree: ast.Expression
+        the validated syntax tree
+    """
+
+    def __init__(self, expr: str):
+        """
+        Returns a compiled Predicate
+
+        Parameters
+        ----------
+
+        expr: str
+            expression to compile, eg. 'val >= 10e8' or 'val == "Earth"' or 'val/(10**5)'
+        """
+        self.expr = expr
+        try:
+            self.tree = ast.parse(expr.strip(), mode='eval')
+        except SyntaxError as e:
+            raise PredicateError(f"invalid expression `{expr}`: {e.msg}")
+        self._closure = self._compile(self.tree.body)
+        # NOTE: vectorized `and`/`or` yield booleans rather than operand values, evaluate() only vectorizes expressions without them
+        self._boolops = any(isinstance(i, ast.BoolOp) for i in ast.walk(self.tree))
+
+    def __call__(self, val, attrib: str = None):
+        """
+        Returns the value of the expression for a single attribute value
+
+        Parameters
+        ----------
+
+        val: any
+            attribute value
+        attrib: str
+            attribute name
+        """
+        return self._closure(val, attrib)
+
+    def evaluate(self, values, attrib: str = None) -> list:
+        """
+        Returns a list holding the value of the expression for each value in `values`, vectorized when possible
+
+        Parameters
+        ----------
+
+        values: list|np.ndarray
+            attribute values
+        attrib: str
+            attribute name
+        """
+        values = column(values)
+        try:
+            if self._boolops:
+                raise _Vectorize()
+            result = self._vector(self.tree.body, values, attrib)
+            if np.ndim(result) == 0:
+                return [result.item() if isinstance(result, np.generic) else result] * len(values)
+            return np.asarray(result).tolist()
+        except (_Vectorize, TypeError, ValueError, ArithmeticError):
+            return [self._closure(v, attrib) for v in values.tolist()]
+
+    def mask(self, values, attrib: str = None) -> np.ndarray:
+        """
+        Returns a boolean array, True where the expression is truthy for the corresponding value in `values`
+
+        Parameters
+        ----------
+
+        values: list|np.ndarray
+            attribute values
+        attrib: str
+            attribute name
+        """
+        values = column(values)
+        try:
+            result = self._vector(self.tree.body, values, attrib)
+            if np.ndim(result) == 0:
+                return np.full(len(values), bool(result))
+            result = np.asarray(result)
+            if result.dtype == object:
+                return np.fromiter((bool(r) for r in result), dtype=bool, count=len(result))
+            return result.astype(bool)
+        except (_Vectorize, TypeError, ValueError, ArithmeticError):
+            return np.fromiter((bool(self._closure(v, attrib)) for v in values.tolist()), dtype=bool, count=len(values))
+
+    def __repr__(self):
+        return f"<Predicate {self.expr!r}>"
+
+    # NOTE: _compile validates the tree and returns a closure taking (val, attrib)
+    def _compile(self, node):
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float, str, bool, type(None))):
+                raise PredicateError(f"unsupported constant {node.value!r} in `{self.expr}`")
+            value = node.value
+            return lambda val, attrib: value
+        if isinstance(node, ast.Name):
+            if node.id == 'val':
+                return lambda val, attrib: val
+            if node.id == 'attrib':
+                return lambda val, attrib: attrib
+            if node.id in CONSTANTS:
+                value = CONSTANTS[node.id]
+                return lambda val, attrib: value
+            raise PredicateError(f"unknown name `{node.id}` in `{self.expr}`, use `val`, `attrib` or one of {tuple(CONSTANTS)}")
+        if isinstance(node, (ast.Tuple, ast.List)):
+            items = [self._compile(i) for i in node.elts]
+            return lambda val, attrib: tuple(i(val, attrib) for i in items)
+        if isinstance(node, ast.BinOp) and type(node.op) in BINOPS:
+            op = BINOPS[type(node.op)]
+            left, right = self._compile(node.left), self._compile(node.right)
+            return lambda val, attrib: op(left(val, attrib), right(val, attrib))
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda val, attrib: not operand(val, attrib)
+            if type(node.op) in UNARYOPS:
+                op = UNARYOPS[type(node.op)]
+                return lambda val, attrib: op(operand(val, attrib))
+        if isinstance(node, ast.BoolOp):
+            values = [self._compile(i) for i in node.values]
+            if isinstance(node.op, ast.And):
+                def _and(val, attrib):
+                    result = True
+                    for i in values:
+                        result = i(val, attrib)
+                        if not result:
+                            return result
+                    return result
+                return _and
+            def _or(val, attrib):
+                result = False
+                for i in values:
+                    result = i(val, attrib)
+                    if result:
+                        return result
+                return result
+            return _or
+        if isinstance(node, ast.Compare) and all(type(op) in COMPAREOPS for op in node.ops):
+            left = self._compile(node.left)
+            pairs = [(COMPAREOPS[type(op)], self._compile(c)) for op, c in zip(node.ops, node.comparators)]
+            def _compare(val, attrib):
+                a = left(val, attrib)
+                for op, comparator in pairs:
+                    b = comparator(val, attrib)
+                    if not op(a, b):
+                        return False
+                    a = b
+                return True
+            return _compare
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS and not node.keywords:
+            func = FUNCTIONS[node.func.id][0]
+            args = [self._compile(i) for i in node.args]
+            return lambda val, attrib: func(*[i(val, attrib) for i in args])
+        raise PredicateError(f"unsupported syntax `{ast.unparse(node)}` in `{self.expr}`")
+
+    # NOTE: _vector evaluates an (already validated) tree with numpy semantics, `val` is an array
+    def _vector(self, node, values, attrib):
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name):
+            if node.id == 'val':
+                return values
+            if node.id == 'attrib':
+                return attrib
+            return CONSTANTS[node.id]
+        if isinstance(node, (ast.Tuple, ast.List)):
+            items = [self._vector(i, values, attrib) for i in node.elts]
+            if any(isinstance(i, np.ndarray) for i in items):
+                raise _Vectorize()
+            return tuple(items)
+        if isinstance(node, ast.BinOp):
+            left, right = self._vector(node.left, values, attrib), self._vector(node.right, values, attrib)
+            if isinstance(node.op, ast.Pow):
+                if isinstance(right, np.ndarray):
+                    raise _Vectorize()
+                if not isinstance(left, np.ndarray):
+                    return _pow(left, right)
+                # NOTE: numpy float powers may differ from python's in the last bit, only exact (integer) powers are vectorized
+                if left.dtype.kind not in 'iu':
+                    raise _Vectorize()
+            if isinstance(left, np.ndarray) and left.dtype == object or isinstance(right, np.ndarray) and right.dtype == object:
+                raise _Vectorize()
+            op = BINOPS[type(node.op)]
+            # NOTE: python float powers raise OverflowError rather than returning inf
+            with np.errstate(divide='raise', invalid='raise', over='raise' if isinstance(node.op, ast.Pow) else 'ignore'):
+                result = op(left, right)
+                # NOTE: int64 arithmetic wraps silently, results near its range are evaluated per value with python ints
+                if isinstance(result, np.ndarray) and result.dtype.kind in 'iu' and isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Pow)):
+                    approx = op(np.asarray(left, dtype=np.float64), np.asarray(right, dtype=np.float64))
+                    if not np.all(np.abs(approx) < INT_LIMIT):
+                        raise _Vectorize()
+                return result
+        if isinstance(node, ast.UnaryOp):
+            operand = self._vector(node.operand, values, attrib)
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(operand) if isinstance(operand, np.ndarray) else not operand
+            return UNARYOPS[type(node.op)](operand)
+        if isinstance(node, ast.BoolOp):
+            items = [self._vector(i, values, attrib) for i in node.values]
+            if not any(isinstance(i, np.ndarray) for i in items):
+                raise _Vectorize()
+            reduce = np.logical_and.reduce if isinstance(node.op, ast.And) else np.logical_or.reduce
+            return reduce([np.asarray(i, dtype=bool) if isinstance(i, np.ndarray) else np.full(len(values), bool(i)) for i in items])
+        if isinstance(node, ast.Compare):
+            left = self._vector(node.left, values, attrib)
+            result = None
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._vector(comparator, values, attrib)
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    if isinstance(right, np.ndarray) or not isinstance(right, tuple):
+                        raise _Vectorize()
+                    step = np.isin(left, np.asarray(right, dtype=object if left.dtype == object else None)) if isinstance(left, np.ndarray) else left in right
+                    step = np.logical_not(step) if isinstance(op, ast.NotIn) else step
+                else:
+                    if _inexact(left, right):
+                        raise _Vectorize()
+                    step = COMPAREOPS[type(op)](left, right)
+                if isinstance(step, np.ndarray) and step.dtype == object:
+                    step = step.astype(bool)
+                result = step if result is None else np.logical_and(result, step)
+                left = right
+            return result
+        if isinstance(node, ast.Call):
+            vector = FUNCTIONS[node.func.id][1]
+            args = [self._vector(i, values, attrib) for i in node.args]
+            if not any(isinstance(i, np.ndarray) for i in args):
+                return FUNCTIONS[node.func.id][0](*args)
+            if vector == None or any(isinstance(i, np.ndarray) and i.dtype == object for i in args):
+                raise _Vectorize()
+            if node.func.id in ('min', 'max') and len(args) > 2:
+                raise _Vectorize()
+            # NOTE: python min/max return the winning argument itself, an int bound of float values (or the reverse) keeps its type per value
+            if node.func.id in ('min', 'max') and len(set('f' if isinstance(i, float) or isinstance(i, np.ndarray) and i.dtype.kind == 'f' else 'i' for i in args)) > 1:
+                raise _Vectorize()
+            vector = getattr(np, vector) if isinstance(vector, str) else vector
+            return vector(*args)
+        raise _Vectorize()
+
+
+def column(values) -> np.ndarray:
+    """
+    Returns `values` as a one dimensional numpy array: float64 when every value is a float, int64 when every value is an int within MAX_EXACT_INT, object otherwise
+
+    Columns never change the type or value of an item (array.tolist() gives back the original values), so mixed int and float columns are object columns and are evaluated per value.
+
+    Parameters
+    ----------
+
+    values: list|np.ndarray
+        attribute values
+    """
+    if isinstance(values, np.ndarray) and values.ndim == 1:
+        return values
+    values = list(values)
+    if values and all(isinstance(v, float) for v in values):
+        return np.asarray(values, dtype=np.float64)
+    if values and all(_isint(v) and abs(v) <= MAX_EXACT_INT for v in values):
+        return np.asarray(values, dtype=np.int64)
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+@lru_cache(maxsize=256)
+def compile(expr: str) -> Predicate:
+    """
+    Returns a compiled (and cached) Predicate for `expr`, raises PredicateError for invalid or unsafe expressions
+
+    Parameters
+    ----------
+
+    expr: str
+        expression to compile, the word `val` evaluates to the attributes value and the word `attrib` to the attributes name. eg: 'val/(10**5)' or 'val >= UINT_MAX' or 'val == "Earth" or val == "Mars"'
+    """
+    return Predicate(expr)
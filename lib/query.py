@@ -0,0 +1,376 @@
+# memoized SolarSystem queries (vals, byvalue, min, max, minmax), served from cache until the queried registries change, and vectorized select / where / groupby / aggregate queries over bodies
+from __future__ import annotations
+import os, sys, math, weakref
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+np = utilz.lazy_import('numpy')
+import registry
+import predicate
+
+# number of query results kept per cache, the oldest result is dropped first
+CACHE_SIZE = 256
+
+
+def stamp(source) -> tuple:
+    """
+    Returns the state a query result over a registry is valid for: the generation of the registry (bumped as objects are registered or removed) and registry.changes() (bumped as objects are rescaled, or their attributes written)
+
+    Parameters
+    ----------
+
+    source: registry.Registry|registry.ScopedRegistry|registry.Aggregate
+        the queried registry
+    """
+    return (source.generation, registry.changes())
+
+
+def extremes(objs, attr: str) -> tuple:
+    """
+    Returns (min(object), max(object)) of objects by an attribute in a single pass, ties keep the first object (as min() and max() do)
+
+    Parameters
+    ----------
+
+    objs: iterable
+        objects to compare, raises AttributeError when an object has no such attribute and ValueError when there are none
+    attr: str
+        the compared attribute
+    """
+    objs = iter(objs)
+    try:
+        low = high = next(objs)
+    except StopIteration:
+        raise ValueError("extremes() arg is an empty sequence") from None
+    lowest = highest = getattr(low, attr)
+    for obj in objs:
+        value = getattr(obj, attr)
+        if value < lowest:
+            low, lowest = obj, value
+        elif value > highest:
+            high, highest = obj, value
+    return low, high
+
+
+# returned by _release when a cached result references a body which is gone
+_GONE = object()
+
+
+def _hold(value) -> tuple:
+    # returns (kind, stored value) of a query result, bodies (and lists / tuples of bodies) are held by weak references so cached results never keep them alive
+    try:
+        if isinstance(value, (list, tuple)):
+            return (type(value), [weakref.ref(i) for i in value])
+        return ('ref', weakref.ref(value))
+    except TypeError:
+        return (None, value)
+
+
+def _release(held: tuple):
+    # returns the query result stored by _hold, _GONE when a body it references is gone
+    kind, value = held
+    if kind == None:
+        return value
+    if kind == 'ref':
+        value = value()
+        return _GONE if value is None else value
+    value = [i() for i in value]
+    return _GONE if any(i is None for i in value) else kind(value)
+
+
+class Cache:
+    """
+    Query results keyed by (query, objtype, attr, predicate..), each stored with the stamp (see query.stamp) of the registry it was computed over
+
+    A result is served until the stamp of the registry changes, so repeated queries over an unchanged solar system never walk its objects. Lists and dicts are returned as copies, callers may modify them freely. Bodies in results are held by weak references: a cached result never keeps a disposed body alive, a result referencing a body which is gone is computed again.
+
+        cache = query.Cache()
+        cache.get(('vals', 'planets', 'meanRadius'), query.stamp(source), lambda: compute(source))
+
+    Instance Attributes
+    -------------------
+    size: int
+        maximum number of results kept (default: query.CACHE_SIZE)
+    hits: int
+        number of results served from cache
+    misses: int
+        number of results computed
+    """
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._results = {}
+
+    def get(self, key: tuple, stamp: tuple, compute):
+        """
+        Returns the cached result of a query, computing (and caching) it when it is missing or stale
+
+        Parameters
+        ----------
+
+        key: tuple
+            identifies the query, eg. ('byvalue', 'planets', 'meanRadius', 'val > 5000')
+        stamp: tuple
+            state of the queried registry (see query.stamp)
+        compute: callable
+            returns the result, exceptions are raised to the caller and nothing is cached
+        """
+        entry = self._results.get(key)
+        value = _release(entry[1]) if entry != None and entry[0] == stamp else _GONE
+        if value is not _GONE:
+            self.hits += 1
+        else:
+            self.misses += 1
+            value = compute()
+            self._results.pop(key, None)
+            self._results[key] = (stamp, _hold(value))
+            if len(self._results) > self.size:
+                del self._results[next(iter(self._results))]
+        return value.copy() if isinstance(value, (list, dict)) else value
+
+    def clear(self):
+        """
+        Drops every cached result
+        """
+        self._results.clear()
+
+    def __len__(self):
+        return len(self._results)
+
+    def __repr__(self):
+        return f"<Cache {len(self)}/{self.size} results, {self.hits} hits, {self.misses} misses>"
+
+
+#############################################################################################################
+# NOTE: group keys (see Query.groupby) are attribute names, plus two computed keys:                         #
+#   type:         the body type ('sun', 'planet' or 'moon')                                                 #
+#   aroundPlanet: the id of the planet a moon orbits (aroundPlanet['planet']), None for planets and suns    #
+# aggregates (see Query.aggregate) skip values which are not numbers (and nan), like stats.RunningStats     #
+#############################################################################################################
+AGGREGATES = ('count', 'sum', 'mean', 'min', 'max', 'var', 'std')
+
+
+def group_key(obj, key: str):
+    """
+    Returns the value of a group key for a body (see Query.groupby)
+
+    Parameters
+    ----------
+
+    obj: Sun|Planet|Moon
+        the body
+    key: str
+        'type', 'aroundPlanet' or an attribute name
+    """
+    if key == 'type':
+        return type(obj).__name__.lower()
+    value = getattr(obj, key, None)
+    if key == 'aroundPlanet':
+        return value.get('planet') if isinstance(value, dict) else None
+    return value
+
+
+def numeric(values) -> np.ndarray:
+    """
+    Returns values as a float64 array, nan where a value is not a (non bool) number
+
+    Parameters
+    ----------
+
+    values: iterable
+        attribute values
+    """
+    return np.fromiter((float(v) if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, (bool, np.bool_)) else math.nan for v in values), dtype='float64')
+
+
+def reduce(codes: np.ndarray, groups: int, values: np.ndarray, fn: str) -> np.ndarray:
+    """
+    Returns one aggregate per group, computed in a vectorized pass over every value (nan where a group has no values)
+
+    Parameters
+    ----------
+
+    codes: np.ndarray
+        group index (0 <= code < groups) of each value
+    groups: int
+        number of groups
+    values: np.ndarray
+        float64 values, nan values are skipped (None counts rows)
+    fn: str
+        one of query.AGGREGATES
+    """
+    if fn not in AGGREGATES:
+        raise ValueError(f"unknown aggregate {fn!r} (expected one of {AGGREGATES})")
+    if values is None:
+        return np.bincount(codes, minlength=groups).astype('float64')
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    count = np.bincount(codes, minlength=groups).astype('float64')
+    if fn == 'count':
+        return count
+    if fn in ('min', 'max'):
+        # NOTE: sorted by (group, value), the first and last value of each group are its min and max
+        order = np.lexsort((values, codes))
+        codes, values = codes[order], values[order]
+        bounds = np.searchsorted(codes, np.arange(groups + 1))
+        picks = bounds[:-1] if fn == 'min' else bounds[1:] - 1
+        result, present = np.full(groups, math.nan), count > 0
+        result[present] = values[picks[present]]
+        return result
+    total = np.bincount(codes, weights=values, minlength=groups)
+    if fn == 'sum':
+        return total
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(count > 0, total / count, math.nan)
+        if fn == 'mean':
+            return mean
+        squares = np.bincount(codes, weights=(values - mean[codes])**2, minlength=groups)
+        var = np.where(count > 1, squares / (count - 1), math.nan)
+    return var if fn == 'var' else np.sqrt(var)
+
+
+class Query:
+    """
+    A select / where / groupby / aggregate query over bodies, evaluated as vectorized reductions over columns (one array per attribute, read from the bodies once per query)
+
+        q = SolarSystem.query('moons')
+        q.where('meanRadius', 'val > 100').groupby('aroundPlanet').aggregate(moons='count', radius=('meanRadius', 'mean'))
+        # -> {'jupiter': {'moons': 4, 'radius': 1910.2}, 'saturne': {...}, ...}
+        q.groupby('type').aggregate(meanRadius='max')
+
+    where, select and groupby return a new Query, the original is unchanged.
+
+    Instance Attributes
+    -------------------
+    objects: list
+        the bodies matching every where clause
+    keys: tuple
+        the group keys (see groupby), empty when the query is not grouped
+    """
+
+    def __init__(self, objs, keys: tuple = ()):
+        """
+        Parameters
+        ----------
+
+        objs: iterable
+            bodies to query (eg. SolarSystem._moons, or a list)
+        keys: tuple
+            group keys, see groupby
+        """
+        self.objects = list(objs)
+        self.keys = tuple(keys)
+        self._columns = {}
+
+    def _derive(self, objs: list = None, keys: tuple = None) -> Query:
+        derived = Query.__new__(Query)
+        derived.objects = self.objects if objs == None else objs
+        derived.keys = self.keys if keys == None else keys
+        derived._columns = self._columns if objs == None else {}
+        return derived
+
+    def column(self, attr: str) -> np.ndarray:
+        """
+        Returns the values of an attribute for every body of the query (float64 when every value is a number, object otherwise, see predicate.column), read once per query
+
+        Parameters
+        ----------
+
+        attr: str
+            attribute name, bodies without the attribute give None
+        """
+        if attr not in self._columns:
+            self._columns[attr] = predicate.column([getattr(i, attr, None) for i in self.objects])
+        return self._columns[attr]
+
+    def where(self, attr: str, expr: str) -> Query:
+        """
+        Returns the query limited to bodies for which expr is true (evaluated as a vectorized mask, see predicate.Predicate.mask), where clauses combine with `and`
+
+        Parameters
+        ----------
+
+        attr: str
+            attribute name, available as `val` in expr
+        expr: str
+            predicate expression, eg. 'val > 100' (see predicate.compile)
+        """
+        keep = predicate.compile(expr).mask(self.column(attr), attr)
+        return self._derive(objs=[i for i, k in zip(self.objects, keep.tolist()) if k])
+
+    def select(self, *attrs) -> dict:
+        """
+        Returns the columns of attributes for the bodies of the query, dict of attr -> np.ndarray (englishName is always included)
+
+        Parameters
+        ----------
+
+        attrs: str
+            attribute names
+        """
+        return dict((i, self.column(i)) for i in ('englishName',) + tuple(i for i in attrs if i != 'englishName'))
+
+    def groupby(self, *keys) -> Query:
+        """
+        Returns the query grouped by one or more keys, aggregate then returns one result per group
+
+        Parameters
+        ----------
+
+        keys: str
+            'type' (the body type), 'aroundPlanet' (the planet a moon orbits) or attribute names
+        """
+        return self._derive(keys=tuple(keys))
+
+    def _codes(self) -> tuple:
+        # factorizes the group keys, returns (group code of each body, group keys in first seen order)
+        if not self.keys:
+            return np.zeros(len(self.objects), dtype=np.intp), [None]
+        found = {}
+        if len(self.keys) == 1:
+            values = (group_key(i, self.keys[0]) for i in self.objects)
+        else:
+            values = (tuple(group_key(i, k) for k in self.keys) for i in self.objects)
+        codes = np.fromiter((found.setdefault(v, len(found)) for v in values), dtype=np.intp, count=len(self.objects))
+        return codes, list(found)
+
+    def groups(self) -> dict:
+        """
+        Returns the bodies of each group, dict of group key -> list (a tuple of keys when grouped by several keys)
+        """
+        codes, keys = self._codes()
+        groups = dict((k, []) for k in keys)
+        [groups[keys[c]].append(i) for c, i in zip(codes.tolist(), self.objects)]
+        return groups
+
+    def aggregate(self, **spec) -> dict:
+        """
+        Returns aggregates of the bodies of each group, dict of group key -> {name: value} (or {name: value} when the query is not grouped)
+
+        Groups are the distinct key values in first seen order, a group key is a tuple when grouped by several keys.
+
+        Parameters
+        ----------
+
+        spec: str|tuple
+            name=(attr, fn) aggregates attr with fn (one of query.AGGREGATES), name=fn aggregates the attribute `name`, and name='count' counts the bodies of each group. eg:
+                aggregate(moons='count', meanRadius='mean', largest=('meanRadius', 'max'))
+        """
+        codes, keys = self._codes()
+        columns, results = {}, dict((k, {}) for k in keys)
+        for name, how in spec.items():
+            attr, fn = (None, 'count') if how == 'count' else ((name, how) if isinstance(how, str) else how)
+            if attr != None and attr not in columns:
+                column = self.column(attr)
+                columns[attr] = column if column.dtype == np.float64 else numeric(column.tolist())
+            values = reduce(codes, len(keys), None if attr == None else columns[attr], fn).tolist()
+            for key, value in zip(keys, values):
+                results[key][name] = int(value) if fn == 'count' else value
+        return results if self.keys else results[None]
+
+    def __len__(self):
+        return len(self.objects)
+
+    def __repr__(self):
+        return f"<Query {len(self.objects)} objects{' by ' + ', '.join(self.keys) if self.keys else ''}>"
@@ -0,0 +1,423 @@
+# weakly referenced, context scoped instance registries for Sun, Planet, Moon and SolarSystem objects
+from __future__ import annotations
+import os, sys, weakref, contextvars
+sys.path.extend([os.path.join('../', 'lib')])
+
+
+# stands in for a missing weak reference (calling it returns None)
+_dead = lambda: None
+
+
+class Registry:
+    """
+    An ordered registry of objects held by weak reference
+
+    Objects drop out of the registry as soon as nothing else references them, so registering an object never extends its lifetime. Objects may be pinned (held strongly) when the registry is their only owner (eg. objects loaded from disk), pinned objects live until they are removed or the registry is cleared.
+
+    Instance Attributes
+    -------------------
+    name: str
+        name of the registry (eg. 'planet')
+    generation: int
+        incremented whenever an object is registered, removed (or expires) or changed, caches built over the registry (eg. index.SortedIndex) are valid while it is unchanged
+    indexes: dict
+        cached index.SortedIndex objects by attribute (see index.of)
+    derived: dict
+        cached derived quantities (see derived.column)
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.generation = 0
+        self.indexes = {}
+        self.derived = {}
+        self._refs = {}
+        self._pinned = {}
+        self._observers = []
+
+    def _expire(self, key, ref, finalizing=sys.is_finalizing):
+        if self._refs.get(key) is ref:
+            del self._refs[key]
+            self.generation += 1
+            # NOTE: observers are not notified of objects collected at interpreter shutdown
+            [i.removed(key) for i in self._observers] if not finalizing() else None
+
+    def observe(self, observer):
+        """
+        Adds an observer which is notified as objects are registered, removed (or expire) and changed
+
+        Observers implement added(key, obj), removed(key), changed(key, obj) and cleared(), where key is the id() of the object (see stats.Tracker)
+
+        Parameters
+        ----------
+
+        observer: object
+            observer to add
+        """
+        self._observers.append(observer) if observer not in self._observers else None
+
+    def unobserve(self, observer):
+        """
+        Removes an observer (removing an unknown observer is a no-op)
+        """
+        self._observers.remove(observer) if observer in self._observers else None
+
+    def touch(self, *objs):
+        """
+        Marks registered objects as changed (eg. rescaled), bumping the generation and notifying observers, unregistered objects are ignored
+
+        Parameters
+        ----------
+
+        objs: object
+            objects which changed
+        """
+        refs = self._refs
+        changed = [i for i in objs if (refs.get(id(i)) or _dead)() is i]
+        if changed:
+            self.generation += 1
+            for observer in self._observers:
+                [observer.changed(id(i), i) for i in changed]
+
+    def append(self, obj, pin: bool = False):
+        """
+        Registers an object (registering the same object twice is a no-op)
+
+        Parameters
+        ----------
+
+        obj: object
+            object to register
+        pin: bool
+            hold a strong reference to the object until it is removed (default: False)
+        """
+        key = id(obj)
+        ref = self._refs.get(key)
+        if ref is None or ref() is not obj:
+            self._refs[key] = weakref.ref(obj, lambda ref, key=key: self._expire(key, ref))
+            self.generation += 1
+            [i.added(key, obj) for i in self._observers]
+        if pin:
+            self._pinned[key] = obj
+
+    def extend(self, objs, pin: bool = False):
+        """
+        Registers several objects
+
+        Parameters
+        ----------
+
+        objs: iterable
+            objects to register
+        pin: bool
+            hold strong references to the objects until they are removed (default: False)
+        """
+        for obj in objs:
+            self.append(obj, pin=pin)
+
+    def remove(self, obj):
+        """
+        Removes an object from the registry (removing an unregistered object is a no-op)
+
+        Parameters
+        ----------
+
+        obj: object
+            object to remove
+        """
+        key = id(obj)
+        ref = self._refs.get(key)
+        if ref is not None and ref() is obj:
+            del self._refs[key]
+            self._pinned.pop(key, None)
+            self.generation += 1
+            [i.removed(key) for i in self._observers]
+
+    def clear(self):
+        """
+        Removes every object from the registry
+        """
+        self._refs.clear()
+        self._pinned.clear()
+        self.generation += 1
+        [i.cleared() for i in self._observers]
+
+    def __iter__(self):
+        for ref in list(self._refs.values()):
+            obj = ref()
+            if obj is not None:
+                yield obj
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __bool__(self):
+        return len(self._refs) > 0
+
+    def __contains__(self, obj):
+        ref = self._refs.get(id(obj))
+        return ref is not None and ref() is obj
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __repr__(self):
+        return f"<Registry {self.name} ({len(self)} objects)>"
+
+
+class Context:
+    """
+    A set of registries (one per object type) which new objects register into
+
+    Every Sun, Planet, Moon and SolarSystem registers into the current context, the default context is used unless another one is activated with a `with` block. Disposing a context drops every registry it holds, so a worker which builds each system inside its own context never accumulates objects from previous builds.
+
+        with registry.Context('build') as ctx:
+            ss = SolarSystem()
+        ...
+        ctx.dispose()
+
+    Instance Attributes
+    -------------------
+    name: str
+        name of the context
+    registries: dict
+        registries held by the context, by object type
+    caches: dict
+        caches of results computed over the registries of the context, by name (eg. SolarSystem query results, see query.Cache), dropped when the context is disposed
+    """
+
+    def __init__(self, name: str = "context"):
+        self.name = name
+        self.registries = {}
+        self.caches = {}
+        self._tokens = []
+
+    def get(self, kind: str) -> Registry:
+        """
+        Returns the registry for an object type, creating it on first use
+
+        Parameters
+        ----------
+
+        kind: str
+            object type (eg. 'planet', 'moon', 'sun', 'systems')
+        """
+        try:
+            return self.registries[kind]
+        except KeyError:
+            self.registries[kind] = Registry(kind)
+            return self.registries[kind]
+
+    def cache(self, name: str, factory):
+        """
+        Returns a cache of the context, creating it with factory() on first use
+
+        Parameters
+        ----------
+
+        name: str
+            name of the cache (eg. 'queries')
+        factory: callable
+            called without arguments to create a missing cache
+        """
+        try:
+            return self.caches[name]
+        except KeyError:
+            self.caches[name] = factory()
+            return self.caches[name]
+
+    def dispose(self):
+        """
+        Removes every object from every registry held by the context, and drops its caches
+        """
+        [i.clear() for i in self.registries.values()]
+        self.registries.clear()
+        self.caches.clear()
+
+    def __enter__(self) -> Context:
+        self._tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, *exc):
+        _current.reset(self._tokens.pop())
+        return False
+
+    def __repr__(self):
+        return f"<Context {self.name} {dict((k, len(v)) for k, v in self.registries.items())}>"
+
+
+class ScopedRegistry:
+    """
+    A class level registry which forwards to the registry of the same name in the current context
+
+    Used for the `_instances` class attributes, eg. Planet._instances always reads (and registers into) current().get('planet')
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+
+    @property
+    def registry(self) -> Registry:
+        return current().get(self.kind)
+
+    def append(self, obj, pin: bool = False):
+        self.registry.append(obj, pin=pin)
+
+    def extend(self, objs, pin: bool = False):
+        self.registry.extend(objs, pin=pin)
+
+    def remove(self, obj):
+        self.registry.remove(obj)
+
+    def clear(self):
+        self.registry.clear()
+
+    def observe(self, observer):
+        self.registry.observe(observer)
+
+    def unobserve(self, observer):
+        self.registry.unobserve(observer)
+
+    def touch(self, *objs):
+        self.registry.touch(*objs)
+
+    @property
+    def generation(self) -> int:
+        return self.registry.generation
+
+    def __iter__(self):
+        return iter(self.registry)
+
+    def __len__(self):
+        return len(self.registry)
+
+    def __bool__(self):
+        return bool(self.registry)
+
+    def __contains__(self, obj):
+        return obj in self.registry
+
+    def __getitem__(self, index):
+        return self.registry[index]
+
+    def __repr__(self):
+        return f"<ScopedRegistry {self.kind} -> {current().name} ({len(self)} objects)>"
+
+
+class Aggregate:
+    """
+    A read-only view chaining the registries of several owners, eg. the class level SolarSystem._planets chains the planets registry of every SolarSystem in the current context
+
+    Instance Attributes
+    -------------------
+    kind: str
+        name of the registry read from each owner (eg. 'planets')
+    """
+
+    def __init__(self, kind: str, owners):
+        """
+        Parameters
+        ----------
+
+        kind: str
+            name of the registry read from each owner (owner.registries[kind])
+        owners: callable
+            returns the owners to chain (eg. the live SolarSystem objects)
+        """
+        self.kind = kind
+        self._owners = owners
+
+    def sources(self) -> list:
+        """
+        Returns the chained registries
+        """
+        return [i.registries[self.kind] for i in self._owners()]
+
+    @property
+    def generation(self) -> tuple:
+        return tuple((id(i), i.generation) for i in self.sources())
+
+    def __iter__(self):
+        for source in self.sources():
+            yield from source
+
+    def __len__(self):
+        return sum(len(i) for i in self.sources())
+
+    def __bool__(self):
+        return any(self.sources())
+
+    def __contains__(self, obj):
+        return any(obj in i for i in self.sources())
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __repr__(self):
+        return f"<Aggregate {self.kind} ({len(self.sources())} registries, {len(self)} objects)>"
+
+
+DEFAULT = Context("default")
+_current = contextvars.ContextVar("registry_context", default=None)
+# incremented by touch whatever context is current, see changes
+_changes = 0
+
+
+def current() -> Context:
+    """
+    Returns the active registry Context (the default context unless another one was entered)
+    """
+    context = _current.get()
+    return DEFAULT if context is None else context
+
+
+def scoped(kind: str) -> ScopedRegistry:
+    """
+    Returns a ScopedRegistry for an object type, for use as a class attribute
+
+    Parameters
+    ----------
+
+    kind: str
+        object type (eg. 'planet', 'moon', 'sun')
+    """
+    return ScopedRegistry(kind)
+
+
+def dispose(*objs):
+    """
+    Removes objects from every registry of the current context
+
+    Parameters
+    ----------
+
+    objs: object
+        objects to remove
+    """
+    for registry in current().registries.values():
+        [registry.remove(i) for i in objs]
+
+
+def touch(*objs):
+    """
+    Marks objects as changed (eg. rescaled) in every registry of the current context which holds them, see Registry.touch
+
+    Parameters
+    ----------
+
+    objs: object
+        objects which changed
+    """
+    global _changes
+    _changes += 1
+    for registry in current().registries.values():
+        registry.touch(*objs)
+
+
+def changes() -> int:
+    """
+    Returns a counter incremented every time objects are marked as changed with touch (eg. rescaled), in any context
+
+    Registries outside of a context (eg. SolarSystem.registries) are not touched when their objects are rescaled, caches built over them are valid while both their generation and this counter are unchanged
+    """
+    return _changes
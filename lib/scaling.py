@@ -0,0 +1,583 @@
+# non-destructive scaling for Sun, Planet and Moon objects
+from __future__ import annotations
+import os, sys, math, hashlib
+from collections import OrderedDict
+from types import MappingProxyType
+from operator import itemgetter
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+np = utilz.lazy_import('numpy')
+import registry
+
+# fields rewritten by each scale exponent, by object type
+SCALE_GROUPS = {
+    "sun": {
+        "mass": ("massExponent", "massRawKG"),
+        "size": ("meanRadius", "equaRadius")
+    },
+    "planet": {
+        "dist": ("semimajorAxis", "semiminorAxis"),
+        "mass": ("massExponent", "massRawKG"),
+        "vol": ("volExponent", "volumeRawKG"),
+        "size": ("meanRadius", "equaRadius")
+    },
+    "moon": {
+        "dist": ("semimajorAxis", "semiminorAxis"),
+        "mass": ("massExponent", "massRawKG"),
+        "vol": ("volExponent", "volumeRawKG"),
+        "size": ("meanRadius", "equaRadius")
+    }
+}
+
+# the body attribute recording the exponent used for each scale group
+SCALE_ATTRS = {
+    "dist": "scaleDistExp",
+    "mass": "scaleMassExp",
+    "vol": "scaleVolExp",
+    "size": "scaleSizeExp"
+}
+
+# the scale_data key holding the exponent for each scale group
+SCALE_KEYS = {
+    "dist": "scale_dist",
+    "mass": "scale_mass",
+    "vol": "scale_vol",
+    "size": "scale_size"
+}
+
+# maximum number of scaled views cached per body
+VIEW_CACHE_SIZE = 8
+
+# maximum number of compiled scale profiles kept by profile()
+PROFILE_CACHE_SIZE = 64
+
+# km -> au (Planet.distanceFromSunInAU)
+# SOURCE km->au: https://www.wolframalpha.com/input/?i=1+km+in+AU
+KM_IN_AU = 6.685e-9
+
+
+#############################################################################################################
+# NOTE: numeric core, magnitudes are stored as (mantissa, exponent) pairs (massValue, massExponent..)       #
+#   and computed with float math only: value * 10**exponent, or value / 10**-exponent for negative          #
+#   exponents (powers of ten up to 10**22 are exact floats, so small exponents round once)                  #
+#   no value goes through string formatting, and nothing is rounded to a fixed number of decimals           #
+#############################################################################################################
+def magnitude(value: float, exponent: float) -> float:
+    """
+    Returns value * 10**exponent as a float
+
+    Parameters
+    ----------
+
+    value: float
+        the mantissa (eg. massValue)
+    exponent: float
+        the base 10 exponent (eg. massExponent), may be fractional
+    """
+    return float(value) * 10.0**exponent if exponent >= 0 else float(value) / 10.0**-exponent
+
+
+def magnitudes(values, exponents) -> np.ndarray:
+    """
+    Returns values * 10**exponents as a float64 array, the vectorized counterpart of magnitude
+
+    Parameters
+    ----------
+
+    values: np.ndarray
+        mantissas
+    exponents: np.ndarray|float
+        base 10 exponents, one per value or one for every value
+    """
+    values, exponents = np.asarray(values, dtype=np.float64), np.asarray(exponents, dtype=np.float64)
+    # NOTE: bodies share few distinct exponents, each power of ten is computed once (by python, so results match magnitude exactly)
+    unique, inverse = np.unique(np.abs(exponents), return_inverse=True)
+    powers = np.array([10.0**i for i in unique.tolist()], dtype=np.float64)[inverse].reshape(exponents.shape)
+    return np.where(exponents >= 0, values * powers, values / powers)
+
+
+def orbit(semimajor_axis: float, sideral_orbit: float) -> tuple:
+    """
+    Returns (distanceFromSunInAU, harmonicFrequency) of an orbit, harmonicFrequency is au**3 / period**2
+
+    Parameters
+    ----------
+
+    semimajor_axis: float
+        semimajor axis in km
+    sideral_orbit: float
+        orbital period in days
+    """
+    au = float(semimajor_axis) * KM_IN_AU
+    return au, au**3 / float(sideral_orbit)**2
+
+
+class RawData(dict):
+    """
+    A read-only dict holding the raw (unscaled) values of a body, captured once when the body is created
+    """
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"raw body data is read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+class ViewCache(OrderedDict):
+    """
+    A small LRU cache of ScaledView objects keyed by scale profile, the least recently used view is evicted once `maxsize` views are cached
+    """
+
+    def __init__(self, maxsize: int = VIEW_CACHE_SIZE):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def fetch(self, key, factory):
+        """
+        Returns the cached value for `key`, calling `factory()` to create (and cache) it when missing
+
+        Parameters
+        ----------
+
+        key: hashable
+            cache key (a scale profile key)
+        factory: callable
+            called without arguments to create a missing value
+        """
+        try:
+            self.move_to_end(key)
+            return self[key]
+        except KeyError:
+            value = factory()
+            self[key] = value
+            while len(self) > self.maxsize:
+                self.popitem(last=False)
+            return value
+
+    def __reduce__(self):
+        # cached views are cheap to recompute, they are never serialized with their body
+        return (self.__class__, (self.maxsize,))
+
+
+class ScaleProfile:
+    """
+    An immutable, validated and hashable set of scale exponents, built once from default and user scale data
+
+    A ScaleProfile can be used anywhere a scale_data dict is accepted (Sun, Planet, Moon and SolarSystem), and reads like the merged dict it replaces (eg. profile['planet']['scale_dist']). Equal profiles hash equal, so a profile (or its `digest`) can be used as a cache key for scaled views and scene caches.
+
+    Instance Attributes
+    -------------------
+    sections: tuple
+        the object types covered by the profile (eg. ('sun', 'planet', 'moon'))
+    digest: str
+        a stable hex digest of the profile, identical across processes
+    """
+    __slots__ = ('_sections', '_frozen', '_hash', '_digest')
+
+    # valid keys of a scale_data section
+    KEYS = ('debug', 'scale_mass', 'scale_vol', 'scale_dist', 'scale_size')
+
+    def __init__(self, scale_data: dict):
+        """
+        Returns a validated ScaleProfile
+
+        Parameters
+        ----------
+
+        scale_data: dict
+            fully merged scale data, a dict of sections (eg. {"planet": {"debug": False, "scale_mass": 8.5, "scale_vol": 8.5, "scale_dist": 3.2, "scale_size": 0.5}})
+        """
+        sections = {}
+        for objtype, section in scale_data.items():
+            if not isinstance(section, dict) and not isinstance(section, MappingProxyType):
+                raise ValueError(f"scale data for `{objtype}` must be a dict, got {type(section).__name__}")
+            for key, value in section.items():
+                if key not in self.KEYS:
+                    raise ValueError(f"unknown scale data key `{key}` for `{objtype}`, valid keys are {self.KEYS}")
+                if key == 'debug':
+                    if not isinstance(value, bool):
+                        raise ValueError(f"scale data `{objtype}.debug` must be a bool, got {value!r}")
+                elif isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                    raise ValueError(f"scale data `{objtype}.{key}` must be a finite number, got {value!r}")
+            sections[objtype] = MappingProxyType(dict(section))
+        frozen = freeze_scale_data(sections)
+        object.__setattr__(self, '_sections', MappingProxyType(sections))
+        object.__setattr__(self, '_frozen', frozen)
+        object.__setattr__(self, '_hash', hash(frozen))
+        object.__setattr__(self, '_digest', hashlib.sha1(repr(frozen).encode()).hexdigest())
+
+    @property
+    def sections(self) -> tuple:
+        return tuple(self._sections.keys())
+
+    @property
+    def digest(self) -> str:
+        return self._digest
+
+    def key(self, objtype: str) -> tuple:
+        """
+        Returns a hashable key for the scale exponents of one object type (see profile_key)
+
+        Parameters
+        ----------
+
+        objtype: str
+            the object type ('sun', 'planet' or 'moon')
+        """
+        return profile_key(self._sections[objtype])
+
+    def todict(self) -> dict:
+        """
+        Returns the profile as a plain (mutable) scale_data dict
+        """
+        return {objtype: dict(section) for objtype, section in self._sections.items()}
+
+    def __getitem__(self, objtype: str):
+        return self._sections[objtype]
+
+    def __contains__(self, objtype: str) -> bool:
+        return objtype in self._sections
+
+    def __iter__(self):
+        return iter(self._sections)
+
+    def keys(self):
+        return self._sections.keys()
+
+    def items(self):
+        return self._sections.items()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"scale profiles are immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return isinstance(other, ScaleProfile) and self._frozen == other._frozen
+
+    def __reduce__(self):
+        return (self.__class__, (self.todict(),))
+
+    def __repr__(self):
+        return f"<ScaleProfile {self._digest[:10]} {self.todict()}>"
+
+
+class ScaledView:
+    """
+    A read-only view of a body under a scale profile
+
+    Scaled values are computed from the bodies raw values on first access and kept on the view, any attribute which is not affected by scaling is read from the body.
+
+    Instance Attributes
+    -------------------
+    body: Sun|Planet|Moon
+        the viewed body
+    objtype: str
+        the scale_data section used for the body ('sun', 'planet' or 'moon')
+    scale: dict
+        the scale exponents for `objtype` (eg. {"scale_mass": 8.5, "scale_vol": 8.5, "scale_dist": 3.2, "scale_size": 0.5})
+    """
+    __slots__ = ('body', 'objtype', 'scale', '_values')
+
+    def __init__(self, body, objtype: str, scale: dict):
+        object.__setattr__(self, 'body', body)
+        object.__setattr__(self, 'objtype', objtype)
+        object.__setattr__(self, 'scale', scale)
+        object.__setattr__(self, '_values', None)
+
+    def values(self) -> dict:
+        """
+        Returns a dict of scaled values for the viewed body (computed on first call)
+        """
+        if self._values is None:
+            object.__setattr__(self, '_values', scale_values(self.objtype, self.body._raw, self.scale))
+        return self._values
+
+    def __getattr__(self, name):
+        values = self.values()
+        if name in values:
+            return values[name]
+        if name in self.body._raw:
+            return self.body._raw[name]
+        return getattr(self.body, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"scaled views are read-only")
+
+    def __repr__(self):
+        return f"<ScaledView {self.objtype} {getattr(self.body, 'englishName', '?')} {profile_key(self.scale)}>"
+
+
+def freeze(obj) -> RawData:
+    """
+    Returns the raw values of a body (every attribute listed in `obj.keys`, and every scalable attribute) as a read-only dict
+
+    Parameters
+    ----------
+
+    obj: Sun|Planet|Moon
+        a fully constructed, unscaled body
+    """
+    fields = list(obj.keys) + [f for groups in SCALE_GROUPS.values() for names in groups.values() for f in names]
+    return RawData({k: getattr(obj, k) for k in fields if hasattr(obj, k)})
+
+
+def freeze_scale_data(scale_data) -> tuple:
+    """
+    Returns a hashable (nested tuple) representation of scale data
+
+    Parameters
+    ----------
+
+    scale_data: dict|ScaleProfile
+        scale data to freeze
+    """
+    if isinstance(scale_data, ScaleProfile):
+        return scale_data._frozen
+    try:
+        frozen = tuple(sorted((objtype, tuple(sorted(section.items()))) for objtype, section in scale_data.items()))
+        hash(frozen)
+        return frozen
+    except (AttributeError, TypeError):
+        raise ValueError(f"scale data must be a dict of dicts holding numeric scale exponents, got {scale_data!r}")
+
+
+_profiles = OrderedDict()
+
+def profile(defaults: dict, scale_data = None) -> ScaleProfile:
+    """
+    Returns a ScaleProfile built from default scale data and user overrides, this replaces utilz.merge_attributes for scale data
+    compiled profiles are cached, so repeated calls with the same dicts return the same ScaleProfile without copying anything
+
+    Parameters
+    ----------
+
+    defaults: dict|ScaleProfile
+        default scale data, only sections present in `defaults` are kept (like utilz.merge_attributes)
+    scale_data: dict|ScaleProfile
+        user overrides (default: None, use `defaults`)
+    """
+    if isinstance(scale_data, ScaleProfile) and all(objtype in scale_data for objtype in defaults):
+        return scale_data
+    key = (freeze_scale_data(defaults), None if scale_data == None else freeze_scale_data(scale_data))
+    try:
+        _profiles.move_to_end(key)
+        return _profiles[key]
+    except KeyError:
+        pass
+    merged = {objtype: dict(section) for objtype, section in defaults.items()}
+    if scale_data != None:
+        for objtype, section in scale_data.items():
+            if objtype in merged:
+                if not isinstance(section, dict) and not isinstance(section, MappingProxyType):
+                    raise ValueError(f"scale data for `{objtype}` must be a dict, got {type(section).__name__}")
+                merged[objtype].update(section)
+    compiled = ScaleProfile(merged)
+    _profiles[key] = compiled
+    while len(_profiles) > PROFILE_CACHE_SIZE:
+        _profiles.popitem(last=False)
+    return compiled
+
+
+def profile_key(scale: dict) -> tuple:
+    """
+    Returns a hashable key for the scale exponents of one object type
+
+    Parameters
+    ----------
+
+    scale: dict
+        the scale exponents of one object type (eg. scale_data['planet'])
+    """
+    return tuple(sorted((k, v) for k, v in scale.items() if k != 'debug'))
+
+
+def apply(obj, objtype: str, raw: dict, scale: dict, groups: tuple = None):
+    """
+    Writes the scaled values of a body (see scale_values) to the body, and notifies registry observers that it changed
+
+    Parameters
+    ----------
+
+    obj: Sun|Planet|Moon
+        the body to scale
+    objtype: str
+        the object type being scaled ('sun', 'planet' or 'moon')
+    raw: dict
+        raw values of the body (obj._raw)
+    scale: dict
+        the scale exponents for `objtype` (eg. scale_data['planet'])
+    groups: tuple
+        limit scaling to these groups ('dist', 'mass', 'vol', 'size'), all groups of `objtype` are scaled by default
+    """
+    obj.__dict__.update(scale_values(objtype, raw, scale, groups=groups))
+    registry.touch(obj)
+
+
+def scale_values(objtype: str, raw: dict, scale: dict, groups: tuple = None) -> dict:
+    """
+    Returns a dict of scaled values computed from raw (unscaled) body values, `raw` is never modified
+    standard scaling is performed by the function f(x) = x/(10**scaleExponent)
+
+    Parameters
+    ----------
+
+    objtype: str
+        the object type being scaled ('sun', 'planet' or 'moon')
+    raw: dict
+        raw values of the body (see freeze)
+    scale: dict
+        the scale exponents for `objtype` (eg. scale_data['planet'])
+    groups: tuple
+        limit scaling to these groups ('dist', 'mass', 'vol', 'size'), all groups of `objtype` are scaled by default
+    """
+    groups = tuple(SCALE_GROUPS[objtype].keys()) if groups == None else groups
+    values = {}
+    if 'dist' in groups:
+        exp = scale['scale_dist']
+        values['scaleDistExp'] = exp
+        values['semimajorAxis'] = float(raw['semimajorAxis']/(10**exp))
+        values['semiminorAxis'] = float(raw['semiminorAxis']/(10**exp))
+    if 'mass' in groups:
+        exp = scale['scale_mass']
+        values['scaleMassExp'] = exp
+        values['massExponent'] = raw['massExponent'] - exp
+        if objtype == 'sun':
+            values['massRawKG'] = magnitude(raw['massValue'], values['massExponent'])
+        else:
+            values['massRawKG'] = magnitude(raw['massValue'], exp)
+    if 'vol' in groups:
+        exp = scale['scale_vol']
+        values['scaleVolExp'] = exp
+        values['volExponent'] = raw['volExponent'] - exp
+        values['volumeRawKG'] = magnitude(raw['volValue'], exp)
+    if 'size' in groups:
+        exp = scale['scale_size']
+        values['scaleSizeExp'] = exp
+        values['meanRadius'] = raw['meanRadius'] / (10**exp)
+        values['equaRadius'] = raw['equaRadius'] / (10**exp)
+    return values
+
+
+def view(obj, objtype: str, scale_data: dict) -> ScaledView:
+    """
+    Returns a (cached) ScaledView of a body for the given scale data
+
+    Parameters
+    ----------
+
+    obj: Sun|Planet|Moon
+        the body to view
+    objtype: str
+        the scale_data section used for the body ('sun', 'planet' or 'moon')
+    scale_data: ScaleProfile
+        compiled scale data (see profile)
+    """
+    scale = scale_data[objtype]
+    return obj._views.fetch(scale_data.key(objtype), lambda: ScaledView(obj, objtype, scale))
+
+
+def raw_columns(objs: list, fields: tuple) -> dict:
+    """
+    Returns a dict of float64 arrays (one per field) holding the raw values of every body in `objs`
+
+    Parameters
+    ----------
+
+    objs: list
+        bodies to read raw values from
+    fields: tuple
+        raw value names to read
+    """
+    fields = tuple(fields)
+    get = itemgetter(*fields) if len(fields) > 1 else (lambda raw: (raw[fields[0]],))
+    table = np.array([get(o._raw) for o in objs], dtype=np.float64).reshape(len(objs), len(fields))
+    return {f: table[:, i] for i, f in enumerate(fields)}
+
+
+def scale_columns(objtype: str, raw: dict, scale: dict, groups: tuple = None) -> dict:
+    """
+    Returns a dict of scaled value arrays computed from raw value arrays, the vectorized counterpart of scale_values
+
+    Parameters
+    ----------
+
+    objtype: str
+        the object type being scaled ('sun', 'planet' or 'moon')
+    raw: dict
+        raw value arrays (see raw_columns)
+    scale: dict
+        the scale exponents for `objtype` (eg. scale_data['planet'])
+    groups: tuple
+        limit scaling to these groups ('dist', 'mass', 'vol', 'size'), all groups of `objtype` are scaled by default
+    """
+    groups = tuple(SCALE_GROUPS[objtype].keys()) if groups == None else groups
+    values = {}
+    if 'dist' in groups:
+        factor = 10.0**scale['scale_dist']
+        values['semimajorAxis'] = raw['semimajorAxis'] / factor
+        values['semiminorAxis'] = raw['semiminorAxis'] / factor
+    if 'mass' in groups:
+        exp = scale['scale_mass']
+        values['massExponent'] = raw['massExponent'] - exp
+        if objtype == 'sun':
+            values['massRawKG'] = magnitudes(raw['massValue'], values['massExponent'])
+        else:
+            values['massRawKG'] = magnitudes(raw['massValue'], exp)
+    if 'vol' in groups:
+        exp = scale['scale_vol']
+        values['volExponent'] = raw['volExponent'] - exp
+        values['volumeRawKG'] = magnitudes(raw['volValue'], exp)
+    if 'size' in groups:
+        factor = 10.0**scale['scale_size']
+        values['meanRadius'] = raw['meanRadius'] / factor
+        values['equaRadius'] = raw['equaRadius'] / factor
+    return values
+
+
+def scale_many(objs: list, objtype: str, scale: dict, groups: tuple = None, debug: bool = False) -> list:
+    """
+    Scales every body in `objs` with one set of array operations and writes the scaled values back to the bodies
+    this is the bulk counterpart of calling scale_planet/scale_moon/scale_sun on each body, scaled values are computed from raw values
+
+    Parameters
+    ----------
+
+    objs: list
+        bodies of a single object type
+    objtype: str
+        the object type being scaled ('sun', 'planet' or 'moon')
+    scale: dict
+        the scale exponents for `objtype` (eg. scale_data['planet'])
+    groups: tuple
+        limit scaling to these groups ('dist', 'mass', 'vol', 'size'), all groups of `objtype` are scaled by default
+    debug: bool
+        output informational messages (default: False)
+    """
+    objs = list(objs)
+    if len(objs) == 0:
+        return objs
+    groups = tuple(SCALE_GROUPS[objtype].keys()) if groups == None else groups
+    fields = set()
+    for group in groups:
+        fields.update(SCALE_GROUPS[objtype][group])
+    fields.update(('massValue',) if 'mass' in groups else ())
+    fields.update(('volValue',) if 'vol' in groups else ())
+    values = scale_columns(objtype, raw_columns(objs, tuple(fields)), scale, groups)
+    exps = {SCALE_ATTRS[group]: scale[SCALE_KEYS[group]] for group in groups}
+    names = tuple(values.keys())
+    # NOTE: tolist() converts back to python floats, the bodies never hold numpy scalars
+    rows = zip(*[values[name].tolist() for name in names])
+    for obj, row in zip(objs, rows):
+        state = obj.__dict__
+        state.update(zip(names, row))
+        state.update(exps)
+    # NOTE: registry observers (eg. stats.Tracker) refresh the rescaled bodies
+    registry.touch(*objs)
+    print(f"INFO: scaled {len(objs)} {objtype} objects with {exps}") if debug else None
+    return objs
@@ -0,0 +1,171 @@
+# declarative schemas for raw Sun, Planet and Moon payloads, compiled once into fast validators
+from __future__ import annotations
+import os, sys, math
+from collections import namedtuple
+sys.path.extend([os.path.join('../', 'lib')])
+
+# a reason a payload was rejected, code is one of 'payload', 'missing', 'null', 'type' or 'value' ('limit' for moons excluded from plotting, see culling.cull)
+Rejection = namedtuple('Rejection', ('field', 'code', 'message'))
+
+NUMBER = (int, float)
+INTEGER = (int,)
+STRING = (str,)
+
+#############################################################################################################
+# NOTE: a schema maps each field to a spec dict:                                                            #
+#   type:     tuple of accepted python types (bool is never accepted as a number), or a nested schema dict  #
+#   required: the field must be present (default: True)                                                    #
+#   nullable: the field may be None (default: False)                                                        #
+#   finite:   numbers must be finite (default: True for numbers)                                            #
+#   min:      minimum accepted value (optional)                                                             #
+#############################################################################################################
+MASS = {
+    "massValue": {"type": NUMBER},
+    "massExponent": {"type": INTEGER}
+}
+VOL = {
+    "volValue": {"type": NUMBER},
+    "volExponent": {"type": INTEGER}
+}
+BODY = {
+    "id": {"type": STRING},
+    "englishName": {"type": STRING},
+    "semimajorAxis": {"type": NUMBER, "min": 0},
+    "eccentricity": {"type": NUMBER, "min": 0},
+    "meanRadius": {"type": NUMBER, "min": 0},
+    "equaRadius": {"type": NUMBER, "min": 0},
+    "mass": {"type": MASS},
+    "vol": {"type": VOL}
+}
+SUN = dict(BODY)
+PLANET = dict(BODY, sideralOrbit={"type": NUMBER}, moons={"type": (list,), "nullable": True})
+MOON = dict(BODY, aroundPlanet={"type": {"planet": {"type": STRING}}, "nullable": True})
+
+
+def _check(path: str, spec: dict):
+    # compiles one field spec into a function(value, out) appending Rejections to out
+    kind = spec.get("type", None)
+    nullable = spec.get("nullable", False)
+    if isinstance(kind, dict):
+        nested = _compile(kind, prefix=f"{path}.")
+
+        def check(value, out):
+            if value is None:
+                None if nullable else out.append(Rejection(path, 'null', f"{path} is null"))
+            elif not isinstance(value, dict):
+                out.append(Rejection(path, 'type', f"{path} must be an object, got {type(value).__name__}"))
+            else:
+                nested(value, out)
+        return check
+    number = kind != None and any(i in kind for i in (int, float))
+    finite = spec.get("finite", number)
+    low = spec.get("min", None)
+    names = "|".join(i.__name__ for i in kind) if kind != None else "any"
+
+    def check(value, out):
+        if value is None:
+            None if nullable else out.append(Rejection(path, 'null', f"{path} is null"))
+            return
+        if kind != None and (not isinstance(value, kind) or (number and isinstance(value, bool))):
+            out.append(Rejection(path, 'type', f"{path} must be {names}, got {type(value).__name__}"))
+            return
+        if finite and not math.isfinite(value):
+            out.append(Rejection(path, 'value', f"{path} must be finite, got {value}"))
+        elif low != None and value < low:
+            out.append(Rejection(path, 'value', f"{path} must be >= {low}, got {value}"))
+    return check
+
+
+def _compile(schema: dict, prefix: str = ""):
+    checks = tuple((field, spec.get("required", True), _check(f"{prefix}{field}", spec)) for field, spec in schema.items())
+    missing = object()
+
+    def validate(payload: dict, out: list):
+        for field, required, check in checks:
+            value = payload.get(field, missing)
+            if value is missing:
+                out.append(Rejection(f"{prefix}{field}", 'missing', f"{prefix}{field} is missing")) if required else None
+            else:
+                check(value, out)
+    return validate
+
+
+class Validator:
+    """
+    A schema compiled once into a validator for raw payloads (the dicts returned by data.get_*_data)
+
+        validator = schema.compile(schema.MOON)
+        validator.reasons(payload)   # -> [] when the payload is valid, otherwise a list of schema.Rejection
+
+    Instance Attributes
+    -------------------
+    name: str
+        name of the schema (eg. 'moon')
+    schema: dict
+        the declarative schema
+    """
+
+    def __init__(self, schema: dict, name: str = ""):
+        self.name = name
+        self.schema = schema
+        self._validate = _compile(schema)
+
+    def reasons(self, payload) -> list:
+        """
+        Returns the reasons a payload is rejected (an empty list for a valid payload)
+
+        Parameters
+        ----------
+
+        payload: dict
+            raw payload
+        """
+        if not isinstance(payload, dict):
+            return [Rejection('', 'payload', f"payload must be an object, got {type(payload).__name__}")]
+        out = []
+        self._validate(payload, out)
+        return out
+
+    def __call__(self, payload) -> bool:
+        return len(self.reasons(payload)) == 0
+
+    def __repr__(self):
+        return f"<Validator {self.name} ({len(self.schema)} fields)>"
+
+
+def compile(schema: dict, name: str = "") -> Validator:
+    """
+    Returns a Validator for a declarative schema (see schema.BODY for the format)
+
+    Parameters
+    ----------
+
+    schema: dict
+        the declarative schema
+    name: str
+        name of the schema
+    """
+    return Validator(schema, name=name)
+
+
+# NOTE: compiled once, at import
+VALIDATORS = {
+    "sun": compile(SUN, "sun"),
+    "planet": compile(PLANET, "planet"),
+    "moon": compile(MOON, "moon")
+}
+
+
+def validate(objtype: str, payload) -> list:
+    """
+    Returns the reasons a raw payload of a body type is rejected (an empty list for a valid payload)
+
+    Parameters
+    ----------
+
+    objtype: str
+        'sun', 'planet' or 'moon'
+    payload: dict
+        raw payload
+    """
+    return VALIDATORS[objtype].reasons(payload)
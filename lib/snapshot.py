@@ -0,0 +1,616 @@
+# single file, versioned and compressed snapshots of a solar system (sun, planets, moons, hierarchy and scale state)
+from __future__ import annotations
+import os, sys, io, json, pickle, struct, zlib, tempfile, mmap
+sys.path.extend([os.path.join('../', 'lib')])
+import scaling
+import utilz
+np = utilz.lazy_import('numpy')
+from sun import Sun
+from planet import Planet
+from moon import Moon, MoonData
+
+#########################################################################################################
+# NOTE: layout of a snapshot file                                                                       #
+#   header:  MAGIC (8 bytes) | version (uint32) | toc offset (uint64) | toc length (uint64)             #
+#   records: one zlib compressed pickle of each body's state, back to back                              #
+#   toc:     zlib compressed JSON (name, scale state, hierarchy and the offset/length/crc of each body)  #
+# a single body is read by seeking to its record, without reading (or decompressing) any other record   #
+#########################################################################################################
+MAGIC = b"SSMSNAP\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIQQ")
+TYPES = {'sun': Sun, 'planet': Planet, 'moon': Moon}
+
+
+class SnapshotError(ValueError):
+    """
+    Raised when a snapshot file is not a snapshot, has an unsupported version, or is corrupt
+    """
+
+
+def _key(objtype: str, obj) -> str:
+    return f"{objtype}:{obj.englishName}"
+
+
+def _state(objtype: str, obj) -> dict:
+    state = obj.__getstate__()
+    if objtype == 'planet':
+        # NOTE: moons are stored as records of their own, the hierarchy is restored from the table of contents
+        state = dict(state)
+        state.pop('moonData', None)
+    return state
+
+
+def _restore(objtype: str, state: dict):
+    obj = TYPES[objtype].__new__(TYPES[objtype])
+    obj.__setstate__(state)
+    return obj
+
+
+def _attach(planet: Planet, moons: list) -> Planet:
+    planet.moonData = MoonData.of(moons)
+    return planet
+
+
+def _pack(f, sun: Sun, planets: list, name: str, scale_data: dict, level: int) -> dict:
+    # writes a snapshot to a seekable binary file positioned at its start, returns the table of contents
+    # NOTE: keys are '<type>:<englishName>', repeated names get a '#<n>' suffix
+    keys, used = {}, set()
+    def key(objtype, obj):
+        base, n = _key(objtype, obj), 1
+        k = base
+        while k in used:
+            k, n = f"{base}#{n}", n + 1
+        keys[id(obj)] = k
+        used.add(k)
+        return k
+    bodies = [('sun', sun, key('sun', sun))] + [('planet', i, key('planet', i)) for i in planets]
+    hierarchy = {}
+    for planet in planets:
+        moons = [('moon', i, key('moon', i)) for i in planet.moonData]
+        hierarchy[keys[id(planet)]] = [i[2] for i in moons]
+        bodies.extend(moons)
+    toc = {'version': VERSION, 'name': name, 'scale_data': scale_data, 'sun': keys[id(sun)], 'planets': [keys[id(i)] for i in planets], 'hierarchy': hierarchy, 'bodies': {}}
+    f.write(b"\x00" * HEADER.size)
+    for objtype, obj, k in bodies:
+        record = zlib.compress(pickle.dumps(_state(objtype, obj), protocol=pickle.HIGHEST_PROTOCOL), level)
+        toc['bodies'][k] = {'type': objtype, 'offset': f.tell(), 'length': len(record), 'crc': zlib.crc32(record)}
+        f.write(record)
+    offset = f.tell()
+    blob = zlib.compress(json.dumps(toc, separators=(',', ':')).encode(), level)
+    f.write(blob)
+    end = f.tell()
+    f.seek(0)
+    f.write(HEADER.pack(MAGIC, VERSION, offset, len(blob)))
+    f.seek(end)
+    return toc
+
+
+def write(path: str, sun: Sun, planets: list, name: str = "SolarSystem", scale_data: dict = None, level: int = 6) -> dict:
+    """
+    Writes a sun, its planets and their moons to a single snapshot file, the file is replaced atomically (an interrupted write never leaves a partial snapshot at path)
+
+    Parameters
+    ----------
+
+    path: str
+        filesystem path of the snapshot file
+    sun: sun.Sun
+        the sun of the system
+    planets: list
+        planet.Planet objects of the system, moons are taken from Planet.moonData
+    name: str
+        name of the system (default: 'SolarSystem')
+    scale_data: dict
+        scale state of the system (eg. SolarSystem.user_scale_data)
+    level: int
+        zlib compression level (default: 6)
+
+    Returns
+    -------
+    dict, the table of contents of the written snapshot
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            toc = _pack(f, sun, planets, name, scale_data, level)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp) if os.path.exists(tmp) else None
+        raise
+    return toc
+
+
+def dumps(sun: Sun, planets: list, name: str = "SolarSystem", scale_data: dict = None, level: int = 6) -> bytes:
+    """
+    Returns a snapshot of a sun, its planets and their moons as bytes (the same format as write, eg. to send a system between processes), read it back with snapshot.loads
+
+    Parameters
+    ----------
+
+    sun: sun.Sun
+        the sun of the system
+    planets: list
+        planet.Planet objects of the system, moons are taken from Planet.moonData
+    name: str
+        name of the system (default: 'SolarSystem')
+    scale_data: dict
+        scale state of the system (eg. SolarSystem.user_scale_data)
+    level: int
+        zlib compression level (default: 6)
+    """
+    f = io.BytesIO()
+    _pack(f, sun, planets, name, scale_data, level)
+    return f.getvalue()
+
+
+def _toc(f) -> dict:
+    header = f.read(HEADER.size)
+    if len(header) != HEADER.size:
+        raise SnapshotError("not a snapshot file (truncated header)")
+    magic, version, offset, length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise SnapshotError("not a snapshot file (bad magic)")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version} (expected {VERSION})")
+    f.seek(offset)
+    try:
+        return json.loads(zlib.decompress(f.read(length)))
+    except (zlib.error, ValueError) as e:
+        raise SnapshotError(f"corrupt snapshot table of contents ({e})") from None
+
+
+def _record(f, key: str, toc: dict):
+    try:
+        entry = toc['bodies'][key]
+    except KeyError:
+        raise KeyError(f"no body {key!r} in snapshot") from None
+    f.seek(entry['offset'])
+    record = f.read(entry['length'])
+    if len(record) != entry['length'] or zlib.crc32(record) != entry['crc']:
+        raise SnapshotError(f"corrupt snapshot record {key!r}")
+    return _restore(entry['type'], pickle.loads(zlib.decompress(record)))
+
+
+def contents(path: str) -> dict:
+    """
+    Returns the table of contents of a snapshot file (name, scale_data, sun, planets, hierarchy and bodies), no body is read
+
+    Parameters
+    ----------
+
+    path: str
+        filesystem path of the snapshot file
+    """
+    with open(path, "rb") as f:
+        return _toc(f)
+
+
+def read_body(path: str, objtype: str, name: str):
+    """
+    Reads a single body from a snapshot file, only its own record is read (a planet also reads the records of its moons). The body is not registered.
+
+    Parameters
+    ----------
+
+    path: str
+        filesystem path of the snapshot file
+    objtype: str
+        'sun', 'planet' or 'moon'
+    name: str
+        englishName of the body
+    """
+    with open(path, "rb") as f:
+        toc = _toc(f)
+        key = f"{objtype}:{name}"
+        obj = _record(f, key, toc)
+        if objtype == 'planet':
+            _attach(obj, [_record(f, i, toc) for i in toc['hierarchy'].get(key, [])])
+        return obj
+
+
+def read(path: str) -> dict:
+    """
+    Reads every body of a snapshot file (written by write or write_mapped), nothing is returned (or registered by callers) unless every record is valid
+
+    Parameters
+    ----------
+
+    path: str
+        filesystem path of the snapshot file
+
+    Returns
+    -------
+    dict with keys name, scale_data, sun, planets (in saved order, with moonData restored) and moons
+    """
+    if is_mapped(path):
+        with MappedSnapshot(path) as snap:
+            return snap.materialize()
+    with open(path, "rb") as f:
+        return _unpack(f)
+
+
+def loads(data: bytes) -> dict:
+    """
+    Reads every body of a snapshot returned by snapshot.dumps, returns the same dict as snapshot.read
+
+    Parameters
+    ----------
+
+    data: bytes
+        the snapshot
+    """
+    return _unpack(io.BytesIO(data))
+
+
+def _unpack(f) -> dict:
+    # reads every body of a snapshot from a seekable binary file
+    toc = _toc(f)
+    bodies = dict((k, _record(f, k, toc)) for k in toc['bodies'])
+    planets = [_attach(bodies[k], [bodies[i] for i in toc['hierarchy'].get(k, [])]) for k in toc['planets']]
+    return {
+        'name': toc['name'],
+        'scale_data': toc['scale_data'],
+        'sun': bodies[toc['sun']],
+        'planets': planets,
+        'moons': [bodies[i] for k in toc['planets'] for i in toc['hierarchy'].get(k, [])]
+    }
+
+
+#########################################################################################################
+# NOTE: layout of a mapped (columnar) snapshot file                                                    #
+#   header:  MAPPED_MAGIC (8 bytes) | version (uint32) | toc offset (uint64) | toc length (uint64)      #
+#   blocks:  for each body type, 64 byte aligned arrays:                                                #
+#            - one array per numeric field (int64 or float64, one value per body)                      #
+#            - names: uint64 offsets (count + 1) and the utf-8 englishNames back to back               #
+#            - records: uint64 offsets (count + 1) and one pickle per body of the remaining fields     #
+#            - parent: int64 index of the owning planet (moons only, -1 for none)                      #
+#   toc:     JSON (name, scale state, and the dtype/offset/length of every block)                      #
+# opening a mapped snapshot only reads the header and toc, arrays are np.frombuffer views on the mmap  #
+# (pages are read on first touch, and shared between every process mapping the same file)             #
+#########################################################################################################
+MAPPED_MAGIC = b"SSMMAP\x00\x00"
+MAPPED_VERSION = 1
+ALIGN = 64
+_INT64 = (-2**63, 2**63 - 1)
+
+
+def _dtype(values: list) -> str:
+    # returns the column dtype shared by every value, or None when the field must be kept in the records
+    if all(type(v) is float for v in values):
+        return 'float64'
+    if all(type(v) is int and _INT64[0] <= v <= _INT64[1] for v in values):
+        return 'int64'
+    return None
+
+
+def _split(states: list) -> tuple:
+    # splits body states into numeric columns (incl. raw values as '_raw.<field>') and per body records
+    flat = [dict([(k, v) for k, v in s.items() if k not in ('_raw', 'moonData')] + [(f"_raw.{k}", v) for k, v in s.get('_raw', {}).items()]) for s in states]
+    fields = sorted(set(k for s in flat for k in s))
+    missing = object()
+    columns = {}
+    for field in fields:
+        values = [s.get(field, missing) for s in flat]
+        dtype = _dtype(values)
+        if dtype != None:
+            columns[field] = np.array(values, dtype=dtype)
+    records = [dict((k, v) for k, v in s.items() if k not in columns) for s in flat]
+    return columns, records
+
+
+def _packed(items: list) -> tuple:
+    # returns (offsets, blob) for a list of bytes
+    offsets = np.zeros(len(items) + 1, dtype='uint64')
+    np.cumsum([len(i) for i in items], out=offsets[1:]) if items else None
+    return offsets, b"".join(items)
+
+
+def write_mapped(path: str, sun: Sun, planets: list, name: str = "SolarSystem", scale_data: dict = None) -> dict:
+    """
+    Writes a sun, its planets and their moons to a single mapped (columnar) snapshot file, see MappedSnapshot. The file is replaced atomically.
+
+    Parameters
+    ----------
+
+    path: str
+        filesystem path of the snapshot file
+    sun: sun.Sun
+        the sun of the system
+    planets: list
+        planet.Planet objects of the system, moons are taken from Planet.moonData
+    name: str
+        name of the system (default: 'SolarSystem')
+    scale_data: dict
+        scale state of the system (eg. SolarSystem.user_scale_data)
+
+    Returns
+    -------
+    dict, the table of contents of the written snapshot
+    """
+    moons, parents = [], []
+    for index, planet in enumerate(planets):
+        for moon in planet.moonData:
+            moons.append(moon)
+            parents.append(index)
+    bodies = {'sun': [sun], 'planet': list(planets), 'moon': moons}
+    toc = {'version': MAPPED_VERSION, 'name': name, 'scale_data': scale_data, 'types': {}}
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".snapshot-", dir=directory)
+
+    def block(f, array: np.ndarray) -> dict:
+        f.write(b"\x00" * (-f.tell() % ALIGN))
+        entry = {'dtype': array.dtype.str, 'offset': f.tell(), 'count': len(array)}
+        f.write(array.tobytes())
+        return entry
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"\x00" * HEADER.size)
+            for objtype, objs in bodies.items():
+                columns, records = _split([_state(objtype, i) for i in objs])
+                names = _packed([str(getattr(i, 'englishName', '')).encode() for i in objs])
+                records = _packed([pickle.dumps(i, protocol=pickle.HIGHEST_PROTOCOL) for i in records])
+                entry = {'count': len(objs), 'columns': {}}
+                for field, array in columns.items():
+                    entry['columns'][field] = block(f, array)
+                entry['names'] = [block(f, names[0]), block(f, np.frombuffer(names[1], dtype='uint8'))]
+                entry['records'] = [block(f, records[0]), block(f, np.frombuffer(records[1], dtype='uint8'))]
+                if objtype == 'moon':
+                    entry['parent'] = block(f, np.array(parents, dtype='int64'))
+                toc['types'][objtype] = entry
+            offset = f.tell()
+            blob = json.dumps(toc, separators=(',', ':')).encode()
+            f.write(blob)
+            f.seek(0)
+            f.write(HEADER.pack(MAPPED_MAGIC, MAPPED_VERSION, offset, len(blob)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp) if os.path.exists(tmp) else None
+        raise
+    return toc
+
+
+class BodyView:
+    """
+    A read-only view of one body of a MappedSnapshot, numeric attributes are read from the mapped columns and the remaining attributes are unpickled from the body's record on first use
+
+    Use materialize() to create a (unregistered) Sun, Planet or Moon object from the view.
+    """
+    __slots__ = ('snapshot', 'objtype', 'index', '_record')
+
+    def __init__(self, snapshot: MappedSnapshot, objtype: str, index: int):
+        self.snapshot = snapshot
+        self.objtype = objtype
+        self.index = index
+        self._record = None
+
+    def record(self) -> dict:
+        """
+        Returns the non numeric fields of the body (unpickled once)
+        """
+        if self._record == None:
+            self._record = self.snapshot._load_record(self.objtype, self.index)
+        return self._record
+
+    def __getattr__(self, name: str):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        columns = self.snapshot._columns[self.objtype]
+        if name in columns:
+            return columns[name][self.index].item()
+        if name == 'englishName':
+            return self.snapshot.name_of(self.objtype, self.index)
+        try:
+            return self.record()[name]
+        except KeyError:
+            raise AttributeError(f"{self.objtype} {self.snapshot.name_of(self.objtype, self.index)!r} has no attribute {name!r}") from None
+
+    def __setattr__(self, name: str, value):
+        if name in BodyView.__slots__:
+            return object.__setattr__(self, name, value)
+        raise AttributeError(f"BodyView is read-only, materialize() the body to modify it")
+
+    def state(self) -> dict:
+        """
+        Returns the full state of the body (as stored by Sun/Planet/Moon.__getstate__, without moonData)
+        """
+        state, raw = {}, {}
+        columns = self.snapshot._columns[self.objtype]
+        values = [(k, v[self.index].item()) for k, v in columns.items()] + list(self.record().items())
+        for field, value in values:
+            if field.startswith('_raw.'):
+                raw[field[5:]] = value
+            else:
+                state[field] = value
+        state['_raw'] = scaling.RawData(raw)
+        return state
+
+    def materialize(self):
+        """
+        Returns a Sun, Planet or Moon object created from the view, the object is not registered (a planet gets the materialized moons it owns)
+        """
+        obj = _restore(self.objtype, self.state())
+        if self.objtype == 'planet':
+            _attach(obj, [i.materialize() for i in self.snapshot.moons_of(self.index)])
+        return obj
+
+    def __repr__(self):
+        return f"<BodyView {self.objtype} {self.snapshot.name_of(self.objtype, self.index)!r}>"
+
+
+class MappedSnapshot:
+    """
+    A memory mapped (columnar) snapshot written by write_mapped
+
+    Opening a snapshot maps the file and reads the table of contents only, numeric fields are exposed as read-only numpy arrays over the mapped pages (see column), and bodies are exposed as BodyView objects created on first access. Several processes opening the same file share its pages.
+
+        snap = snapshot.MappedSnapshot('/tmp/system.snap')
+        snap.column('moon', 'meanRadius').mean()
+        snap.byname('planet', 'Earth').materialize()
+
+    Instance Attributes
+    -------------------
+    path: str
+        filesystem path of the snapshot file
+    name: str
+        name of the saved system
+    scale_data: dict
+        scale state of the saved system
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = self._mmap[:HEADER.size]
+        if len(header) != HEADER.size:
+            raise SnapshotError("not a snapshot file (truncated header)")
+        magic, version, offset, length = HEADER.unpack(header)
+        if magic != MAPPED_MAGIC:
+            raise SnapshotError("not a mapped snapshot file (bad magic)")
+        if version != MAPPED_VERSION:
+            raise SnapshotError(f"unsupported mapped snapshot version {version} (expected {MAPPED_VERSION})")
+        try:
+            self._toc = json.loads(self._mmap[offset:offset + length])
+        except ValueError as e:
+            raise SnapshotError(f"corrupt snapshot table of contents ({e})") from None
+        self.name = self._toc['name']
+        self.scale_data = self._toc['scale_data']
+        self._columns = dict((t, dict((k, self._array(v)) for k, v in e['columns'].items())) for t, e in self._toc['types'].items())
+        self._views = dict((t, {}) for t in self._toc['types'])
+        self._names = {}
+        self._children = None
+
+    def _array(self, entry: dict) -> np.ndarray:
+        return np.frombuffer(self._mmap, dtype=entry['dtype'], count=entry['count'], offset=entry['offset'])
+
+    def _blob(self, entry: list, index: int) -> bytes:
+        offsets = self._array(entry[0])
+        start = entry[1]['offset']
+        return self._mmap[start + int(offsets[index]):start + int(offsets[index + 1])]
+
+    def _load_record(self, objtype: str, index: int) -> dict:
+        return pickle.loads(self._blob(self._toc['types'][objtype]['records'], index))
+
+    def fields(self, objtype: str) -> list:
+        """
+        Returns the names of the numeric fields (columns) of a body type
+        """
+        return list(self._toc['types'][objtype]['columns'])
+
+    def count(self, objtype: str) -> int:
+        """
+        Returns the number of stored bodies of a type ('sun', 'planet' or 'moon')
+        """
+        return self._toc['types'][objtype]['count']
+
+    def column(self, objtype: str, field: str) -> np.ndarray:
+        """
+        Returns a read-only numpy array of a numeric field over every body of a type, the array is a view on the mapped file (nothing is copied)
+
+        Parameters
+        ----------
+
+        objtype: str
+            'sun', 'planet' or 'moon'
+        field: str
+            numeric attribute (raw values are available as '_raw.<field>')
+        """
+        try:
+            return self._columns[objtype][field]
+        except KeyError:
+            raise KeyError(f"no numeric column {field!r} for {objtype}") from None
+
+    def name_of(self, objtype: str, index: int) -> str:
+        """
+        Returns the englishName of a body by index
+        """
+        return self._blob(self._toc['types'][objtype]['names'], index).decode()
+
+    def body(self, objtype: str, index: int) -> BodyView:
+        """
+        Returns the BodyView of a body by index (views are created on first access)
+        """
+        if index < 0:
+            index += self.count(objtype)
+        if not 0 <= index < self.count(objtype):
+            raise IndexError(f"{objtype} index {index} out of range")
+        views = self._views[objtype]
+        if index not in views:
+            views[index] = BodyView(self, objtype, index)
+        return views[index]
+
+    def bodies(self, objtype: str):
+        """
+        Yields the BodyView of every body of a type
+        """
+        return (self.body(objtype, i) for i in range(self.count(objtype)))
+
+    def byname(self, objtype: str, name: str) -> BodyView:
+        """
+        Returns the BodyView of a body by englishName (the name index of a type is built on first use), or None
+        """
+        if objtype not in self._names:
+            self._names[objtype] = dict((self.name_of(objtype, i), i) for i in reversed(range(self.count(objtype))))
+        index = self._names[objtype].get(name)
+        return None if index == None else self.body(objtype, index)
+
+    def moons_of(self, planet: int) -> list:
+        """
+        Returns the BodyViews of the moons owned by a planet (by planet index)
+        """
+        if self._children == None:
+            parent = self._array(self._toc['types']['moon']['parent'])
+            order = np.argsort(parent, kind='stable')
+            bounds = np.searchsorted(parent[order], np.arange(self.count('planet') + 1))
+            self._children = (order, bounds)
+        order, bounds = self._children
+        return [self.body('moon', int(i)) for i in order[bounds[planet]:bounds[planet + 1]]]
+
+    def materialize(self) -> dict:
+        """
+        Creates every body of the snapshot, returns the same dict as snapshot.read (name, scale_data, sun, planets and moons)
+        """
+        planets = [i.materialize() for i in self.bodies('planet')]
+        return {
+            'name': self.name,
+            'scale_data': self.scale_data,
+            'sun': self.body('sun', 0).materialize(),
+            'planets': planets,
+            'moons': utilz.flatten([i.moonData for i in planets])
+        }
+
+    def close(self):
+        """
+        Drops the cached views and unmaps the file (arrays returned by column must not be used afterwards)
+        """
+        self._columns, self._views, self._children = {}, {}, None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # NOTE: arrays returned by column are still referenced, the file is unmapped once they are released
+            pass
+
+    def __enter__(self) -> MappedSnapshot:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return f"<MappedSnapshot {self.path} {dict((t, e['count']) for t, e in self._toc['types'].items())}>"
+
+
+def is_mapped(path: str) -> bool:
+    """
+    Returns True when path is a mapped (columnar) snapshot file
+    """
+    with open(path, "rb") as f:
+        return f.read(len(MAPPED_MAGIC)) == MAPPED_MAGIC
@@ -1,13 +1,19 @@
-import os, sys
+from __future__ import annotations
+import os, sys, itertools, copy
 
-LIB_HOME='/Users/photon/DevOps/Projects/Solar_System_Model'
-os.chdir(LIB_HOME)
 sys.path.extend([os.path.join('../', 'lib')])
 from sun import Sun  
 from planet import Planet
-from moon import Moon
+from moon import Moon, MoonData
 import utilz
-print(f"loaded ok..")
+import scaling
+import registry
+import predicate
+import snapshot
+import export
+import fingerprint
+import query
+import hierarchy
 
 class SolarSystem:
     """
@@ -18,14 +24,17 @@ class SolarSystem:
     Class Attributes
     ----------------
 
-    _objects : list 
-        A list containing all created objects contained in solar system
-    _planets : list
-        A list containing all planet objects contained in the solar system
-    _suns: list
-        A list containing all sun objects contained in the solar system 
-    _instances: list 
-        A list containing the SolarSystem object itself, this should always contain 1 item per instantiated SolarSystem
+    _objects : registry.Aggregate 
+        A view of the `objects` registry of every SolarSystem (all created objects contained in each solar system)
+    _planets : registry.Aggregate
+        A view of the `planets` registry of every SolarSystem
+    _moons : registry.Aggregate
+        A view of the `moons` registry of every SolarSystem
+    _suns: registry.Aggregate
+        A view of the `suns` registry of every SolarSystem
+    _instances: registry.ScopedRegistry 
+        A weak registry containing the SolarSystem object itself, this should always contain 1 item per instantiated SolarSystem
+    NOTE: _instances is scoped to the current registry context (see registry.Context) and holds weak references, a SolarSystem drops out of it (and of the aggregate views) once nothing else references it, or when SolarSystem.dispose is called
     _default_scale_data: dict 
         A nervous addition of the default scale dictionary to the class for convenienence =)!!
 
@@ -39,6 +48,12 @@ class SolarSystem:
         The planets associated with the solar system object 
     moons: list(moon.Moon,...)
         The moons associated with the solar system object
+    context: registry.Context
+        The registry context the solar system object and its bodies are registered in
+    registries: dict
+        The registries of the solar system object (objects, suns, planets, moons), they only hold its own bodies
+    _queries: query.Cache
+        Cached results of vals, byvalue, min, max and minmax over the solar system object
 
     default_scale_data: dict
         A dict storing scale exponents for each object type (default: see below..)
@@ -104,23 +119,47 @@ class SolarSystem:
             val: the attribute value
             example(s): 
                 SolarSystem.byvalue(attr='englishName', eval_string='val == "Earth"')
+    @query(objtype: str = 'objects') -> query.Query:
+        Returns a select / where / groupby / aggregate query over all defined objects of a type, grouped results are computed as vectorized reductions (see query.Query)
     @min(objtype: str = 'objects', attr: str = 'englishName', debug=False):
         Returns the object with minimum value across all defined objects for specified attr (attribute). This works best for attributes with numeric values.
     @max(objtype: str = 'objects', attr: str = 'englishName', debug=False):
         Returns the object with maximum value across all defined objects for specified attr (attribute). This works best for attributes with numeric values.
     @minmax(objtype: str = 'objects', attr: str = 'englishName', debug=False):
         Returns a tuple object with (min(Object), max(Object)) values across all defined objects for specified attr (attribute). This works best for attributes with numeric values.
+    NOTE: vals, byvalue, query, min, max and minmax may also be called on a SolarSystem object, they then only query the objects of that solar system (see SolarSystem.registries)
+    NOTE: results of vals, byvalue, min, max and minmax are cached, and recomputed once objects are registered, removed or rescaled (see query.stamp), attributes assigned by hand (not through scaling) are not noticed, class level results are cached per registry context (see registry.Context.caches) and never keep bodies alive
+    @load(path: str, context: registry.Context = None) -> SolarSystem:
+        Loads a SolarSystem written by SolarSystem.save from a single snapshot file
+    @loads(data: bytes, context: registry.Context = None) -> SolarSystem:
+        Loads a SolarSystem from a snapshot returned by SolarSystem.dumps
 
     Instance Methods
     ----------------
     scale_solar_system(scale_data: dict = None, debug: bool = False) -> SolarSystem: 
             Scales all objects in SolarSystem by scale_data (defaults to using SolarSystem._default_scale_data)
+    dispose():
+            Removes the SolarSystem and its objects from the class registries and drops its references to them
+    save(path: str, mapped: bool = False) -> dict:
+            Writes the SolarSystem to a single snapshot file (see snapshot.write and snapshot.write_mapped)
+    dumps(level: int = 6) -> bytes:
+            Returns the SolarSystem as a compact snapshot (see snapshot.dumps)
+    export(out, backend: str = None) -> int:
+            Streams the bodies of the SolarSystem as NDJSON (see export.write)
+    clone(scale_data: dict = None, context: registry.Context = None, debug: bool = False) -> SolarSystem:
+            Returns a copy of the SolarSystem sharing raw body data, which can be scaled independently
+    hierarchy() -> hierarchy.Hierarchy:
+            Returns the sun -> planet -> moon hierarchy of the SolarSystem (see hierarchy.Hierarchy)
+    fingerprint() -> str:
+            Returns the Merkle root hash of the SolarSystem (see merkle)
+    diff(other: SolarSystem) -> dict:
+            Returns the bodies added, removed and changed in another SolarSystem
     """
-    _objects = []
-    _planets = [] 
-    _suns = [] 
-    _moons = []
-    _instances = []
+    _instances = registry.scoped('systems')
+    _objects = registry.Aggregate('objects', lambda: SolarSystem._instances)
+    _planets = registry.Aggregate('planets', lambda: SolarSystem._instances)
+    _suns = registry.Aggregate('suns', lambda: SolarSystem._instances)
+    _moons = registry.Aggregate('moons', lambda: SolarSystem._instances)
     _default_scale_data = {
                 "sun": {
                     "debug": False, 
@@ -145,7 +184,7 @@ class SolarSystem:
                 }
             }
 
-    def __init__(self, name: str = "SolarSystem", scale_data: dict = None, debug: bool = False):
+    def __init__(self, name: str = "SolarSystem", scale_data: dict = None, context: registry.Context = None, debug: bool = False):
         """
         Constructs a SolarSystem object containing planets, moons, and sun(s)
 
@@ -154,7 +193,7 @@ class SolarSystem:
 
         name : str 
             The name of the SolarSystem object (default: 'SolarSystem')
-        scale_data: dict 
+        scale_data: dict|scaling.ScaleProfile 
             A dict containing exponents for standard scaling of objects (default: self.default_scale_data), this works by overriding built-in defaults, therefore, the full dictionary definition does not need to be specified. (default: see below)
                 {
                     "sun": {
@@ -179,10 +218,13 @@ class SolarSystem:
                         "scale_size": 0.5
                     }
                 }
+        context: registry.Context
+            The registry context the SolarSystem and its bodies are registered in (default: the current context, see registry.current)
         debug: bool
             Output useful debugging information
         """
         self.name = name
+        self.context = registry.current() if context == None else context
         self.default_scale_data = {
             "sun": {
                 "debug": False, 
@@ -207,19 +249,214 @@ class SolarSystem:
             }
         }
         # merge in any user provided scale data
-        self.user_scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        sun = Sun(debug=debug) 
-        self.__class__._objects.append(sun)
-        self.sun = sun 
-        self.planets = Planet.make_planets(debug=debug) 
-        self.__class__._objects.extend(self.planets)
+        self.user_scale_data = scaling.profile(self.default_scale_data, scale_data).todict()
+        with self.context:
+            self.sun = Sun(debug=debug) 
+            self.planets = Planet.make_planets(debug=debug) 
+            self.moons = utilz.flatten([i.moonData for i in self.planets])
+        self._register()
+
+    def _register(self, pin: bool = False):
+        # registers the bodies in the registries of the solar system, and the solar system in the registry of its context
+        self.registries = dict((i, registry.Registry(i)) for i in ('objects', 'suns', 'planets', 'moons'))
+        self.registries['objects'].extend([self.sun] + list(self.planets) + list(self.moons))
+        self.registries['suns'].append(self.sun)
+        self.registries['planets'].extend(self.planets)
+        self.registries['moons'].extend(self.moons)
+        self._queries = query.Cache()
+        with self.context:
+            self.__class__._instances.append(self, pin=pin)
+
+    @classmethod
+    def _from_bodies(cls, name: str, sun: Sun, planets: list, scale_data: dict = None, context: registry.Context = None, pin: bool = False) -> SolarSystem:
+        """
+        Constructs a SolarSystem object from existing bodies (eg. bodies read from a snapshot), nothing is fetched from the data source
+
+        Parameters
+        ----------
+
+        name : str 
+            The name of the SolarSystem object
+        sun: sun.Sun
+            The sun of the solar system
+        planets: list(planet.Planet,...)
+            The planets of the solar system, moons are taken from Planet.moonData
+        scale_data: dict|scaling.ScaleProfile 
+            A dict containing exponents for standard scaling of objects (default: SolarSystem._default_scale_data)
+        context: registry.Context
+            The registry context the SolarSystem and its bodies are registered in (default: the current context, see registry.current)
+        pin: bool
+            hold the solar system and its bodies in the registries until disposed (default: False)
+        """
+        self = cls.__new__(cls)
+        self.name = name
+        self.context = registry.current() if context == None else context
+        self.default_scale_data = scaling.profile(cls._default_scale_data).todict()
+        self.user_scale_data = scaling.profile(self.default_scale_data, scale_data).todict()
+        self.sun = sun
+        self.planets = list(planets)
         self.moons = utilz.flatten([i.moonData for i in self.planets])
-        self.__class__._objects.extend(self.moons)
-        self.__class__._instances.append(self)
-        self.__class__._suns.append(self.sun)
-        self.__class__._planets.extend(self.planets)
-        self.__class__._moons.extend(self.moons)
-        self.__class__._objects.append(self.sun)
+        with self.context:
+            Sun._instances.append(self.sun, pin=pin)
+            Planet._instances.extend(self.planets, pin=pin)
+            Moon._instances.extend(self.moons, pin=pin)
+            [i.moonData.rebind(self.context) for i in self.planets]
+        self._register(pin=pin)
+        return self
+
+    def clone(self, scale_data: dict = None, context: registry.Context = None, debug: bool = False) -> SolarSystem:
+        """
+        Returns a copy of the SolarSystem which can be scaled independently, nothing is fetched from the data source
+
+        Bodies are shallow copies: raw values (and every other value) are shared with the original until scaling rebinds the scaled attributes of the copy, so each clone costs one attribute dict per body rather than a catalog.
+
+        Parameters
+        ----------
+
+        scale_data: dict|scaling.ScaleProfile 
+            scale the clone with these exponents once created (default: None, the clone keeps the scale state of the original)
+        context: registry.Context
+            The registry context the clone and its bodies are registered in (default: the context of the original)
+        debug: bool
+            Output useful debugging information
+        """
+        # NOTE: copy.copy goes through __getstate__/__setstate__, which share every value and give each copy its own view cache
+        moons = dict((id(i), copy.copy(i)) for i in self.moons)
+        planets = []
+        for planet in self.planets:
+            clone = copy.copy(planet)
+            clone.moonData = MoonData.of([moons[id(i)] for i in planet.moonData], debug=debug)
+            planets.append(clone)
+        user_scale_data = self.user_scale_data if scale_data == None else scaling.profile(self.default_scale_data, scale_data).todict()
+        system = self.__class__._from_bodies(self.name, copy.copy(self.sun), planets, scale_data=user_scale_data, context=self.context if context == None else context)
+        with system.context:
+            system.scale_solar_system(scale_data, debug=debug) if scale_data != None else None
+        return system
+
+    def hierarchy(self) -> hierarchy.Hierarchy:
+        """
+        Returns the sun -> planet -> moon Hierarchy of the SolarSystem (parent and child offset arrays, see hierarchy.Hierarchy), built once and rebuilt only after bodies are added to or removed from the solar system
+        """
+        generation = self.registries['objects'].generation
+        if getattr(self, '_hierarchy', (None, None))[0] != generation:
+            self._hierarchy = (generation, hierarchy.build(self.sun, self.planets))
+        return self._hierarchy[1]
+
+    def merkle(self) -> dict:
+        """
+        Returns the Merkle tree of the SolarSystem: the fingerprint of every body, of every planet node (a planet and its moons) and the root hash, see fingerprint.tree
+        """
+        return fingerprint.tree(self.sun, self.planets, name=self.name)
+
+    def fingerprint(self) -> str:
+        """
+        Returns the root hash of the SolarSystem, it changes whenever a body's raw payload or scale state changes
+        """
+        return self.merkle()['root']
+
+    def diff(self, other: SolarSystem) -> dict:
+        """
+        Returns the bodies added, removed and changed (raw payload or scale state) in another SolarSystem compared to this one, only planet nodes whose hash differs are compared body by body
+
+        Parameters
+        ----------
+
+        other: SolarSystem
+            the system to compare with
+
+        Returns
+        -------
+        dict with keys added, removed and changed, lists of body keys ('<type>:<englishName>')
+        """
+        return fingerprint.diff(self.merkle(), other.merkle())
+
+    def save(self, path: str, mapped: bool = False) -> dict:
+        """
+        Writes the SolarSystem (sun, planets, moons, hierarchy and scale state) to a single snapshot file, see snapshot.write
+
+        Parameters
+        ----------
+
+        path: str
+            filesystem path of the snapshot file
+        mapped: bool
+            write the memory mappable columnar layout, see snapshot.write_mapped and snapshot.MappedSnapshot (default: False)
+        """
+        write = snapshot.write_mapped if mapped else snapshot.write
+        return write(path, self.sun, self.planets, name=self.name, scale_data=self.user_scale_data)
+
+    def dumps(self, level: int = 6) -> bytes:
+        """
+        Returns the SolarSystem as a compact snapshot (bytes), see snapshot.dumps, read it back with SolarSystem.loads
+
+        Parameters
+        ----------
+
+        level: int
+            zlib compression level (default: 6)
+        """
+        return snapshot.dumps(self.sun, self.planets, name=self.name, scale_data=self.user_scale_data, level=level)
+
+    def export(self, out, backend: str = None) -> int:
+        """
+        Streams the sun, planets and moons of the SolarSystem to a file or pipe as NDJSON (one compact JSON object per body, planets reference their moons instead of inlining them), returns the number of rows written, see export.write
+
+        Parameters
+        ----------
+
+        out: str|file
+            filesystem path, '-' for stdout, or an open file object
+        backend: str
+            'orjson' or 'json' (default: orjson when it is installed)
+        """
+        return export.write(itertools.chain([self.sun], self.planets, self.moons), out, backend=backend)
+
+    @classmethod
+    def load(cls, path: str, context: registry.Context = None) -> SolarSystem:
+        """
+        Loads a SolarSystem from a snapshot file written by SolarSystem.save (either layout), the bodies are only registered once the whole file has been read and validated
+
+        Parameters
+        ----------
+
+        path: str
+            filesystem path of the snapshot file
+        context: registry.Context
+            The registry context the SolarSystem and its bodies are registered in (default: the current context, see registry.current)
+        """
+        data = snapshot.read(path)
+        # NOTE: the registries are the only owners of loaded objects, they are pinned until disposed
+        return cls._from_bodies(data['name'], data['sun'], data['planets'], scale_data=data['scale_data'], context=context, pin=True)
+
+    @classmethod
+    def loads(cls, data: bytes, context: registry.Context = None) -> SolarSystem:
+        """
+        Loads a SolarSystem from a snapshot returned by SolarSystem.dumps (eg. a result of batch.build)
+
+        Parameters
+        ----------
+
+        data: bytes
+            the snapshot
+        context: registry.Context
+            The registry context the SolarSystem and its bodies are registered in (default: the current context, see registry.current)
+        """
+        data = snapshot.loads(data)
+        return cls._from_bodies(data['name'], data['sun'], data['planets'], scale_data=data['scale_data'], context=context, pin=True)
+
+    def dispose(self):
+        """
+        Removes the SolarSystem and all of its objects (sun, planets and moons) from the registries of its context, and drops its references to them
+        """
+        objs = [self, self.sun] + list(self.planets) + list(self.moons)
+        with self.context:
+            registry.dispose(*objs)
+        [i.clear() for i in self.registries.values()]
+        self._queries.clear()
+        self.__dict__.pop('_hierarchy', None)
+        self.sun = None
+        self.planets = []
+        self.moons = []
 
 
     def scale_solar_system(self, scale_data: dict = None, debug: bool = False):
@@ -229,7 +466,7 @@ class SolarSystem:
         Parameters
         ----------
 
-        scale_data : dict 
+        scale_data: dict|scaling.ScaleProfile 
             A dict containing exponents for standard scaling of objects (default: self.default_scale_data), this works by overriding built-in defaults, therefore, the full dictionary definition does not need to be specified. (default: see below)
                 {
                     "sun": {
@@ -257,9 +494,10 @@ class SolarSystem:
         debug : bool
             Output useful debugging information
         """
-        scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        [i.scale_planet(scale_data=scale_data, debug=debug, do_moons=True) for i in self.planets] 
-        self.sun.scale_sun(debug=debug)
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        scaling.scale_many(self.planets, 'planet', scale_data['planet'], debug=debug)
+        scaling.scale_many(self.moons, 'moon', scale_data['moon'], debug=debug)
+        self.sun.scale_sun(scale_data, debug=debug)
 
     @classmethod
     def scale_solar_systems(cls, scale_data: dict = None, debug: bool = False):
@@ -269,7 +507,7 @@ class SolarSystem:
         Parameters
         ----------
 
-        scale_data : dict 
+        scale_data: dict|scaling.ScaleProfile 
             A dict containing exponents for standard scaling of objects (default: self.default_scale_data), this works by overriding built-in defaults, therefore, the full dictionary definition does not need to be specified. (default: see below)
                 {
                     "sun": {
@@ -297,13 +535,27 @@ class SolarSystem:
         debug : bool
             Output useful debugging information
         """
-        scale_data = cls._default_scale_data if scale_data == None else utilz.merge_attributes(cls._default_scale_data, scale_data)
+        scale_data = scaling.profile(cls._default_scale_data, scale_data)
         #scale planets and moons 
-        [i.scale_planet(scale_data=scale_data, debug=debug, do_moons=True) for i in cls._planets]
+        scaling.scale_many(cls._planets, 'planet', scale_data['planet'], debug=debug)
+        scaling.scale_many(cls._moons, 'moon', scale_data['moon'], debug=debug)
         #scale sun 
         sun = cls._suns[0]
-        sun.scale_sun(debug=True)
+        sun.scale_sun(scale_data, debug=debug)
+
+
+    @utilz.hybridmethod
+    def _source(owner, objtype: str):
+        # the registry queried for objtype: the solar systems own registry when called on an instance, the aggregate view of every solar system when called on the class
+        return owner.registries[objtype] if isinstance(owner, SolarSystem) else getattr(owner, f"_{objtype}")
 
+    @utilz.hybridmethod
+    def _query(owner, key: tuple, compute):
+        # the cached result of a query over owner._source(key[1]), compute(source) is only called when the source changed since the result was cached
+        source = owner._source(key[1])
+        # NOTE: class level results are cached per registry context (they are computed over the solar systems of the current context)
+        cache = owner._queries if isinstance(owner, SolarSystem) else registry.current().cache('queries', query.Cache)
+        return cache.get(key, query.stamp(source), lambda: compute(source))
 
     @classmethod 
     def attributes(cls) -> list: 
@@ -312,8 +564,8 @@ class SolarSystem:
         """
         return [i for i in cls.__dict__.keys() if i.startswith('_')]
 
-    @classmethod 
-    def vals(cls, objtype: str = 'planets', attr: str = 'englishName', labeled=True):
+    @utilz.hybridmethod
+    def vals(owner, objtype: str = 'planets', attr: str = 'englishName', labeled=True):
         """
         Returns list or dict (labeled list) of atrribute values for requested object type. 
  
@@ -334,16 +586,16 @@ class SolarSystem:
         """
         try: 
             if labeled:
-                return { i.englishName: i.__getattribute__(attr) for i in cls.__dict__[f"_{objtype}"]}
+                return owner._query(('vals', objtype, attr, True), lambda source: { i.englishName: getattr(i, attr) for i in source })
             else:
-                return sorted([i.__getattribute__(attr) for i in cls.__dict__[f"_{objtype}"] ])
+                return owner._query(('vals', objtype, attr, False), lambda source: sorted([getattr(i, attr) for i in source ]))
         except AttributeError:
             print(f"WARNING: an attribute named `{attr}` does not exist")
 
 
 
-    @classmethod
-    def byvalue(cls, objtype: str = 'objects', attr: str = 'englishName', eval_string = 'val == "Earth"', debug=False):
+    @utilz.hybridmethod
+    def byvalue(owner, objtype: str = 'objects', attr: str = 'englishName', eval_string = 'val == "Earth"', debug=False):
         """
         Returns list of objects which meet the specified criteria
  
@@ -365,23 +617,41 @@ class SolarSystem:
                     val: attribute value
                     attr:  attribute name
             ex: eval_string='val >= 10e8' #return objects with a val greater than or equal to 1000000000.00
+            the expression language is described in predicate.Predicate, anything else (arbitrary python code) is rejected with predicate.PredicateError
 
         """
-        vals = []
         try:
-            data = cls.__dict__[f"_{objtype}"]
-            if len(data) > 0:
-                for i in data:
-                    val = i.__getattribute__(attr)
-                    print(f"INFO: found attribute {attr} with value {val}") if debug else None
-                    if (eval(eval_string)):
-                        vals.append(i)
-            return vals
+            def select(source):
+                data = list(source)
+                # NOTE: the expression is compiled once (see predicate.compile), and evaluated as a vectorized mask over all values
+                evaluator = predicate.compile(eval_string)
+                vals = [getattr(i, attr) for i in data]
+                print(f"INFO: found attribute {attr} with values {vals}") if debug else None
+                return [i for i, keep in zip(data, evaluator.mask(vals, attr)) if keep]
+            return owner._query(('byvalue', objtype, attr, eval_string), select)
         except IndexError:
             return None
 
-    @classmethod
-    def min(cls, objtype: str = 'objects', attr: str = 'englishName', debug=False):
+    @utilz.hybridmethod
+    def query(owner, objtype: str = 'objects') -> query.Query:
+        """
+        Returns a select / where / groupby / aggregate query over the objects of a type (see query.Query), eg. the mean radius of the moons larger than 100km of each planet:
+            SolarSystem.query('moons').where('meanRadius', 'val > 100').groupby('aroundPlanet').aggregate(moons='count', meanRadius='mean')
+
+        Parameters
+        ----------
+
+        objtype: str
+            specify the type of object to query, valid values are:
+                planets: all defined planets 
+                moons: all defined moons
+                suns: all defined suns 
+                objects: all defined objects
+        """
+        return query.Query(owner._source(objtype))
+
+    @utilz.hybridmethod
+    def min(owner, objtype: str = 'objects', attr: str = 'englishName', debug=False):
         """
         Returns the object with the minimum value across all specified defined objects
  
@@ -398,15 +668,13 @@ class SolarSystem:
             specify the object attribute to be validated
         """
         try:
-            return min(
-                [i for i in cls.__dict__[f"_{objtype}"] ], key=lambda i: i.__getattribute__(attr)
-                )
+            return owner._query(('minmax', objtype, attr), lambda source: query.extremes(source, attr))[0]
         except AttributeError:
             print(f"WARNING: an attribute named `{attr}` does not exist")
             return None
 
-    @classmethod
-    def max(cls, objtype: str = 'objects', attr: str = 'englishName', debug=False):
+    @utilz.hybridmethod
+    def max(owner, objtype: str = 'objects', attr: str = 'englishName', debug=False):
         """
         Returns the object with the maximum value across all specified defined objects
  
@@ -423,15 +691,13 @@ class SolarSystem:
             specify the object attribute to be validatede
         """
         try:
-            return max(
-                [i for i in cls.__dict__[f"_{objtype}"] ], key=lambda i: i.__getattribute__(attr)
-                )
+            return owner._query(('minmax', objtype, attr), lambda source: query.extremes(source, attr))[1]
         except AttributeError:
             print(f"WARNING: an attribute named `{attr}` does not exist")
             return None
 
-    @classmethod
-    def minmax(cls, objtype: str = 'planets', attr: str = 'englishName', debug=False) -> tuple:
+    @utilz.hybridmethod
+    def minmax(owner, objtype: str = 'planets', attr: str = 'englishName', debug=False) -> tuple:
         """
         Returns a tuple containing (min(object), max(object)) across all specified defined objects
  
@@ -448,7 +714,8 @@ class SolarSystem:
             specify the object attribute to be validated
         """
         try:
-            return ( min([i for i in cls.__dict__[f"_{objtype}"] ], key=lambda i: i.__getattribute__(attr)),max([i for i in cls.__dict__[f"_{objtype}"] ], key=lambda i: i.__getattribute__(attr)) )
+            # NOTE: min and max are found in a single pass (see query.extremes), min and max share the cached result
+            return owner._query(('minmax', objtype, attr), lambda source: query.extremes(source, attr))
         except AttributeError:
             print(f"WARNING: an attribute named `{attr}` does not exist")
             return None
@@ -0,0 +1,298 @@
+# incrementally maintained (Welford) statistics over the registered Sun, Planet and Moon objects
+from __future__ import annotations
+import os, sys, math, heapq
+from collections import Counter
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+np = utilz.lazy_import('numpy')
+import registry
+
+
+def _number(value) -> float:
+    # returns value as a float when it is a finite real number, otherwise None (the value is not counted)
+    if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+class RunningStats:
+    """
+    Count, mean, variance, min and max of a stream of numbers, updated in O(1) as values are added or removed (Welford's algorithm)
+
+    min and max are kept in heaps with lazy deletion, so removing the current min/max is amortized O(log n) instead of a rescan.
+
+    Instance Attributes
+    -------------------
+    count: int
+        number of values
+    mean: float
+        mean of the values (nan when empty)
+    """
+
+    def __init__(self, values: list = ()):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._low, self._high = [], []
+        self._dropped = (Counter(), Counter())
+        [self.add(i) for i in values]
+
+    def add(self, x: float):
+        """
+        Adds a value
+        """
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+        heapq.heappush(self._low, x)
+        heapq.heappush(self._high, -x)
+
+    def remove(self, x: float):
+        """
+        Removes a value which was previously added
+        """
+        if self.count <= 1:
+            self.count, self.mean, self._m2 = 0, 0.0, 0.0
+            self._low, self._high = [], []
+            self._dropped = (Counter(), Counter())
+            return
+        mean = (self.count * self.mean - x) / (self.count - 1)
+        self._m2 = max(self._m2 - (x - self.mean) * (x - mean), 0.0)
+        self.mean = mean
+        self.count -= 1
+        self._dropped[0][x] += 1
+        self._dropped[1][x] += 1
+        if max(len(self._low), len(self._high)) > 2 * self.count + 64:
+            self._compact()
+
+    def replace(self, old: float, new: float):
+        """
+        Replaces a value which was previously added (eg. after rescaling)
+        """
+        self.remove(old)
+        self.add(new)
+
+    def _compact(self):
+        # rebuilds both heaps from the live values
+        dropped = self._dropped[0]
+        low = []
+        for x in self._low:
+            if dropped[x]:
+                dropped[x] -= 1
+            else:
+                low.append(x)
+        heapq.heapify(low)
+        self._low, self._high = low, [-x for x in low]
+        heapq.heapify(self._high)
+        self._dropped = (Counter(), Counter())
+
+    def _top(self, heap: list, dropped: Counter, sign: int) -> float:
+        # pops dropped values off the top of a heap (each heap tracks its own pending deletions)
+        while heap and dropped[sign * heap[0]] > 0:
+            dropped[sign * heapq.heappop(heap)] -= 1
+        return sign * heap[0] if heap else float('nan')
+
+    @property
+    def variance(self) -> float:
+        """
+        Sample variance (nan with fewer than 2 values)
+        """
+        return self._m2 / (self.count - 1) if self.count > 1 else float('nan')
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance) if self.count > 1 else float('nan')
+
+    @property
+    def min(self) -> float:
+        return self._top(self._low, self._dropped[0], 1) if self.count else float('nan')
+
+    @property
+    def max(self) -> float:
+        return self._top(self._high, self._dropped[1], -1) if self.count else float('nan')
+
+    def todict(self) -> dict:
+        """
+        Returns dict with count, mean, variance, std, min and max
+        """
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count else float('nan'),
+            'variance': self.variance,
+            'std': self.std,
+            'min': self.min,
+            'max': self.max
+        }
+
+    def __repr__(self):
+        return f"<RunningStats {self.todict()}>"
+
+
+class Tracker:
+    """
+    A registry observer maintaining RunningStats for numeric attributes of the registered objects
+
+    Registering, removing (or garbage collecting) and rescaling (see scaling.apply, scaling.scale_many) an object updates the stats of every tracked attribute in O(1), the first summary of an attribute scans the registry once and tracks it from then on.
+
+    Instance Attributes
+    -------------------
+    registry: registry.Registry
+        the observed registry
+    stats: dict
+        RunningStats by attribute name
+    verify: bool
+        recompute every summary from the registered objects and raise StatsError when the incremental values differ (default: False)
+    """
+
+    def __init__(self, registry: registry.Registry, verify: bool = False):
+        self.registry = registry
+        self.verify = verify
+        self.stats = {}
+        self._values = {}
+        registry.observe(self)
+
+    def track(self, attrib: str) -> RunningStats:
+        """
+        Starts tracking an attribute (a no-op when it is already tracked), returns its RunningStats
+
+        Parameters
+        ----------
+
+        attrib: str
+            numeric attribute of the registered objects
+        """
+        if attrib not in self.stats:
+            values = dict((id(i), _number(getattr(i, attrib, None))) for i in self.registry)
+            self._values[attrib] = dict((k, v) for k, v in values.items() if v != None)
+            self.stats[attrib] = RunningStats(self._values[attrib].values())
+        return self.stats[attrib]
+
+    def added(self, key: int, obj):
+        for attrib, stats in self.stats.items():
+            value = _number(getattr(obj, attrib, None))
+            if value != None:
+                self._values[attrib][key] = value
+                stats.add(value)
+
+    def removed(self, key: int):
+        for attrib, stats in self.stats.items():
+            value = self._values[attrib].pop(key, None)
+            stats.remove(value) if value != None else None
+
+    def changed(self, key: int, obj):
+        for attrib, stats in self.stats.items():
+            old = self._values[attrib].get(key)
+            new = _number(getattr(obj, attrib, None))
+            if old == new:
+                continue
+            stats.remove(old) if old != None else None
+            if new == None:
+                self._values[attrib].pop(key, None)
+            else:
+                self._values[attrib][key] = new
+                stats.add(new)
+
+    def cleared(self):
+        for attrib in self.stats:
+            self._values[attrib] = {}
+            self.stats[attrib] = RunningStats()
+
+    def recompute(self, attrib: str) -> dict:
+        """
+        Returns the summary of an attribute computed from scratch over the registered objects (count, mean, variance, std, min, max)
+        """
+        values = np.array([v for v in (_number(getattr(i, attrib, None)) for i in self.registry) if v != None], dtype='float64')
+        if len(values) == 0:
+            return RunningStats().todict()
+        return {
+            'count': len(values),
+            'mean': float(values.mean()),
+            'variance': float(values.var(ddof=1)) if len(values) > 1 else float('nan'),
+            'std': float(values.std(ddof=1)) if len(values) > 1 else float('nan'),
+            'min': float(values.min()),
+            'max': float(values.max())
+        }
+
+    def check(self, attrib: str, rtol: float = 1e-9) -> dict:
+        """
+        Compares the incremental summary of an attribute against a full recompute, returns a dict of mismatched keys -> (incremental, recomputed)
+        """
+        incremental, full = self.track(attrib).todict(), self.recompute(attrib)
+        scale = max(abs(full['mean']), full['std'], 1.0) if full['count'] else 1.0
+        mismatched = {}
+        for k, v in full.items():
+            if math.isnan(v) and math.isnan(incremental[k]):
+                continue
+            tolerance = rtol * (scale * scale if k == 'variance' else scale)
+            if not abs(incremental[k] - v) <= tolerance:
+                mismatched[k] = (incremental[k], v)
+        return mismatched
+
+    def summary(self, attrib: str) -> dict:
+        """
+        Returns count, mean, variance, std, min and max of an attribute over the registered objects (O(1) once the attribute is tracked)
+
+        Parameters
+        ----------
+
+        attrib: str
+            numeric attribute of the registered objects
+        """
+        if self.verify:
+            mismatched = self.check(attrib)
+            if mismatched:
+                raise StatsError(f"incremental stats for {self.registry.name}.{attrib} differ from a full recompute: {mismatched}")
+        return self.track(attrib).todict()
+
+    def close(self):
+        """
+        Stops observing the registry
+        """
+        self.registry.unobserve(self)
+
+    def __repr__(self):
+        return f"<Tracker {self.registry.name} {list(self.stats)}>"
+
+
+class StatsError(ValueError):
+    """
+    Raised in verify mode when incremental stats differ from a full recompute
+    """
+
+
+def tracker(kind: str, verify: bool = None) -> Tracker:
+    """
+    Returns the Tracker of the registry for an object type in the current registry context, creating it on first use
+
+    Parameters
+    ----------
+
+    kind: str
+        object type (eg. 'planet', 'moon', 'sun')
+    verify: bool
+        switch verify mode on or off (default: unchanged, off for a new tracker)
+    """
+    registry_ = registry.current().get(kind)
+    found = [i for i in registry_._observers if isinstance(i, Tracker)]
+    tracker_ = found[0] if found else Tracker(registry_)
+    tracker_.verify = tracker_.verify if verify == None else verify
+    return tracker_
+
+
+def summary(kind: str, attrib: str, verify: bool = None) -> dict:
+    """
+    Returns count, mean, variance, std, min and max of an attribute over the registered objects of a type (see Tracker.summary)
+
+    Parameters
+    ----------
+
+    kind: str
+        object type (eg. 'planet', 'moon', 'sun')
+    attrib: str
+        numeric attribute of the registered objects
+    verify: bool
+        compare against a full recompute (default: unchanged, off for a new tracker)
+    """
+    return tracker(kind, verify=verify).summary(attrib)
@@ -3,16 +3,25 @@ import os, sys, weakref, pickle, glob, ctypes
 sys.path.extend([os.path.join('../', 'lib')])
 import data
 import utilz
+import scaling
+import registry
+import predicate
+import schema
+import fingerprint
+import export
 from orbital import derive_semiminor_axis
 import json
-import numpy as np
+np = utilz.lazy_import('numpy')
 
 class Sun:
-    _instances = []
+    # NOTE: weak registry of Sun objects in the current registry context (see registry.Context)
+    _instances = registry.scoped('sun')
 
-    def __init__(self, name: str = "sun",scale_data: dict = None, debug: bool = False):
+    def __init__(self, name: str = "sun",scale_data: dict = None, payload: dict = None, debug: bool = False):
         """
         name (str): 
+        scale_data (dict|scaling.ScaleProfile): overrides for default scale_data
+        payload (dict): the raw payload of the sun (as returned by data.get_sun_data, or built from a catalog, see catalog.bodies), fetched when omitted
         debug (bool): enables debug messages
         Returns a Moon (obj) by provided name
         Pro Tip: Moon objects are created when a Planet object is instantiated and has natural satellites, Planet.sunData[*].Moon
@@ -26,16 +35,12 @@ class Sun:
                 "scale_size": 1.5
             }
         }
-        self.user_scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        _sun = data.get_sun_data()
-        NoneType = type(None)
-        # NOTE: some suns have poorly formatted JSON strings and will be skipped
-        if isinstance(_sun, NoneType): 
-            print(f"WARNING: the sun was not available due to some parsing error, it will be skipped in plotting") if debug else None
-            return None
-        # NOTE: some suns have null (None) values for `mass` and/or `vol`
-        if _sun['mass'] == None or _sun['vol'] == None:
-            print(f"WARNING: the sun with relational URL {rel} has `None` mass or volume values, it will be skipped in plotting") if debug else None
+        self.user_scale_data = scaling.profile(self.default_scale_data, scale_data).todict()
+        _sun = data.get_sun_data() if payload == None else payload
+        # NOTE: the sun payload may be poorly formatted, or have null (None) values for `mass` and/or `vol`, it will be skipped (see schema.SUN)
+        reasons = schema.validate('sun', _sun)
+        if reasons:
+            print(f"WARNING: the sun is invalid ({'; '.join(i.message for i in reasons)}), it will be skipped in plotting") if debug else None
             return None
         for k in _sun.keys():
             print(f"INFO: adding attribute for sun {_sun['englishName']}  ({k}) with value ({_sun[k]})") if debug else None
@@ -50,26 +55,57 @@ class Sun:
         self.scaleVolExp = 0.0
         self.massValue = self.mass['massValue']
         self.massExponent = self.mass['massExponent']
-        self.massRawKG = float( f"{float(self.massValue*(10**self.massExponent)):f}" )
+        self.massRawKG = scaling.magnitude(self.massValue, self.massExponent)
         self.keys = list(_sun.keys()) + list(('massValue', 'massExponent',  'massRawKG', 'scaleMassExp','scaleSizeExp','scaleDistExp', 'scaleVolExp'))
         # NOTE: some suns may have no equaRadius data (see jupiter), in these cases fall back to setting radius by meanRadius value
         if self.equaRadius == 0:
             self.equaRadius = self.meanRadius
         if self.englishName == "":
             self.englishName = self.name
+        # NOTE: raw values are never modified, every scale operation starts from them
+        self._raw = scaling.freeze(self)
+        self._views = scaling.ViewCache()
         self.__class__._instances.append(self) 
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # NOTE: writes after construction (eg. planet.meanRadius = 1.0) invalidate the caches built over the registries holding the body, see registry.touch
+        if '_raw' in self.__dict__ and not name.startswith('_'):
+            registry.touch(self)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop('_views', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._views = scaling.ViewCache()
+
+    def fingerprint(self) -> str:
+        """
+        Returns a stable content hash of the sun (its raw payload and the exponents it is currently scaled by), see fingerprint.body
+        """
+        return fingerprint.body(self)
+
+    def view(self, scale_data: dict = None) -> scaling.ScaledView:
+        """
+        scale_data: dict|scaling.ScaleProfile (dictionary of overrides for default scale_data)
+        Returns a read-only view of the sun with scaled values (computed on first access, cached per scale profile), the sun itself is not modified
+        """
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        return scaling.view(self, 'sun', scale_data)
+
     def scale_mass(self, scale_data: dict = None, debug: bool = False) -> Sun:
         """
-        scale_exp: float (the exponent used to scale massRawKG value/(10**scale_exp) )
+        scale_data (dict|scaling.ScaleProfile): overrides for default scale_data, scale_data['sun']['scale_mass'] is the exponent used to scale massRawKG value/(10**scale_exp)
         debug (bool): enables debug messages
         Returns Moon (scaled mass quantities)
         """
-        self.user_scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        print(f"INFO: unscaled values massExponent ({self.massExponent})") if debug else None
-        self.scaleMassExp = scale_data['sun']['scale_mass']
-        self.massExponent = self.massExponent - (self.scaleMassExp)
-        self.massRawKG = int( f"{int(self.massValue*(10**self.massExponent)):d}" )
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        self.user_scale_data = scale_data.todict()
+        print(f"INFO: unscaled values massExponent ({self._raw['massExponent']})") if debug else None
+        scaling.apply(self, 'sun', self._raw, scale_data['sun'], groups=('mass',))
         print(f"INFO: scaled values massExponent ({self.massExponent})") if debug else None 
         return self
     
@@ -78,24 +114,22 @@ class Sun:
         scale_size: float (the exponent used to scale meanRadius and equaRadius  'radius/(10**scale_exp)' )
         scale_mass: float (the exponent used to scale massRawKG and volumeRawKG 'mass/(10**scale_exp)' )
         scale_vol: float (the exponent used to scale volumeRawKG 'vol/(10**scale_exp)' )
+        scale_data (dict|scaling.ScaleProfile): overrides for default scale_data, holding the exponents above under the 'sun' key
         debug (bool): enables debug messages
         Returns Moon (scaled size, mass and distance quantities)
         """
-        self.user_scale_data = self.default_scale_data if scale_data == None else utilz.merge_attributes(self.default_scale_data, scale_data)
-        self.meanRadius = self.meanRadius
-        print(f"INFO: {self.englishName} raw values  [meanRadius {self.meanRadius}] [equaRadius {self.equaRadius}] [massExponent {self.massExponent}] [massRawKG {self.massRawKG}]") if debug else None
+        scale_data = scaling.profile(self.default_scale_data, scale_data)
+        self.user_scale_data = scale_data.todict()
+        raw = self._raw
+        print(f"INFO: {self.englishName} raw values  [meanRadius {raw['meanRadius']}] [equaRadius {raw['equaRadius']}] [massExponent {raw['massExponent']}] [massRawKG {raw['massRawKG']}]") if debug else None
         #print(f"INFO: {self.englishName} raw values [meanRadius -> {self.meanRadius}] [equaRadius -> {self.equaRadius}] [semimajorAxis -> {self.semimajorAxis}] [semiminorAxis -> {self.semiminorAxis}] [volValueRawKG -> {self.volumeRawKG}] [massRawKG -> {self.massRawKG}]") if debug else None
-        self.scaleMassExp = self.user_scale_data['sun']['scale_mass'] 
-        self.scaleSizeExp = self.user_scale_data['sun']['scale_size']
-        self.massExponent = self.massExponent - (self.scaleMassExp)
-        self.massRawKG = float( f"{int(self.massValue*(10**self.massExponent)):d}" )
+        # NOTE: scaled values are always derived from the raw values, scaling twice does not compound
+        scaling.apply(self, 'sun', raw, scale_data['sun'])
         # NOTE: to address `OverflowError: Python int too large to convert to C int`, values which tend towards max will have their overage +100 subtracted `ctypes.c_uint(-1).value` 
         #if self.massRawKG >= ctypes.c_uint(-1).value:
         #    amountOver = self.massRawKG - ctypes.c_uint(-1).value
         #    print(f"{self.massRawKG} is larger than {ctypes.c_uint(-1).value}, subtracting {amountOver+100} from value") if debug else None
         #    self.massRawKG = self.massRawKG - (amountOver + 100.00)
-        self.meanRadius = self.meanRadius / (10**(self.scaleSizeExp)) 
-        self.equaRadius = self.equaRadius / (10**(self.scaleSizeExp))
         print(f"INFO: {self.englishName} scaled values  [meanRadius {self.meanRadius}] [equaRadius {self.equaRadius}] [massExponent {self.massExponent}] [massRawKG {self.massRawKG}]") if debug else None
         #print(f"INFO: scaled values meanRadius ({self.meanRadius}) equaRadius ({self.equaRadius}) massExponent ({self.massExponent}) massRawKG ({self.massValue*(10**self.massExponent)})") if debug else None
         return self
@@ -105,23 +139,23 @@ class Sun:
         """
         Returns list containing attributes defined on Moon object
         """
-        return list(self.__dict__.keys())
+        return [k for k in self.__dict__.keys() if not k.startswith('_')]
 
     def inspect(self) -> dict:
         """
         Returns dict containing all attributes, attribute values defined on Planet object 
         """
         #return dict({k:v for k,v in zip(list(self.__dict__.values())[-1], list(self.__dict__.values())[0:-2])})
-        return dict({k:v for k,v in self.__dict__.items()})
+        return dict({k:v for k,v in self.__dict__.items() if not k.startswith('_')})
         #return list(zip(list(self.__dict__.values())[-1], list(self.__dict__.values())[0:-2]))
 
     def tostring(self) -> str:
         """
         Returns JSON str representing all attributes defined on Moon object
         """
-        data = dict({k:v for k,v in self.__dict__.items()})
+        data = dict({k:v for k,v in self.__dict__.items() if not k.startswith('_')})
         return str( 
-            json.dumps(data, separators=(',',':'), indent=2)
+            json.dumps(data, separators=(',',':'), indent=2, default=export.default)
         )
 
     def save(self, path: str = "/tmp"):
@@ -129,7 +163,8 @@ class Sun:
         path: str (filesystem path where object will be saved)
         Serializes a sun object to the filesystem
         """
-        pickle.dump(self, open(f"{path}/_sun_{self.englishName.replace(' ','_')}.pickle", "wb"))
+        with open(f"{path}/_sun_{self.englishName.replace(' ','_')}.pickle", "wb") as f:
+            pickle.dump(self, f)
 
     @classmethod
     def byname(cls, name: str):
@@ -162,21 +197,22 @@ class Sun:
         path: str (filesystem path where the object will be loaded from)
         """
         pkls = glob.glob(f"{path}/_sun_*.pickle")
-        [cls._instances.append(pickle.load(i)) for i in pkls]
+        # NOTE: the registry is the only owner of loaded objects, they are pinned until disposed
+        for i in pkls:
+            with open(i, "rb") as f:
+                cls._instances.append(pickle.load(f), pin=True)
 
     @classmethod 
     def evaluate(cls, attrib: str, evalstr: str) -> list:
         """
         attrib: attribute on Sun class to evaluate 
-        evalstr: string representing `code` to be evaluated, the word `attrib` evaluatess to the attributes name, and the word `val` evaluates to the attributes value. eg: 'val/(10**5)' or 'val >= ctypes.c_uint(-1).value' or 'type(val)'
+        evalstr: string representing `code` to be evaluated, the word `attrib` evaluatess to the attributes name, and the word `val` evaluates to the attributes value. eg: 'val/(10**5)' or 'val >= UINT_MAX' or 'type(val)', see predicate.Predicate for the expression language (arbitrary python code is rejected)
         debug (bool): enables debug messages 
         evaluate/assert conditions for an attribute across defined planet.Planet() objects  
         Returns: list of tuples (object.englishName, object.initialValue, evaluatedData)
         """
-        vals = []
-        for i in cls._instances:
-            val = i.__getattribute__(attrib)
-            vals.append(
-                (i.englishName, val, eval(evalstr))
-            )
-        return vals
+        # NOTE: the expression is compiled once (see predicate.compile), and evaluated over all values at once
+        evaluator = predicate.compile(evalstr)
+        objs = list(cls._instances)
+        vals = [i.__getattribute__(attrib) for i in objs]
+        return list(zip([i.englishName for i in objs], vals, evaluator.evaluate(vals, attrib)))
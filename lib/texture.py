@@ -1,13 +1,22 @@
 import os, sys, json, re
 import shutil
-import requests, urllib
-from PIL import Image, ImageEnhance, ImageOps, ImageFilter
-import imageio 
-import scipy.ndimage
-import scipy.misc
-import numpy as np
+import urllib.parse
 import logging
 import tempfile
+sys.path.extend([os.path.join('../', 'lib')])
+import utilz
+# NOTE: image processing and download dependencies are imported on first use, not when this module is imported
+requests = utilz.lazy_import('requests', 'pip install requests')
+Image = utilz.lazy_import('PIL.Image', 'pip install pillow')
+ImageEnhance = utilz.lazy_import('PIL.ImageEnhance', 'pip install pillow')
+ImageOps = utilz.lazy_import('PIL.ImageOps', 'pip install pillow')
+ImageFilter = utilz.lazy_import('PIL.ImageFilter', 'pip install pillow')
+imageio = utilz.lazy_import('imageio', 'pip install imageio')
+ndimage = utilz.lazy_import('scipy.ndimage', 'pip install scipy')
+np = utilz.lazy_import('numpy')
+
+# the texture file shipped with the repository
+DEFAULT_TEXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'texture.json')
 
 class Tex():
     """
@@ -74,17 +83,19 @@ class Tex():
 
     """
 
-    tempfile.mkdtemp()
-    def __init__(self, default_textures: str ='./data/texture.json', default_path: str = tempfile.mkdtemp()):
+    def __init__(self, default_textures: str = None, default_path: str = None):
         """
         Parameters
         -----------
         default_textures: str
-            Provide absolute or relative path to texture.json file 
+            Provide absolute or relative path to texture.json file (default: data/texture.json of this repository)
         default_path: str 
-            Provide absolute or relative path to default output directory 
+            Provide absolute or relative path to default output directory (default: a new temporary directory)
         """
         print(f"DEBUG: a Tex instance, dont forget to run self.fetchimages(imagetypes=['albedo']) to properly setup your texture directory")
+        # NOTE: resolved here rather than relative to the working directory, importing this module never changes (or depends on) the working directory
+        default_textures = DEFAULT_TEXTURES if default_textures == None else default_textures
+        default_path = tempfile.mkdtemp() if default_path == None else default_path
         #load the default texture json file
         try:
             if not os.path.exists(default_path):
@@ -217,8 +228,8 @@ class Tex():
         img_smooth = img.astype(float)
         kernel_x = np.arange(-3*sigma,3*sigma+1).astype(float)
         kernel_x = np.exp((-(kernel_x**2))/(2*(sigma**2)))
-        img_smooth = scipy.ndimage.convolve(img_smooth, kernel_x[np.newaxis])
-        img_smooth = scipy.ndimage.convolve(img_smooth, kernel_x[np.newaxis].T)
+        img_smooth = ndimage.convolve(img_smooth, kernel_x[np.newaxis])
+        img_smooth = ndimage.convolve(img_smooth, kernel_x[np.newaxis].T)
         return img_smooth 
     
     @classmethod
@@ -241,8 +252,8 @@ class Tex():
         gradient_y = img_smooth.astype(float)
         kernel = np.arange(-1,2).astype(float)
         kernel = - kernel / 2
-        gradient_x = scipy.ndimage.convolve(gradient_x, kernel[np.newaxis])
-        gradient_y = scipy.ndimage.convolve(gradient_y, kernel[np.newaxis].T)
+        gradient_x = ndimage.convolve(gradient_x, kernel[np.newaxis])
+        gradient_y = ndimage.convolve(gradient_y, kernel[np.newaxis].T)
         return gradient_x,gradient_y
 
     @classmethod    
@@ -264,8 +275,8 @@ class Tex():
         gradient_x = img_smooth.astype(float)
         gradient_y = img_smooth.astype(float)
         kernel = np.array([[-1,0,1],[-2,0,2],[-1,0,1]])
-        gradient_x = scipy.ndimage.convolve(gradient_x, kernel)
-        gradient_y = scipy.ndimage.convolve(gradient_y, kernel.T)
+        gradient_x = ndimage.convolve(gradient_x, kernel)
+        gradient_y = ndimage.convolve(gradient_y, kernel.T)
         return gradient_x,gradient_y
 
     @classmethod 
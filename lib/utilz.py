@@ -1,7 +1,7 @@
 # general functions and common patterns 
-import ctypes
-from numpy import arange
+import sys, ctypes, importlib
 from copy import copy, deepcopy
+from types import MethodType
 # flatten nested arrays
 flatten = lambda t: [item for sublist in t for item in sublist]
 
@@ -23,3 +23,73 @@ def merge_attributes(x ,y):
                 xcopy[nkey] = nvalue
     return xcopy
 
+
+
+class hybridmethod:
+    """
+    Decorator for methods which can be called on the class or on an instance, the first argument is the instance when there is one, otherwise the class
+
+        class SolarSystem:
+            @hybridmethod
+            def vals(owner, ...):
+                ...
+        SolarSystem.vals()   # owner is SolarSystem
+        ss.vals()            # owner is ss
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.__doc__ = fn.__doc__
+
+    def __get__(self, obj, objtype=None):
+        return MethodType(self.fn, objtype if obj is None else obj)
+
+
+def lazy_import(name: str, hint: str = None):
+    """
+    Returns a stand-in for a module which is only imported on first attribute access, so importing a module of this package never pays for a heavy dependency it may not use (eg. numpy, requests, PIL)
+
+        np = utilz.lazy_import('numpy')
+        np.mean(values)    # numpy is imported here
+
+    A module which is already imported is returned as is. A missing module raises ImportError on first use, not at import.
+
+    Parameters
+    ----------
+
+    name: str
+        the module to import (eg. 'numpy', 'scipy.ndimage')
+    hint: str
+        appended to the ImportError raised when the module is missing (eg. 'pip install pillow')
+    """
+    return sys.modules[name] if name in sys.modules else LazyModule(name, hint)
+
+
+class LazyModule:
+    """
+    A module imported on first attribute access, see lazy_import
+    """
+
+    def __init__(self, name: str, hint: str = None):
+        self.__dict__['_name'] = name
+        self.__dict__['_hint'] = hint
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self._module is None:
+            try:
+                module = importlib.import_module(self._name)
+            except ImportError as e:
+                hint = f" ({self._hint})" if self._hint else ""
+                raise ImportError(f"the {self._name} module is required here{hint}") from e
+            self.__dict__['_module'] = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        # NOTE: cached on the stand-in, later lookups skip __getattr__
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self):
+        return f"<lazy module {self._name}{' (imported)' if self._module is not None else ''}>"
@@ -3,10 +3,9 @@
 import os, sys, importlib
 
 from copy import copy, deepcopy
-#LIB_HOME=os.path.dirname( os.path.realpath('__file__') )
-LIB_HOME='/Users/photon/DevOps/Projects/Solar_System_Model'
-os.chdir(LIB_HOME)
-sys.path.extend([os.path.join('.', 'lib')])
+# NOTE: the lib directory is found relative to this file, the working directory is never changed
+LIB_HOME=os.path.dirname( os.path.realpath(__file__) )
+sys.path.extend([os.path.join(LIB_HOME, 'lib')])
 import data as data
 import planet as planet
 import moon as moon
@@ -22,6 +21,9 @@ import utilz as utilz
 import blender as blender 
 import dev as dev
 
+# register the blender helper functions used by driver expressions (frame, normalized_frame, ..)
+dev.import_bpy_functions(blender.HELPERS)
+
 # use properties of solar system to configure scene props, like a cool kid
 blender.scene_props(seperate_u=False)
 
@@ -45,6 +47,7 @@ blender.plot_expanse('/Users/photon/Downloads/Spherical/SPACE013SX.hdr')
 blender.plot_sun(ss.sun, debug=True)
 
 #some planets...
+# NOTE: ss keeps its planets (and their moons) alive, Planet.byname only finds planets something else references (see registry.Registry)
 blender.plot_planet(Planet.byname('Mercury'), debug=True)
 blender.add_orbital_drivers(Planet.byname('Mercury'))
 
@@ -0,0 +1,80 @@
+# shared test fixtures: a mocked `data` layer (no network access) and a fresh registry context for every test
+import os, sys, copy, types
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib'))
+# blender modules only exist inside blender
+for _name in ('bpy', 'bpy_types', 'mathutils'):
+    sys.modules.setdefault(_name, types.ModuleType(_name))
+sys.modules['mathutils'].Vector = getattr(sys.modules['mathutils'], 'Vector', object)
+sys.modules['bpy_types'].Object = getattr(sys.modules['bpy_types'], 'Object', object)
+
+import data
+import registry
+
+PLANETS = ['mercury', 'venus', 'earth', 'mars', 'jupiter', 'saturn', 'uranus', 'neptune']
+MOONS = {'mercury': 0, 'venus': 0, 'earth': 1, 'mars': 2, 'jupiter': 6, 'saturn': 5, 'uranus': 3, 'neptune': 2}
+REL = "https://api.le-systeme-solaire.net/rest/bodies/"
+
+
+def body(i: int, name: str, planet: str = None) -> dict:
+    """
+    Returns a deterministic api payload (see data.get_planet_data) for a planet, or for a moon of planet
+    """
+    return {
+        'id': name, 'name': name.title(), 'englishName': name.title(), 'isPlanet': planet == None,
+        'moons': None, 'semimajorAxis': 1e6 * (i + 1) * (10 if planet == None else 1), 'perihelion': 1, 'aphelion': 2,
+        'eccentricity': 0.01 * (i % 9), 'inclination': 1.0, 'mass': {'massValue': 1.0 + i % 7, 'massExponent': 20 + i % 6},
+        'vol': {'volValue': 2.0 + i % 5, 'volExponent': 10 + i % 4}, 'density': 1.0, 'gravity': 1.0, 'escape': 0.0,
+        'meanRadius': 100.0 * (i + 1), 'equaRadius': 0 if i % 4 == 0 else 110.0 * (i + 1), 'polarRadius': 0.0, 'flattening': 0.0,
+        'dimension': '', 'sideralOrbit': 10.0 * (i + 1), 'sideralRotation': 1.0 + i,
+        'aroundPlanet': None if planet == None else {'planet': planet, 'rel': REL + planet},
+        'discoveredBy': '', 'discoveryDate': '', 'alternativeName': '', 'axialTilt': 0, 'avgTemp': 0, 'mainAnomaly': 0,
+        'argPeriapsis': 0, 'longAscNode': 0, 'bodyType': 'Planet' if planet == None else 'Moon', 'rel': REL + name,
+    }
+
+
+def bodies() -> dict:
+    """
+    Returns every mocked payload by id, jupiter has an invalid moon (`badmoon`, no mass) and a moon the api does not know (`broken`)
+    """
+    found = {}
+    for i, name in enumerate(PLANETS):
+        planet = body(i, name)
+        moons = []
+        for j in range(MOONS[name]):
+            moon = f"{name}moon{j}"
+            found[moon] = body(i * 10 + j, moon, planet=name)
+            moons.append({'moon': moon.title(), 'rel': REL + moon})
+        if name == 'jupiter':
+            found['badmoon'] = dict(body(99, 'badmoon', planet=name), mass=None)
+            moons.extend([{'moon': 'Badmoon', 'rel': REL + 'badmoon'}, {'moon': 'Broken', 'rel': REL + 'broken'}])
+        planet['moons'] = moons or None
+        found[name] = planet
+    return found
+
+
+BODIES = bodies()
+SUN = dict(body(0, 'sun'), semimajorAxis=0, mass={'massValue': 1.989, 'massExponent': 30}, vol={'volValue': 1.41, 'volExponent': 18},
+           meanRadius=696342.0, equaRadius=696342.0, isPlanet=False, bodyType='Star')
+
+
+@pytest.fixture(autouse=True)
+def api(monkeypatch):
+    """
+    Replaces the api calls of the data module with the mocked payloads, returns the payloads by id (the sun payload is `sun`)
+    """
+    monkeypatch.setattr(data, 'get_planet_data', lambda name, debug=False: copy.deepcopy(BODIES.get(name)))
+    monkeypatch.setattr(data, 'get_moon_data', lambda rel, debug=False: copy.deepcopy(BODIES.get(rel.rsplit('/', 1)[-1])))
+    monkeypatch.setattr(data, 'get_sun_data', lambda debug=False: copy.deepcopy(SUN))
+    return dict(BODIES, sun=SUN)
+
+
+@pytest.fixture(autouse=True)
+def context():
+    """
+    Runs every test inside its own registry context, disposed afterwards
+    """
+    with registry.Context('test') as ctx:
+        yield ctx
+    ctx.dispose()
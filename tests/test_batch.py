@@ -0,0 +1,51 @@
+# batch builds of scaled solar system variants
+import pytest
+import batch
+import registry
+from solarsystem import SolarSystem
+
+
+def state(obj) -> dict:
+    return dict((k, v) for k, v in obj.__dict__.items() if k not in ('moonData', '_views'))
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, '_catalogs', {})
+    ss = SolarSystem('catalog')
+    path = str(tmp_path / 'catalog.snap')
+    ss.save(path)
+    return ss, path
+
+
+VARIANTS = [{'planet': {'scale_dist': 2}}, None, {'moon': {'scale_size': 1, 'scale_mass': 4}}, {'sun': {'scale_mass': 2}}]
+
+
+@pytest.mark.parametrize('executor, workers', [('thread', 1), ('thread', 3), ('process', 2)])
+def test_build_matches_clones(catalog, executor, workers):
+    ss, path = catalog
+    results, stats = batch.build(path, VARIANTS, executor=executor, workers=workers, report=True)
+    assert stats['systems'] == len(results) == len(VARIANTS)
+    assert stats['executor'] == (executor if workers > 1 else 'serial')
+    for n, (data, variant) in enumerate(zip(results, VARIANTS)):
+        with registry.Context('load'):
+            built, expected = SolarSystem.loads(data), ss.clone(variant)
+        assert built.name == f"catalog-{n}"
+        assert built.user_scale_data == expected.user_scale_data
+        assert [state(i) for i in [built.sun] + built.planets + built.moons] == [state(i) for i in [expected.sun] + expected.planets + expected.moons]
+
+
+def test_build_leaves_no_bodies_behind(catalog):
+    ss, path = catalog
+    results = batch.build(path, 3, names=['a', 'b', 'c'], workers=1)
+    assert [SolarSystem.loads(i, context=registry.Context('load')).name for i in results] == ['a', 'b', 'c']
+    assert len(SolarSystem._instances) == 1 and len(registry.current().get('planet')) == 8
+    assert len(batch.catalog(path).context.get('planet')) == 8
+
+
+def test_build_rejects_bad_arguments(catalog):
+    ss, path = catalog
+    with pytest.raises(ValueError):
+        batch.build(path, 3, names=['a'])
+    with pytest.raises(ValueError):
+        batch.build(path, 3, executor='fiber')
@@ -0,0 +1,83 @@
+# vectorized catalog loading against the Sun and Planet constructors
+import math
+import numpy as np
+import pytest
+import catalog
+import derived
+import registry
+from sun import Sun
+from planet import Planet
+
+CSV = """# exported from a planetary systems table
+hostname,pl_name,pl_orbsmax,pl_orbeccen,pl_orbper,pl_rade,pl_bmasse,pl_orbincl,st_rad,st_mass
+Kepler-1,Kepler-1 b,0.05,0.1,4.2,11.2,300,89.5,1.1,0.9
+Kepler-1,Kepler-1 c,0.5,,,2.1,8,,1.1,0.9
+Kepler-2,Kepler-2 b,1.2,0.3,400,1.0,1.0,90,0.8,0.7
+Kepler-2,Kepler-2 x,,0.3,400,1.0,1.0,90,0.8,0.7
+Kepler-2,Kepler-2 y,1.2,1.5,400,1.0,1.0,90,0.8,0.7
+Kepler-3,Kepler-3 b,1.0,0.0,365,1.0,1.0,90,,1.0
+"""
+
+
+def state(obj) -> dict:
+    return dict((k, v) for k, v in obj.__dict__.items() if k not in ('moonData', '_views', '_raw'))
+
+
+def payload(obj) -> dict:
+    # the payload a body was built from, the keys set after it by the constructor are not part of it
+    keys = obj.keys[:obj.keys.index('semiminorAxis' if 'semiminorAxis' in obj.keys else 'massValue')]
+    return dict((k, obj.__dict__[k]) for k in keys)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / 'catalog.csv'
+    path.write_text(CSV)
+    return str(path)
+
+
+def test_read(path):
+    columns = catalog.read(path)
+    assert list(columns) == CSV.splitlines()[1].split(',')
+    assert columns['hostname'].dtype == object and columns['pl_orbsmax'].dtype == np.float64
+    assert math.isnan(columns['pl_orbeccen'][1]) and columns['pl_rade'].tolist() == [11.2, 2.1, 1.0, 1.0, 1.0, 1.0]
+
+
+def test_catalog_bodies_match_the_constructors(path):
+    systems = catalog.load(path)
+    assert [(i.name, [p.englishName for p in i.planets]) for i in systems] == [('Kepler-1', ['Kepler-1 b', 'Kepler-1 c']), ('Kepler-2', ['Kepler-2 b'])]
+    for ss in systems:
+        sun = Sun(ss.sun.englishName, payload=payload(ss.sun))
+        assert state(ss.sun) == state(sun) and ss.sun._raw == sun._raw
+        for planet in ss.planets:
+            built = Planet(planet.englishName, payload=payload(planet), register=False)
+            assert state(planet) == state(built) and planet._raw == built._raw
+            assert list(planet.moonData) == []
+    earth = systems[1].planets[0]
+    assert earth.semimajorAxis == pytest.approx(1.2 * catalog.AU_KM) and earth.massRawKG == pytest.approx(catalog.EARTH_MASS_KG)
+    assert earth.semiminorAxis == 1.2 * catalog.AU_KM * math.sqrt(1 - 0.3**2)
+
+
+def test_missing_values(path):
+    planet = catalog.load(path)[0].planets[1]
+    assert planet.eccentricity == 0.0 and planet.inclination == 0.0
+    # Kepler's third law around the host star
+    period = 2 * math.pi * math.sqrt((0.5 * catalog.AU_KM * 1e3)**3 / (derived.G * 0.9 * catalog.SUN_MASS_KG)) / derived.SECONDS_PER_DAY
+    assert planet.sideralOrbit == pytest.approx(period, rel=1e-12)
+
+
+def test_rejections(path):
+    systems, rejected = catalog.load(path, report=True)
+    assert [(i['index'], i['id']) for i in rejected] == [(3, 'Kepler-2 x'), (4, 'Kepler-2 y'), (5, 'Kepler-3 b')]
+    assert [[r.field for r in i['reasons']] for i in rejected] == [['semimajorAxis'], ['eccentricity'], ['sun']]
+    assert catalog.load({}) == []
+
+
+def test_mapping_and_columns():
+    columns = {'star': np.array(['A', 'A'], dtype=object), 'a': np.array([1.0, 2.0]), 'r': np.array([1.0, 1.0]), 'm': np.array([1.0, 1.0]), 'st_rad': np.array([1.0, 1.0]), 'st_mass': np.array([1.0, 1.0])}
+    mapping = {'system': ('star', None), 'semimajorAxis': ('a', catalog.AU_KM), 'meanRadius': ('r', catalog.EARTH_RADIUS_KM), 'mass': ('m', catalog.EARTH_MASS_KG)}
+    with registry.Context('catalog') as context:
+        (ss,) = catalog.load(columns, mapping=mapping, context=context)
+    assert ss.context is context and len(context.get('planet')) == 2 and len(Planet._instances) == 0
+    assert [p.englishName for p in ss.planets] == ['planet-0', 'planet-1']
+    assert ss.planets[1].sideralOrbit == pytest.approx(ss.planets[0].sideralOrbit * 2**1.5)
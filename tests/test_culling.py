@@ -0,0 +1,91 @@
+# limit based moon culling against a moon by moon check
+import pytest
+import blender
+import culling
+from planet import Planet
+from moon import Moon
+from solarsystem import SolarSystem
+
+
+def moons() -> list:
+    return [m for p in Planet.make_planets() for m in p.moonData]
+
+
+def reference(objs, bounds: dict) -> list:
+    # the moon by moon reference for culling.cull, on raw values
+    kept = []
+    for moon in objs:
+        ok = True
+        for name, attr in culling.FIELDS.items():
+            low, high = bounds.get(f"min_{name}"), bounds.get(f"max_{name}")
+            ok = ok and (low == None or moon._raw[attr] >= low) and (high == None or moon._raw[attr] <= high)
+        kept.append(moon) if ok else None
+    return kept
+
+
+def test_defaults_keep_real_sized_moons(api, monkeypatch):
+    monkeypatch.setitem(api['jupitermoon1'], 'equaRadius', 5.0)
+    objs = moons()
+    kept, excluded = culling.cull(objs)
+    assert kept == [m for m in objs if m.equaRadius >= Moon._limits['moon']['min_radius']] == reference(objs, culling.limits())
+    assert [i['id'] for i in excluded] == ['Jupitermoon1'] and len(kept) == len(objs) - 1
+    assert [i['index'] for i in excluded] == [n for n, m in enumerate(objs) if m not in kept]
+    assert all(r.code == 'limit' and r.field == 'equaRadius' for i in excluded for r in i['reasons'])
+
+
+def test_limits_use_raw_units():
+    planets = Planet.make_planets()
+    objs = [m for p in planets for m in p.moonData]
+    before = culling.cull(objs, culling.limits({'min_radius': 4000, 'max_mass': 5e23}))[0]
+    for planet in planets:
+        planet.scale_planet({'moon': {'scale_size': 4, 'scale_mass': 8}})
+    assert culling.cull(objs, culling.limits({'min_radius': 4000, 'max_mass': 5e23}))[0] == before
+
+
+@pytest.mark.parametrize('overrides', [
+    {'min_radius': None},
+    {'min_radius': 4000},
+    {'max_radius': 4600, 'min_distance': 4.2e7},
+    {'min_radius': None, 'min_mass': 1e22, 'max_volume': 5e12},
+])
+def test_limit_overrides_match_the_reference(overrides):
+    objs = moons()
+    bounds = culling.limits(overrides)
+    kept, excluded = culling.cull(objs, bounds)
+    assert kept == reference(objs, bounds)
+    assert len(kept) + len(excluded) == len(objs)
+
+
+def test_unknown_limits():
+    with pytest.raises(ValueError):
+        culling.limits({'min_brightness': 1})
+    assert culling.limits() == Moon._limits['moon'] and culling.limits() is not Moon._limits['moon']
+
+
+@pytest.mark.parametrize('min_pixels, pixel_scale', [(2, 0.001), (10, 0.001), (10, 1e-6), (0, 0.001)])
+def test_min_pixels_matches_a_moon_by_moon_check(min_pixels, pixel_scale):
+    objs = moons()
+    kept, excluded = culling.cull(objs, {}, min_pixels=min_pixels, pixel_scale=pixel_scale)
+    assert kept == [m for m in objs if not (min_pixels and 2 * m.equaRadius * pixel_scale < min_pixels)]
+    assert all(r.code == 'limit' for i in excluded for r in i['reasons'])
+    assert culling.screen_sizes(objs, pixel_scale).tolist() == [2.0 * m.equaRadius * pixel_scale for m in objs]
+
+
+def test_min_pixels_needs_a_pixel_scale():
+    objs = moons()
+    assert culling.cull(objs, {}, min_pixels=10)[0] == objs
+    assert culling.cull([], min_pixels=10, pixel_scale=1.0) == ([], [])
+
+
+def test_plot_system_culls_only_on_request(monkeypatch):
+    plotted = {}
+    for name in ('plot_sun', 'plot_planet', 'add_orbital_drivers'):
+        monkeypatch.setattr(blender, name, lambda *args, **kwargs: None)
+    monkeypatch.setattr(blender, 'plot_natural_satellites', lambda planet, moons=None, **kwargs: plotted.__setitem__(planet.englishName, moons))
+    ss = SolarSystem()
+    tree, excluded = blender.plot_system(ss, report=True)
+    assert excluded == {} and plotted == dict((p.englishName, list(p.moonData)) for p in ss.planets if p.moonData)
+    plotted.clear()
+    tree, excluded = blender.plot_system(ss, limits={'min_radius': 4000}, report=True)
+    kept = culling.cull(ss.moons, culling.limits({'min_radius': 4000}))[0]
+    assert [m for moons in plotted.values() for m in moons] == kept and sum(len(i) for i in excluded.values()) == len(ss.moons) - len(kept)
@@ -0,0 +1,112 @@
+# derived quantities against their scalar formulas
+import gc, math
+import numpy as np
+import pytest
+import catalog
+import derived
+from planet import Planet
+from moon import Moon
+from solarsystem import SolarSystem
+
+
+def reference(obj, parent: float) -> dict:
+    # the scalar formula of every quantity for one body
+    mass, radius, axis, eccentricity = obj._raw['massRawKG'], obj._raw['meanRadius'] * 1e3, obj._raw['semimajorAxis'], obj._raw['eccentricity']
+    return {
+        'density': mass / (4.0 / 3.0 * math.pi * radius**3),
+        'surfaceGravity': derived.G * mass / radius**2,
+        'escapeVelocity': math.sqrt(2.0 * derived.G * mass / radius),
+        'orbitalPeriod': 2.0 * math.pi * math.sqrt((axis * 1e3)**3 / (derived.G * parent)) / derived.SECONDS_PER_DAY,
+        'hillRadius': axis * (1.0 - eccentricity) * (mass / (3.0 * parent))**(1.0 / 3.0),
+    }
+
+
+def test_vectorized_quantities_match_scalar_formulas():
+    ss = SolarSystem()
+    ss.scale_solar_system()
+    parents = dict((id(m), p) for p in ss.planets for m in p.moonData)
+    for cls, objs in ((Planet, ss.planets), (Moon, ss.moons)):
+        for name in ('density', 'surfaceGravity', 'escapeVelocity', 'orbitalPeriod', 'hillRadius'):
+            derive = dict(cls.derive(name))
+            for obj in objs:
+                parent = ss.sun._raw['massRawKG'] if cls == Planet else parents[id(obj)]._raw['massRawKG']
+                expected = reference(obj, parent)[name]
+                assert derive[obj.englishName] == pytest.approx(expected, rel=1e-12), (obj.englishName, name)
+                assert obj.quantity(name) == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.mark.parametrize('name', ['massRawKG', 'volumeRawKG', 'semiminorAxis', 'distanceFromSunInAU', 'harmonicFrequency'])
+def test_constructor_fields_match_their_quantities(name):
+    ss = SolarSystem()
+    ss.scale_solar_system()
+    for cls, objs in ((Planet, ss.planets), (Moon, ss.moons)):
+        # NOTE: moons have no orbit values around the sun
+        objs = [i for i in objs if name in i._raw]
+        fields = [i._raw[name] for i in objs]
+        assert [a == b or (math.isnan(a) and math.isnan(b)) for a, b in zip(derived.compute(objs, name).tolist(), fields)] == [True] * len(objs), (cls, name)
+        assert dict((k, v) for k, v in cls.derive(name) if k in set(i.englishName for i in objs)) == pytest.approx(dict((i.englishName, f) for i, f in zip(objs, fields)), nan_ok=True)
+    assert derived.value(ss.sun, 'massRawKG') == ss.sun._raw['massRawKG']
+
+
+def test_parent_mass_follows_the_hierarchy():
+    ss = SolarSystem()
+    for planet in ss.planets:
+        assert planet.quantity('parentMass') == ss.sun._raw['massRawKG']
+        for moon in planet.moonData:
+            assert moon.quantity('parentMass') == planet._raw['massRawKG']
+    assert math.isnan(derived.value(ss.sun, 'parentMass'))
+
+
+def test_parent_mass_of_several_systems():
+    columns = {
+        'hostname': np.array(['Big', 'Small'], dtype=object), 'pl_name': np.array(['Big b', 'Small b'], dtype=object),
+        'pl_orbsmax': np.array([1.0, 1.0]), 'pl_rade': np.array([1.0, 1.0]), 'pl_bmasse': np.array([1.0, 1.0]),
+        'st_rad': np.array([1.0, 1.0]), 'st_mass': np.array([4.0, 0.25]),
+    }
+    systems = catalog.load(columns)
+    planets = [s.planets[0] for s in systems]
+    assert [p.quantity('parentMass') for p in planets] == [s.sun._raw['massRawKG'] for s in systems]
+    periods = derived.compute(planets, 'orbitalPeriod')
+    assert periods[1] == pytest.approx(4 * periods[0])
+    assert periods[0] == pytest.approx(365.25 / 2, rel=1e-2)
+
+
+def test_planets_outside_of_a_system():
+    planet = Planet('earth')
+    assert planet.quantity('parentMass') == derived.SUN_MASS_KG
+
+
+def test_columns_are_cached_until_the_registry_changes():
+    planets = Planet.make_planets()
+    objs, values = derived.column(Planet._instances, 'surfaceGravity')
+    assert derived.column(Planet._instances, 'surfaceGravity')[1] is values
+    Planet.scale_planets(do_moons=False)
+    rescaled = derived.column(Planet._instances, 'surfaceGravity')[1]
+    assert rescaled is not values and rescaled.tolist() == values.tolist()
+
+
+def test_missing_inputs_are_nan():
+    planets = Planet.make_planets()
+    assert np.isnan(derived.compute([planets[0]], 'hillRadius')).tolist() == [False]
+    assert math.isnan(derived.compute([object()], 'density')[0])
+
+
+def test_circular_and_unknown_quantities(monkeypatch):
+    monkeypatch.setattr(derived, 'QUANTITIES', dict(derived.QUANTITIES))
+    derived.define('a', ('b',))(lambda b: b)
+    derived.define('b', ('a',))(lambda a: a)
+    with pytest.raises(ValueError):
+        derived.compute(Planet.make_planets(), 'a')
+    with pytest.raises(KeyError):
+        derived.compute([], 'luminosity')
+
+
+def test_cached_columns_do_not_keep_bodies_alive():
+    planets = Planet.make_planets(prefetch=True)
+    Planet.derive('density')
+    Moon.derive('surfaceGravity')
+    assert planets[2].quantity('density') == dict(Planet.derive('density'))[planets[2].englishName]
+    del planets
+    gc.collect()
+    assert len(Planet._instances) == len(Moon._instances) == 0
+    assert Planet.derive('density') == []
@@ -0,0 +1,56 @@
+# streaming NDJSON export
+import io, json
+import numpy as np
+import pytest
+import export
+from planet import Planet
+from solarsystem import SolarSystem
+
+BACKENDS = ['json'] + (['orjson'] if export.orjson != None else [])
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_export_rows(backend):
+    ss = SolarSystem()
+    ss.scale_solar_system()
+    out = io.BytesIO()
+    count = ss.export(out, backend=backend)
+    rows = [json.loads(i) for i in out.getvalue().splitlines()]
+    assert count == len(rows) == 1 + len(ss.planets) + len(ss.moons)
+    assert [i['englishName'] for i in rows] == [i.englishName for i in [ss.sun] + ss.planets + ss.moons]
+    assert [i['type'] for i in rows[:2]] == ['sun', 'planet']
+    earth = rows[3]
+    assert earth['semimajorAxis'] == Planet.byname('Earth').semimajorAxis
+    assert 'moonData' not in earth and earth['moons'] == Planet.byname('Earth').moons
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_export_converts_values(backend):
+    earth = Planet('earth')
+    earth.__dict__.update(single=np.float32(1.5), missing=float('nan'), tags={'b', 'a'}, array=np.arange(3))
+    row = json.loads(next(export.lines([earth], backend=backend)))
+    assert row['single'] == 1.5 and row['missing'] == None and row['tags'] == ['a', 'b'] and row['array'] == [0, 1, 2]
+
+
+def test_backends_agree():
+    if len(BACKENDS) < 2:
+        pytest.skip("orjson is not installed")
+    ss = SolarSystem()
+    objs = [ss.sun] + ss.planets + ss.moons
+    assert [json.loads(i) for i in export.lines(objs, 'json')] == [json.loads(i) for i in export.lines(objs, 'orjson')]
+
+
+def test_chunked_and_text_output(tmp_path):
+    planets = Planet.make_planets()
+    expected = b"".join(export.lines(planets, backend='json'))
+    text = io.StringIO()
+    assert export.write(planets, text, backend='json', chunk=3) == len(planets)
+    assert text.getvalue().encode() == expected
+    path = tmp_path / 'planets.ndjson'
+    assert Planet.export(str(path), backend='json') == len(planets)
+    assert path.read_bytes() == expected
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        export.encoder('yaml')
@@ -0,0 +1,62 @@
+# body fingerprints, Merkle system hashes and diffs
+import pickle
+import fingerprint
+import registry
+from solarsystem import SolarSystem
+
+
+def flat(ss: SolarSystem) -> dict:
+    # fingerprint of every body of a system, by key
+    return dict((fingerprint.key(i), fingerprint.body(i)) for i in [ss.sun] + ss.planets + [m for p in ss.planets for m in p.moonData])
+
+
+def scan(a: SolarSystem, b: SolarSystem) -> dict:
+    # the body by body reference for SolarSystem.diff
+    a, b = flat(a), flat(b)
+    return {
+        'added': sorted(k for k in b if k not in a),
+        'removed': sorted(k for k in a if k not in b),
+        'changed': sorted(k for k in a if k in b and a[k] != b[k])
+    }
+
+
+def same(a: dict, b: dict):
+    assert dict((k, sorted(v)) for k, v in a.items()) == b
+
+
+def test_equal_systems():
+    a, b = SolarSystem(), SolarSystem()
+    assert a.fingerprint() == b.fingerprint()
+    assert a.diff(b) == {'added': [], 'removed': [], 'changed': []}
+
+
+def test_diff_matches_a_body_by_body_scan(api, monkeypatch):
+    a = SolarSystem()
+    b = SolarSystem()
+    b.scale_solar_system({'moon': {'scale_dist': 2}})
+    same(a.diff(b), scan(a, b))
+    assert len(a.diff(b)['changed']) == len(flat(a))
+    c = SolarSystem()
+    c.planets[2].scale_planet()
+    c.planets = c.planets[:6]
+    same(a.diff(c), scan(a, c))
+    assert a.diff(c)['changed'] == ['planet:Earth']
+    monkeypatch.setitem(api['saturnmoon1'], 'eccentricity', 0.5)
+    with registry.Context('changed'):
+        d = SolarSystem()
+    same(a.diff(d), scan(a, d))
+    assert d.diff(a)['changed'] == ['moon:Saturnmoon1']
+
+
+def test_fingerprints_are_stable(tmp_path):
+    ss = SolarSystem()
+    ss.scale_solar_system()
+    earth = ss.planets[2]
+    assert fingerprint.body(pickle.loads(pickle.dumps(earth))) == earth.fingerprint()
+    path = str(tmp_path / 'system.snap')
+    ss.save(path)
+    with registry.Context('load'):
+        assert SolarSystem.load(path).fingerprint() == ss.fingerprint()
+    before = earth.fingerprint()
+    earth.scale_planet({'planet': {'scale_dist': 1}})
+    assert earth.fingerprint() != before
@@ -0,0 +1,50 @@
+# the CSR hierarchy against Planet.moonData
+import pytest
+import hierarchy
+from moon import Moon
+from solarsystem import SolarSystem
+
+
+def test_hierarchy_matches_moondata():
+    ss = SolarSystem()
+    tree = ss.hierarchy()
+    assert len(tree) == 1 + len(ss.planets) + len(ss.moons)
+    assert tree.children(ss.sun) == ss.planets and tree.parent(ss.sun) == None
+    for planet in ss.planets:
+        assert tree.parent(planet) is ss.sun
+        assert tree.children(planet) == list(planet.moonData)
+        for moon in planet.moonData:
+            assert tree.parent(moon) is planet and tree.ancestors(moon) == [planet, ss.sun]
+            assert tree.children(moon) == []
+    assert tree.level(0) == [ss.sun] and tree.level(1) == ss.planets and tree.level(2) == ss.moons
+
+
+def test_traversals():
+    ss = SolarSystem()
+    tree = ss.hierarchy()
+    nested = [ss.sun] + [b for p in ss.planets for b in [p] + list(p.moonData)]
+    assert list(tree.subtree()) == nested
+    assert list(tree.subtree(ss.planets[4])) == [ss.planets[4]] + list(ss.planets[4].moonData)
+    assert [(b, d) for b, d in tree.traverse()] == [(ss.sun, 0)] + [(p, 1) for p in ss.planets] + [(m, 2) for m in ss.moons]
+
+
+def test_hierarchy_is_rebuilt_when_bodies_change():
+    ss = SolarSystem()
+    tree = ss.hierarchy()
+    assert ss.hierarchy() is tree
+    ss.scale_solar_system()
+    assert ss.hierarchy() is tree
+    moon = Moon('x/jupitermoon5')
+    ss.planets[4].moonData.append(moon)
+    ss.registries['objects'].append(moon)
+    assert moon in ss.hierarchy() and ss.hierarchy().parent(moon) is ss.planets[4]
+
+
+def test_invalid_hierarchies():
+    ss = SolarSystem()
+    with pytest.raises(KeyError):
+        ss.hierarchy().parent(object())
+    with pytest.raises(ValueError):
+        hierarchy.Hierarchy([ss.sun, ss.planets[0]], [1, -1])
+    rooted = hierarchy.build(None, ss.planets[:2])
+    assert list(rooted.subtree()) == [ss.planets[0]] + list(ss.planets[0].moonData) + [ss.planets[1]]
@@ -0,0 +1,13 @@
+# importing a module of this package has no side effects and loads no heavy dependency
+import os, sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+import bench_import
+
+
+@pytest.mark.parametrize('module', bench_import.MODULES)
+def test_imports_are_side_effect_free(module):
+    result = bench_import.probe(module)
+    assert 'error' not in result, result.get('error')
+    assert result['heavy'] == [] and not result['chdir'] and result['printed'] == ''
@@ -0,0 +1,70 @@
+# sorted attribute indexes against linear scans of the registry
+import gc, random
+import pytest
+import index
+from planet import Planet
+from moon import Moon
+
+
+def scan(objs, attrib, low=None, high=None, inclusive=True):
+    # the linear scan reference, ascending and stable (ties keep registration order)
+    inside = lambda v: (low == None or (v >= low if inclusive else v > low)) and (high == None or (v <= high if inclusive else v < high))
+    return sorted([i for i in objs if inside(getattr(i, attrib))], key=lambda i: getattr(i, attrib))
+
+
+@pytest.mark.parametrize('attrib', ['equaRadius', 'meanRadius', 'semimajorAxis', 'massRawKG'])
+def test_range_matches_scan(attrib):
+    planets = Planet.make_planets(prefetch=True)
+    moons = list(Moon._instances)
+    values = [getattr(m, attrib) for m in moons]
+    bounds = values + [min(values) - 1, max(values) + 1, (min(values) + max(values)) / 2]
+    rng = random.Random(3)
+    for i in range(50):
+        low, high = sorted(rng.choice(bounds) for _ in range(2))
+        low, high = (None if rng.random() < 0.2 else low), (None if rng.random() < 0.2 else high)
+        inclusive = rng.random() < 0.5
+        assert Moon.range(attrib, low, high, inclusive=inclusive) == scan(moons, attrib, low, high, inclusive)
+
+
+def test_top_bottom_and_rank_match_scan():
+    planets = Planet.make_planets(prefetch=True)
+    moons = scan(Moon._instances, 'equaRadius')
+    for k in (0, 1, 5, len(moons) + 3):
+        assert Moon.bottom('equaRadius', k) == moons[:k]
+        assert [m.equaRadius for m in Moon.top('equaRadius', k)] == sorted([m.equaRadius for m in moons], reverse=True)[:k]
+    for moon in moons:
+        assert Moon.rank('equaRadius', moon) == len([m for m in moons if m.equaRadius < moon.equaRadius])
+    assert Moon.rank('equaRadius', 1e12) == len(moons)
+
+
+def test_index_is_rebuilt_when_the_registry_changes():
+    planets = Planet.make_planets()
+    first = index.of(Planet._instances, 'semimajorAxis')
+    assert index.of(Planet._instances, 'semimajorAxis') is first
+    Planet.scale_planets(do_moons=False)
+    assert Planet.top('semimajorAxis', 1)[0].semimajorAxis == max(p.semimajorAxis for p in planets)
+    assert index.of(Planet._instances, 'semimajorAxis') is not first
+    Planet._instances.remove(planets[-1])
+    assert planets[-1] not in Planet.range('semimajorAxis')
+    with pytest.raises(ValueError):
+        Planet.rank('semimajorAxis', planets[-1])
+
+
+def test_nan_and_none_are_not_indexed():
+    planets = Planet.make_planets()
+    planets[0].__dict__['avgTemp'] = None
+    planets[1].__dict__['avgTemp'] = float('nan')
+    found = index.SortedIndex('avgTemp', planets)
+    assert len(found) == 6 and found.objects == planets[2:]
+
+
+def test_indexes_do_not_keep_bodies_alive():
+    planets = Planet.make_planets(prefetch=True)
+    assert Planet.top('meanRadius', 3) == sorted(planets, key=lambda i: i.meanRadius)[::-1][:3]
+    kept = index.of(Planet._instances, 'meanRadius')
+    Moon.bottom('meanRadius', 2)
+    assert len(Moon._instances) > 0
+    del planets
+    gc.collect()
+    assert len(Planet._instances) == len(Moon._instances) == 0
+    assert kept.objects == [None] * len(kept) and index.of(Planet._instances, 'meanRadius').objects == []
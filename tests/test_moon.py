@@ -0,0 +1,53 @@
+# lazily resolved moons (Planet.moonData)
+import pickle
+import data
+import registry
+from planet import Planet
+from moon import Moon
+
+
+def counted(monkeypatch) -> list:
+    # records every moon payload fetched from the (mocked) data layer
+    fetched, fetch = [], data.get_moon_data
+    monkeypatch.setattr(data, 'get_moon_data', lambda rel, debug=False: fetched.append(rel) or fetch(rel))
+    return fetched
+
+
+def test_moons_are_resolved_on_first_access(monkeypatch):
+    fetched = counted(monkeypatch)
+    planets = Planet.make_planets()
+    assert fetched == [] and len(Moon._instances) == 0
+    jupiter = Planet.byname('Jupiter')
+    assert jupiter.moonData.pending == 8
+    assert jupiter.moonData[1].englishName == 'Jupitermoon1'
+    assert len(fetched) == 2 and jupiter.moonData.pending == 6
+    assert bool(Planet.byname('Mercury').moonData) == False
+
+
+def test_iteration_matches_prefetch():
+    planets = Planet.make_planets()
+    lazy = Planet.byname('Jupiter').moonData
+    names = [m.englishName for m in lazy]
+    with registry.Context('prefetch'):
+        eager = Planet('jupiter', prefetch=True).moonData
+        assert eager.resolved
+    assert names == [m.englishName for m in eager] == [f"Jupitermoon{i}" for i in range(6)]
+    assert [(i['rel'], [r.field for r in i['reasons']]) for i in lazy.rejected] == [(i['rel'], [r.field for r in i['reasons']]) for i in eager.rejected]
+    assert [i['rel'].rsplit('/', 1)[-1] for i in eager.rejected] == ['badmoon', 'broken']
+    assert [m._raw for m in lazy] == [m._raw for m in eager]
+
+
+def test_moons_register_in_the_planets_context(context):
+    jupiter = Planet('jupiter')
+    with registry.Context('other') as other:
+        moons = list(jupiter.moonData)
+    assert list(Moon._instances) == moons
+    assert len(other.get('moon')) == 0
+
+
+def test_moondata_pickles():
+    earth = Planet('earth')
+    earth.moonData[0]
+    copy = pickle.loads(pickle.dumps(earth))
+    assert [m.englishName for m in copy.moonData] == ['Earthmoon0']
+    assert copy.moonData.resolved
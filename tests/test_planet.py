@@ -0,0 +1,42 @@
+# building planets, sequentially and in parallel
+import gc
+import pytest
+import registry
+from planet import Planet
+from moon import Moon
+
+
+def names() -> tuple:
+    return [p.englishName for p in Planet._instances], [m.englishName for m in Moon._instances]
+
+
+def test_parallel_build_matches_sequential():
+    planets = Planet.make_planets(prefetch=True)
+    expected = names()
+    with registry.Context('parallel'):
+        built, timings = Planet.make_planets(prefetch=True, parallel=True, workers=3, report=True)
+        assert names() == expected
+        assert [p._raw for p in built] == [p._raw for p in planets]
+    assert [p.englishName.lower() for p in built] == Planet._planets
+    assert set(timings) == set(expected[0]) | {'total'}
+
+
+def test_parallel_lazy_moons_register_in_the_callers_context(context):
+    planets = Planet.make_planets(parallel=True)
+    assert len(Moon._instances) == 0
+    moons = list(planets[4].moonData)
+    assert list(Moon._instances) == moons and len(moons) == 6
+
+
+def test_invalid_executor():
+    with pytest.raises(ValueError):
+        Planet.make_planets(parallel=True, executor='fiber')
+
+
+def test_byname_finds_the_planets_make_planets_returned():
+    planets = Planet.make_planets()
+    assert Planet.byname('Earth') is planets[2]
+    del planets
+    gc.collect()
+    # NOTE: the registry is weak, planets nothing references are gone
+    assert Planet.byname('Earth') == None and len(Planet._instances) == 0
@@ -0,0 +1,132 @@
+# compiled predicates: vectorized evaluation against the python closure, and rejected expressions
+import math, time
+import pytest
+import predicate
+from planet import Planet
+from solarsystem import SolarSystem
+
+EXPRESSIONS = [
+    'val >= 10e8', 'val/(10**5)', 'val > 2 and val < 10', 'val < 2 or val > 10', 'not val > 2', 'val in (1, 3)',
+    '1 < val <= 5', 'abs(-val) > 2', 'round(val)', 'round(val, 0)', 'round(val, 1)', 'int(val)', 'float(val)',
+    'val >= UINT_MAX', 'attrib == "x"', 'val**2', 'val * 3 - 1', 'val % 2 == 1', 'val // 2', 'max(val, 3)',
+    'min(val, 2.5)', 'val * val * val', 'val + 2**62', '-val', 'len(str(val)) > 3', 'type(val) == type(1.0)',
+    'val > 2**53', 'val == 2**53 + 1', 'val == 100000000000000000001', 'str(val)', 'val * 1.0 == val',
+]
+
+COLUMNS = [
+    [1.0, 5.0, 1e9, 3.0],
+    [0.5, 1.5, 2.5, -2.5, -0.5],
+    [1, 3, 5, 10**12],
+    [3, 2**61, -(2**61), 7],
+    [2**40, 2**31, -(2**35)],
+    [1.0, 2, 3.5],
+    [2**53 + 1, 1.5, 7],
+    [10**20, 3],
+    [float(2**53), 1e20],
+]
+
+
+def same(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return type(a) == type(b) and a == b
+
+
+def reference(expr, values):
+    # the closure over the original values
+    compiled = predicate.compile(expr)
+    try:
+        return [compiled(v, 'x') for v in values], None
+    except Exception as e:
+        return None, type(e)
+
+
+@pytest.mark.parametrize('values', COLUMNS)
+@pytest.mark.parametrize('expr', EXPRESSIONS)
+def test_evaluate_matches_closure(expr, values):
+    expected, error = reference(expr, values)
+    if error:
+        with pytest.raises(error):
+            predicate.compile(expr).evaluate(values, 'x')
+        return
+    result = predicate.compile(expr).evaluate(values, 'x')
+    assert all(same(a, b) for a, b in zip(result, expected)), (result, expected)
+    assert len(result) == len(expected)
+
+
+@pytest.mark.parametrize('values', COLUMNS)
+@pytest.mark.parametrize('expr', EXPRESSIONS)
+def test_mask_matches_closure(expr, values):
+    expected, error = reference(expr, values)
+    if error:
+        with pytest.raises(error):
+            predicate.compile(expr).mask(values, 'x')
+        return
+    assert predicate.compile(expr).mask(values, 'x').tolist() == [bool(i) for i in expected]
+
+
+def test_no_int64_overflow():
+    values = [2**40, 3, -(2**40)]
+    assert predicate.compile('val * val').evaluate(values) == [v * v for v in values]
+    assert predicate.compile('val ** 3').evaluate(values) == [v ** 3 for v in values]
+    assert predicate.compile('val * val > 2**62').mask(values).tolist() == [True, False, True]
+
+
+def test_round_and_int_types():
+    assert [type(i) for i in predicate.compile('round(val)').evaluate([0.5, 1.5, 2.7])] == [int, int, int]
+    assert predicate.compile('round(val)').evaluate([0.5, 1.5, 2.5]) == [0, 2, 2]
+    assert [type(i) for i in predicate.compile('round(val, 0)').evaluate([0.5, 1.5])] == [float, float]
+    assert predicate.compile('int(val)').evaluate([-1.7, 2.9, 1e20]) == [-1, 2, 10**20]
+    assert predicate.compile('round(val, 1)').evaluate([2.675, 0.15]) == [round(2.675, 1), round(0.15, 1)]
+
+
+def test_mixed_columns_keep_their_values():
+    values = [1, 2.5, 10**20, 2**53 + 1]
+    assert predicate.column(values).tolist() == values and [type(i) for i in predicate.column(values).tolist()] == [int, float, int, int]
+    assert predicate.compile('type(val) == type(1)').mask(values).tolist() == [True, False, True, True]
+    assert predicate.compile('str(val)').evaluate(values) == ['1', '2.5', str(10**20), str(2**53 + 1)]
+    assert predicate.compile('val == 100000000000000000001').mask(values).tolist() == [False] * 4
+    assert predicate.compile('val > 2**53').mask(values).tolist() == [False, False, True, True]
+    assert predicate.compile('val > 2**53').mask([2**53 + 1, 2**53]).tolist() == [True, False]
+    assert predicate.compile('val == 2**53 + 1').mask([float(2**53), 1.0]).tolist() == [False, False]
+
+
+def test_large_results_are_rejected_before_they_are_computed():
+    start = time.perf_counter()
+    for expr in ('((val**4096)**4096)**4096 > 0', 'val**65536', '(val**2000) * (val**2000) * (val**2000) * (val**2000) > 0', '"x" * 10**10', '(1, 2) * val'):
+        with pytest.raises(predicate.PredicateError):
+            predicate.compile(expr).evaluate([2, 3, 10**6])
+    assert time.perf_counter() - start < 1.0
+    assert predicate.compile('val**4096 > 0').evaluate([2]) == [True]
+    assert predicate.compile('val * 2**60').evaluate([3]) == [3 * 2**60]
+
+
+def test_strings():
+    names = ['Earth', 'Mars', 'Moon']
+    assert predicate.compile('val == "Earth" or val == "Mars"').mask(names).tolist() == [True, True, False]
+    assert predicate.compile('val in ("Moon", "Mars")').mask(names).tolist() == [False, True, True]
+    assert predicate.compile('len(val)').evaluate(names) == [5, 4, 4]
+
+
+@pytest.mark.parametrize('expr', [
+    '__import__("os")', 'val.__class__', 'ctypes.c_uint(-1).value', '[x for x in val]', 'lambda: 1',
+    '10**10**10', 'open("x")', 'val[0]', 'exec("1")', 'val if val else 1', 'val +',
+])
+def test_unsafe_expressions_are_rejected(expr):
+    with pytest.raises(predicate.PredicateError):
+        predicate.compile(expr)(1)
+
+
+def test_compile_is_cached():
+    assert predicate.compile('val > 1') is predicate.compile('val > 1')
+
+
+def test_evaluate_and_byvalue():
+    ss = SolarSystem()
+    radii = dict((p.englishName, p.meanRadius) for p in Planet._instances)
+    assert Planet.evaluate('meanRadius', 'val > 300') == [(n, r, r > 300) for n, r in radii.items()]
+    found = SolarSystem.byvalue('planets', 'meanRadius', 'val > 300 and val < 600')
+    assert [p.englishName for p in found] == [n for n, r in radii.items() if 300 < r < 600]
+    assert [m.englishName for m in ss.byvalue('moons', 'englishName', 'val == "Earthmoon0"')] == ['Earthmoon0']
+    with pytest.raises(predicate.PredicateError):
+        SolarSystem.byvalue(eval_string='__import__("os").system("echo hi")')
@@ -0,0 +1,66 @@
+# select / where / groupby / aggregate queries against a python group-by
+import math, statistics
+import pytest
+import query
+from planet import Planet
+from solarsystem import SolarSystem
+
+REFERENCE = {
+    'count': len,
+    'sum': math.fsum,
+    'mean': statistics.fmean,
+    'min': min,
+    'max': max,
+    'var': lambda v: statistics.variance(v) if len(v) > 1 else math.nan,
+    'std': lambda v: statistics.stdev(v) if len(v) > 1 else math.nan,
+}
+
+
+def groupby(objs, keys) -> dict:
+    # the python reference: bodies of each group, in first seen order
+    groups = {}
+    for obj in objs:
+        key = tuple(query.group_key(obj, k) for k in keys)
+        groups.setdefault(key[0] if len(keys) == 1 else key, []).append(obj)
+    return groups
+
+
+def close(a, b):
+    assert (math.isnan(a) and math.isnan(b)) or a == pytest.approx(b, rel=1e-12, abs=1e-9)
+
+
+@pytest.mark.parametrize('keys', [('aroundPlanet',), ('type',), ('type', 'aroundPlanet'), ('eccentricity',)])
+@pytest.mark.parametrize('fn', query.AGGREGATES)
+def test_aggregate_matches_python_groupby(keys, fn):
+    ss = SolarSystem()
+    ss.scale_solar_system()
+    objs = [ss.sun] + ss.planets + ss.moons
+    result = SolarSystem.query('objects').groupby(*keys).aggregate(value=('meanRadius', fn))
+    expected = groupby(objs, keys)
+    assert list(result) == list(expected)
+    for key, members in expected.items():
+        close(result[key]['value'], REFERENCE[fn]([i.meanRadius for i in members]))
+
+
+def test_where_matches_a_filter():
+    ss = SolarSystem()
+    found = ss.query('moons').where('meanRadius', 'val > 2000').where('eccentricity', 'val < 0.05')
+    assert found.objects == [m for m in ss.moons if m.meanRadius > 2000 and m.eccentricity < 0.05]
+    assert found.select('meanRadius')['englishName'].tolist() == [m.englishName for m in found.objects]
+
+
+def test_non_numeric_and_missing_values_are_skipped():
+    planets = Planet.make_planets()
+    planets[0].__dict__['avgTemp'] = None
+    planets[1].__dict__['avgTemp'] = float('nan')
+    planets[2].__dict__['avgTemp'] = 'hot'
+    planets[3].__dict__['avgTemp'] = True
+    result = query.Query(planets).aggregate(n='count', avgTemp='mean', values=('avgTemp', 'count'))
+    assert result == {'n': 8, 'avgTemp': 0.0, 'values': 4}
+
+
+def test_groups_and_unknown_aggregates():
+    ss = SolarSystem()
+    assert ss.query('moons').groupby('aroundPlanet').groups() == groupby(ss.moons, ('aroundPlanet',))
+    with pytest.raises(ValueError):
+        ss.query('moons').aggregate(meanRadius='median')
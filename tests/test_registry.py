@@ -0,0 +1,106 @@
+# weak, context-scoped registries and the lifetime of registered bodies
+import gc
+import registry
+from planet import Planet
+from moon import Moon
+from sun import Sun
+from solarsystem import SolarSystem
+
+
+class Body:
+    pass
+
+
+class Observer:
+    def __init__(self):
+        self.events = []
+
+    def added(self, key, obj):
+        self.events.append(('added', key))
+
+    def removed(self, key):
+        self.events.append(('removed', key))
+
+    def changed(self, key, obj):
+        self.events.append(('changed', key))
+
+    def cleared(self):
+        self.events.append(('cleared', None))
+
+
+def test_registry_does_not_keep_objects_alive():
+    objs = registry.Registry('test')
+    body = Body()
+    objs.append(body)
+    objs.append(body)
+    assert len(objs) == 1 and body in objs
+    generation = objs.generation
+    del body
+    gc.collect()
+    assert len(objs) == 0
+    assert objs.generation > generation
+
+
+def test_pinned_objects_live_until_removed():
+    objs = registry.Registry('test')
+    objs.append(Body(), pin=True)
+    gc.collect()
+    assert len(objs) == 1
+    objs.remove(objs[0])
+    gc.collect()
+    assert len(objs) == 0
+
+
+def test_observers_are_notified():
+    objs, observer, body = registry.Registry('test'), Observer(), Body()
+    objs.observe(observer)
+    objs.append(body)
+    objs.touch(body, Body())
+    objs.remove(body)
+    objs.clear()
+    assert observer.events == [('added', id(body)), ('changed', id(body)), ('removed', id(body)), ('cleared', None)]
+
+
+def test_bodies_register_in_the_current_context(context):
+    earth = Planet('earth')
+    with registry.Context('other') as other:
+        mars = Planet('mars')
+    assert list(Planet._instances) == [earth]
+    assert list(other.get('planet')) == [mars]
+    assert registry.current() is context
+
+
+def test_context_dispose():
+    with registry.Context('other') as other:
+        ss = SolarSystem()
+        assert len(Planet._instances) == 8
+    assert len(other.get('planet')) == 8 and len(other.get('systems')) == 1
+    other.dispose()
+    assert other.registries == {}
+    assert len(ss.planets) == 8
+
+
+def test_solar_system_dispose():
+    ss = SolarSystem()
+    assert len(Sun._instances) == 1 and len(Planet._instances) == 8 and len(Moon._instances) == len(ss.moons) > 0
+    ss.dispose()
+    assert len(Sun._instances) == len(Planet._instances) == len(Moon._instances) == len(SolarSystem._instances) == 0
+    assert ss.planets == [] and ss.sun == None
+
+
+def test_discarded_systems_are_collected():
+    for i in range(5):
+        ss = SolarSystem()
+        ss.scale_solar_system()
+        [p.view({'planet': {'scale_dist': 1}}) for p in ss.planets]
+    del ss
+    gc.collect()
+    assert len(Sun._instances) == len(Planet._instances) == len(Moon._instances) == len(SolarSystem._instances) == 0
+
+
+def test_solar_system_context():
+    other = registry.Context('other')
+    ss = SolarSystem(context=other)
+    assert ss.context is other
+    assert list(other.get('systems')) == [ss]
+    assert len(other.get('planet')) == 8 and len(Planet._instances) == 0
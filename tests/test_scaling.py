@@ -0,0 +1,197 @@
+# raw values, scaled views, bulk scaling and scale profiles
+import math, pickle
+import numpy as np
+import pytest
+import scaling
+from planet import Planet
+from moon import Moon
+from sun import Sun
+
+
+def test_raw_values_are_read_only():
+    earth = Planet('earth')
+    with pytest.raises(TypeError):
+        earth._raw['semimajorAxis'] = 1.0
+    with pytest.raises(TypeError):
+        earth._raw.update(semimajorAxis=1.0)
+
+
+def test_scaling_does_not_compound():
+    earth = Planet('earth')
+    raw = earth.semimajorAxis
+    earth.scale_planet()
+    scaled = earth.semimajorAxis
+    earth.scale_planet()
+    assert earth.semimajorAxis == scaled
+    assert earth._raw['semimajorAxis'] == raw
+    assert scaled == raw / 10**earth.default_scale_data['planet']['scale_dist']
+
+
+def test_view_leaves_body_unscaled():
+    earth = Planet('earth')
+    view = earth.view({'planet': {'scale_dist': 2}})
+    assert view.semimajorAxis == earth._raw['semimajorAxis'] / 100
+    assert earth.semimajorAxis == earth._raw['semimajorAxis']
+    assert view.englishName == 'Earth'
+    with pytest.raises(AttributeError):
+        view.semimajorAxis = 1.0
+
+
+def test_view_matches_scale_planet():
+    earth, scale_data = Planet('earth'), {'planet': {'scale_dist': 2, 'scale_mass': 4}}
+    view = earth.view(scale_data)
+    earth.scale_planet(scale_data)
+    for name, value in view.values().items():
+        assert getattr(earth, name) == value, name
+
+
+def test_views_are_cached_and_bounded():
+    earth = Planet('earth')
+    view = earth.view({'planet': {'scale_dist': 2}})
+    assert earth.view({'planet': {'scale_dist': 2}}) is view
+    [earth.view({'planet': {'scale_dist': i}}) for i in range(scaling.VIEW_CACHE_SIZE + 2)]
+    assert len(earth._views) == scaling.VIEW_CACHE_SIZE
+
+
+def test_views_are_not_pickled():
+    earth = Planet('earth')
+    earth.view({'planet': {'scale_dist': 2}})
+    copy = pickle.loads(pickle.dumps(earth))
+    assert len(copy._views) == 0
+    assert copy._raw == earth._raw
+    assert isinstance(copy._raw, scaling.RawData)
+
+
+def test_sun_view():
+    sun = Sun()
+    view = sun.view()
+    sun.scale_sun()
+    assert view.massRawKG == sun.massRawKG
+    assert sun._raw['massRawKG'] == scaling.magnitude(1.989, 30)
+
+
+SCALED = ('semimajorAxis', 'semiminorAxis', 'massRawKG', 'volumeRawKG', 'massExponent', 'volExponent', 'meanRadius', 'equaRadius')
+
+
+@pytest.mark.parametrize('objtype', ['sun', 'planet', 'moon'])
+def test_scale_columns_matches_scale_values(objtype):
+    Planet.make_planets(prefetch=True)
+    objs = {'sun': [Sun()], 'planet': list(Planet._instances), 'moon': list(Moon._instances)}[objtype]
+    scale = {'scale_mass': 8.5, 'scale_vol': 7.25, 'scale_dist': 3.2, 'scale_size': 1.5}
+    groups = tuple(scaling.SCALE_GROUPS[objtype])
+    fields = set(('massValue',) + (('volValue',) if 'vol' in groups else ()))
+    [fields.update(scaling.SCALE_GROUPS[objtype][group]) for group in groups]
+    columns = scaling.scale_columns(objtype, scaling.raw_columns(objs, fields), scale, groups)
+    for i, obj in enumerate(objs):
+        expected = scaling.scale_values(objtype, obj._raw, scale, groups)
+        for name, values in columns.items():
+            assert values[i] == expected[name], (obj.englishName, name)
+
+
+def test_scale_moons_matches_scale_moon():
+    Planet.make_planets(prefetch=True)
+    moons = list(Moon._instances)
+    expected = []
+    for moon in moons:
+        moon.scale_moon()
+        expected.append(dict((k, moon.__dict__[k]) for k in SCALED + ('scaleDistExp', 'scaleMassExp')))
+        moon.__dict__.update(moon._raw)
+    Moon.scale_moons()
+    for moon, values in zip(moons, expected):
+        for name, value in values.items():
+            assert moon.__dict__[name] == value, (moon.englishName, name)
+            assert type(moon.__dict__[name]) == type(value), (moon.englishName, name)
+
+
+def test_scale_planets_matches_scale_planet():
+    planets = Planet.make_planets()
+    expected = [dict((k, getattr(p.scale_planet(Planet._default_scale_data), k)) for k in SCALED) for p in planets]
+    [p.__dict__.update(p._raw) for p in planets]
+    Planet.scale_planets(Planet._default_scale_data, do_moons=False)
+    assert [dict((k, getattr(p, k)) for k in SCALED) for p in planets] == expected
+
+
+def test_scale_many_empty():
+    assert scaling.scale_many([], 'moon', Moon._default_scale_data['moon']) == []
+
+
+def test_profile_is_cached_and_hashable():
+    defaults = Planet._default_scale_data
+    compiled = scaling.profile(defaults, {'planet': {'scale_dist': 2}})
+    assert scaling.profile(defaults, {'planet': {'scale_dist': 2}}) is compiled
+    assert scaling.profile(defaults, compiled) is compiled
+    assert compiled == scaling.ScaleProfile(compiled.todict())
+    assert hash(compiled) == hash(scaling.ScaleProfile(compiled.todict()))
+    assert compiled != scaling.profile(defaults, {'planet': {'scale_dist': 3}})
+    assert pickle.loads(pickle.dumps(compiled)) == compiled
+    assert pickle.loads(pickle.dumps(compiled)).digest == compiled.digest
+
+
+def test_profile_matches_merge_attributes():
+    import utilz
+    defaults, overrides = Planet._default_scale_data, {'planet': {'scale_dist': 2}, 'moon': {'debug': True}, 'sun': {'scale_mass': 1}}
+    assert scaling.profile(defaults, overrides).todict() == utilz.merge_attributes(defaults, overrides)
+
+
+@pytest.mark.parametrize('scale_data', [
+    {'planet': {'scale_dst': 1}},
+    {'planet': {'scale_dist': 'x'}},
+    {'planet': {'scale_dist': float('nan')}},
+    {'planet': {'scale_dist': True}},
+    {'planet': {'debug': 1}},
+    {'planet': 3},
+])
+def test_profile_rejects_invalid_scale_data(scale_data):
+    with pytest.raises(ValueError):
+        scaling.profile(Planet._default_scale_data, scale_data)
+
+
+def test_profile_is_immutable():
+    compiled = scaling.profile(Planet._default_scale_data)
+    with pytest.raises(AttributeError):
+        compiled.digest = 'x'
+    with pytest.raises(TypeError):
+        compiled['planet']['scale_dist'] = 1
+
+
+def test_profile_and_dict_scale_alike():
+    earth = Planet('earth')
+    compiled = scaling.profile(earth.default_scale_data, {'planet': {'scale_dist': 2}})
+    assert earth.view(compiled) is earth.view({'planet': {'scale_dist': 2}})
+    assert earth.scale_planet(compiled).semimajorAxis == earth.view(compiled).semimajorAxis
+
+
+def test_magnitudes_match_magnitude():
+    rng = np.random.default_rng(7)
+    values = rng.uniform(0.1, 9.99, 500)
+    exponents = np.concatenate([rng.integers(-30, 30, 400), rng.uniform(-12, 25, 100)])
+    vector = scaling.magnitudes(values, exponents)
+    assert vector.tolist() == [scaling.magnitude(v, e) for v, e in zip(values.tolist(), exponents.tolist())]
+    assert scaling.magnitudes(values, 3).tolist() == [scaling.magnitude(v, 3) for v in values.tolist()]
+
+
+def test_magnitude_is_exact():
+    # no string round trip, small magnitudes keep every digit
+    assert scaling.magnitude(1.234567891234, 22) == 1.234567891234 * 10.0**22
+    assert scaling.magnitude(7.3476731, -12) == 7.3476731 / 1e12 and scaling.magnitude(7.3476731, -12) != 0.0
+    assert scaling.magnitude(5.0, -30) > 0.0
+    assert type(scaling.magnitude(5, 2)) == float
+
+
+def test_orbit():
+    au, harmonic = scaling.orbit(149598023, 365.256)
+    assert au == 149598023 * scaling.KM_IN_AU and au == pytest.approx(1.0, rel=1e-3)
+    assert harmonic == au**3 / 365.256**2
+
+
+def test_constructors_use_the_numeric_core():
+    planets = Planet.make_planets()
+    for body in planets + [m for p in planets for m in p.moonData] + [Sun()]:
+        assert body.massRawKG == scaling.magnitude(body.massValue, body.massExponent)
+        if 'volValue' in body.__dict__:
+            assert body.volumeRawKG == scaling.magnitude(body.volValue, body.volExponent)
+        if 'semiminorAxis' in body.__dict__:
+            # NOTE: no silent rounding, the semi-minor axis keeps its fractional km
+            assert body.semiminorAxis == body.semimajorAxis * math.sqrt(1 - body.eccentricity**2)
+    for planet in planets:
+        assert (planet.distanceFromSunInAU, planet.harmonicFrequency) == scaling.orbit(planet.semimajorAxis, planet.sideralOrbit)
@@ -0,0 +1,61 @@
+# compiled payload schemas
+import copy
+import pytest
+import data
+import schema
+from planet import Planet
+from moon import Moon
+from sun import Sun
+
+
+def codes(reasons) -> list:
+    return [f"{i.code}:{i.field}" for i in reasons]
+
+
+@pytest.mark.parametrize('objtype, name', [('planet', 'earth'), ('moon', 'jupitermoon1'), ('sun', 'sun')])
+def test_valid_payloads(api, objtype, name):
+    assert schema.validate(objtype, api[name]) == []
+    assert schema.VALIDATORS[objtype](api[name])
+
+
+@pytest.mark.parametrize('change, expected', [
+    ({'mass': None}, ['null:mass']),
+    ({'mass': {'massValue': True, 'massExponent': 20}}, ['type:mass.massValue']),
+    ({'mass': {'massValue': 1.0}}, ['missing:mass.massExponent']),
+    ({'vol': {'volValue': 1.0, 'volExponent': 2.5}}, ['type:vol.volExponent']),
+    ({'semimajorAxis': float('nan')}, ['value:semimajorAxis']),
+    ({'meanRadius': -1.0}, ['value:meanRadius']),
+    ({'englishName': 3}, ['type:englishName']),
+    ({'aroundPlanet': {'planet': None}}, ['null:aroundPlanet.planet']),
+    ({'aroundPlanet': None}, []),
+])
+def test_invalid_moon_payloads(api, change, expected):
+    payload = dict(copy.deepcopy(api['jupitermoon1']), **change)
+    assert codes(schema.validate('moon', payload)) == expected
+
+
+def test_missing_fields_and_non_dict_payloads(api):
+    payload = dict(api['earth'])
+    del payload['eccentricity']
+    assert codes(schema.validate('planet', payload)) == ['missing:eccentricity']
+    assert codes(schema.validate('planet', None)) == ['payload:']
+    assert codes(schema.validate('planet', '{"id": "earth"}')) == ['payload:']
+
+
+def test_invalid_planets_are_skipped(api, monkeypatch):
+    fetch = data.get_planet_data
+    monkeypatch.setattr(data, 'get_planet_data', lambda name, debug=False: dict(fetch(name), mass=None) if name == 'mars' else fetch(name))
+    planets = Planet.make_planets()
+    assert [p.englishName for p in planets] == [p.englishName for p in Planet._instances] and 'Mars' not in [p.englishName for p in planets]
+    assert [(i['name'], codes(i['reasons'])) for i in Planet.rejected] == [('mars', ['null:mass'])]
+    mars = Planet('mars', payload=dict(api['mars'], mass=None))
+    assert mars not in Planet._instances and not hasattr(mars, '_raw')
+    Planet.make_planets(parallel=True, workers=2)
+    assert [i['name'] for i in Planet.rejected] == ['mars']
+
+
+def test_invalid_bodies_are_not_built(api):
+    moon = Moon('x/badmoon')
+    assert not hasattr(moon, 'id') and moon not in Moon._instances
+    sun = Sun(payload=dict(api['earth'], vol=None))
+    assert not hasattr(sun, 'id') and sun not in Sun._instances
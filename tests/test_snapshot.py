@@ -0,0 +1,114 @@
+# solar system snapshots: round trips, partial reads and corrupt files
+import gc
+import pytest
+import registry
+import snapshot
+from planet import Planet
+from solarsystem import SolarSystem
+
+
+def state(obj) -> dict:
+    return dict((k, v) for k, v in obj.__dict__.items() if k not in ('moonData', '_views'))
+
+
+def same_system(a: SolarSystem, b: SolarSystem):
+    assert a.name == b.name and a.user_scale_data == b.user_scale_data
+    assert state(a.sun) == state(b.sun)
+    assert [state(p) for p in a.planets] == [state(p) for p in b.planets]
+    assert [state(m) for m in a.moons] == [state(m) for m in b.moons]
+    assert [[m.englishName for m in p.moonData] for p in a.planets] == [[m.englishName for m in p.moonData] for p in b.planets]
+
+
+@pytest.fixture
+def system():
+    ss = SolarSystem('snap', scale_data={'planet': {'scale_dist': 2}})
+    ss.scale_solar_system()
+    return ss
+
+
+def test_save_and_load(system, tmp_path):
+    path = str(tmp_path / 'system.snap')
+    toc = system.save(path)
+    assert len(toc['bodies']) == 1 + len(system.planets) + len(system.moons)
+    with registry.Context('load') as other:
+        loaded = SolarSystem.load(path)
+    same_system(loaded, system)
+    assert len(other.get('planet')) == len(system.planets)
+    assert loaded.planets[0].view() is not system.planets[0].view()
+
+
+def test_loaded_systems_are_pinned(system, tmp_path):
+    path = str(tmp_path / 'system.snap')
+    system.save(path)
+    with registry.Context('load') as other:
+        SolarSystem.load(path)
+    gc.collect()
+    assert len(other.get('planet')) == len(system.planets)
+    assert len(other.get('systems')) == 1
+
+
+def test_dumps_and_loads(system):
+    with registry.Context('load'):
+        loaded = SolarSystem.loads(system.dumps())
+    same_system(loaded, system)
+
+
+def test_read_body(system, tmp_path):
+    path = str(tmp_path / 'system.snap')
+    system.save(path)
+    jupiter = snapshot.read_body(path, 'planet', 'Jupiter')
+    assert state(jupiter) == state(Planet.byname('Jupiter'))
+    assert [m.englishName for m in jupiter.moonData] == [f"Jupitermoon{i}" for i in range(6)]
+    assert jupiter not in Planet._instances
+    assert snapshot.contents(path)['hierarchy']['planet:Earth'] == ['moon:Earthmoon0']
+    with pytest.raises(KeyError):
+        snapshot.read_body(path, 'planet', 'Vulcan')
+
+
+def test_corrupt_snapshots(system, tmp_path):
+    path, bad = str(tmp_path / 'system.snap'), tmp_path / 'bad.snap'
+    system.save(path)
+    bad.write_bytes(b'x' * 40)
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.read(str(bad))
+    corrupt = bytearray(open(path, 'rb').read())
+    corrupt[100] ^= 1
+    bad.write_bytes(bytes(corrupt))
+    with registry.Context('load') as other:
+        with pytest.raises(snapshot.SnapshotError):
+            SolarSystem.load(str(bad))
+    assert len(other.get('planet')) == 0
+
+
+def test_mapped_save_and_load(system, tmp_path):
+    path = str(tmp_path / 'mapped.snap')
+    system.save(path, mapped=True)
+    assert snapshot.is_mapped(path)
+    with registry.Context('load'):
+        loaded = SolarSystem.load(path)
+    same_system(loaded, system)
+
+
+def test_mapped_columns_match_bodies(system, tmp_path):
+    path = str(tmp_path / 'mapped.snap')
+    system.save(path, mapped=True)
+    with snapshot.MappedSnapshot(path) as snap:
+        assert snap.count('planet') == len(system.planets) and snap.count('moon') == len(system.moons)
+        assert snap.column('moon', 'meanRadius').tolist() == [m.meanRadius for m in system.moons]
+        assert snap.column('planet', '_raw.semimajorAxis').tolist() == [p._raw['semimajorAxis'] for p in system.planets]
+        earth = snap.byname('planet', 'Earth')
+        assert earth.meanRadius == Planet.byname('Earth').meanRadius and earth.mass == Planet.byname('Earth').mass
+        assert [m.englishName for m in snap.moons_of(4)] == [f"Jupitermoon{i}" for i in range(6)]
+        assert state(earth.materialize()) == state(Planet.byname('Earth'))
+        assert snap.byname('planet', 'Vulcan') == None
+        with pytest.raises(AttributeError):
+            earth.meanRadius = 1.0
+        with pytest.raises(IndexError):
+            snap.body('planet', len(system.planets))
+
+
+def test_mapped_bad_magic(system, tmp_path):
+    path = str(tmp_path / 'system.snap')
+    system.save(path)
+    with pytest.raises(snapshot.SnapshotError):
+        snapshot.MappedSnapshot(path)
@@ -0,0 +1,154 @@
+# SolarSystem clones, per-system registries and cached queries
+import gc, weakref
+import data
+import registry
+from planet import Planet
+from solarsystem import SolarSystem
+
+
+def state(obj) -> dict:
+    return dict((k, v) for k, v in obj.__dict__.items() if k not in ('moonData', '_views'))
+
+
+def bodies(ss: SolarSystem) -> list:
+    return [ss.sun] + ss.planets + ss.moons
+
+
+def test_clone_scales_independently(monkeypatch):
+    ss = SolarSystem()
+    before = [state(i) for i in bodies(ss)]
+    monkeypatch.setattr(data, 'get_planet_data', lambda *args, **kwargs: None)
+    monkeypatch.setattr(data, 'get_moon_data', lambda *args, **kwargs: None)
+    clone = ss.clone({'planet': {'scale_dist': 2}, 'moon': {'scale_size': 1}})
+    assert [state(i) for i in bodies(ss)] == before
+    assert all(a is not b and a._raw is b._raw for a, b in zip(bodies(ss), bodies(clone)))
+    assert [[m.englishName for m in p.moonData] for p in clone.planets] == [[m.englishName for m in p.moonData] for p in ss.planets]
+    assert all(m in p.moonData for p in clone.planets for m in p.moonData) and clone.moons[0] not in ss.moons
+
+
+def test_clone_matches_a_fresh_scaled_system():
+    scale_data = {'planet': {'scale_dist': 2}, 'moon': {'scale_size': 1}}
+    clone = SolarSystem().clone(scale_data)
+    with registry.Context('fresh'):
+        fresh = SolarSystem(scale_data=scale_data)
+        fresh.scale_solar_system(scale_data)
+    assert [state(i) for i in bodies(clone)] == [state(i) for i in bodies(fresh)]
+    assert clone.user_scale_data == fresh.user_scale_data
+    assert clone.fingerprint() == fresh.fingerprint()
+
+
+def test_scale_solar_system_scales_the_sun_with_the_profile():
+    scale_data = {'sun': {'scale_mass': 3, 'scale_size': 1}}
+    clone = SolarSystem().clone(scale_data)
+    expected = SolarSystem().sun.scale_sun(scale_data)
+    assert clone.sun.massRawKG == expected.massRawKG == clone.sun._raw['massRawKG'] / 10**3
+    assert clone.sun.meanRadius == expected.meanRadius
+    SolarSystem.scale_solar_systems(scale_data)
+    assert SolarSystem._suns[0].massRawKG == expected.massRawKG
+
+
+def test_clone_without_scale_data_keeps_the_scale_state():
+    ss = SolarSystem()
+    ss.scale_solar_system({'planet': {'scale_dist': 2}})
+    clone = ss.clone()
+    assert [state(i) for i in bodies(clone)] == [state(i) for i in bodies(ss)]
+    assert ss.diff(clone) == {'added': [], 'removed': [], 'changed': []}
+
+
+def test_clone_context():
+    ss = SolarSystem()
+    other = registry.Context('other')
+    clone = ss.clone(context=other)
+    assert clone.context is other
+    assert len(other.get('planet')) == 8 and len(Planet._instances) == 8
+    assert set(map(id, other.get('moon'))) == set(map(id, clone.moons))
+
+
+def test_instance_queries_only_see_their_own_bodies():
+    a = SolarSystem()
+    b = a.clone({'planet': {'scale_size': 2}})
+    assert len(a.registries['planets']) == len(b.registries['planets']) == 8
+    assert len(SolarSystem._planets) == 16 and len(SolarSystem._objects) == 2 * len(bodies(a))
+    assert a.planets[2] in a.registries['planets'] and b.planets[2] not in a.registries['planets']
+    assert a.vals('planets', 'meanRadius') == dict((p.englishName, p.meanRadius) for p in a.planets)
+    assert b.vals('planets', 'meanRadius') == dict((p.englishName, p.meanRadius) for p in b.planets)
+    assert SolarSystem.vals('planets', 'meanRadius', labeled=False) == sorted(p.meanRadius for p in a.planets + b.planets)
+    assert a.byvalue('planets', 'meanRadius', 'val > 300') == [p for p in a.planets if p.meanRadius > 300]
+    assert SolarSystem.byvalue('planets', 'meanRadius', 'val > 300') == [p for p in a.planets + b.planets if p.meanRadius > 300]
+
+
+def test_extremes_match_min_and_max():
+    a = SolarSystem()
+    b = a.clone({'moon': {'scale_size': -1}})
+    for owner, moons in ((a, a.moons), (b, b.moons), (SolarSystem, a.moons + b.moons)):
+        assert owner.min('moons', 'meanRadius') is min(moons, key=lambda i: i.meanRadius)
+        assert owner.max('moons', 'meanRadius') is max(moons, key=lambda i: i.meanRadius)
+        assert owner.minmax('moons', 'equaRadius') == (min(moons, key=lambda i: i.equaRadius), max(moons, key=lambda i: i.equaRadius))
+
+
+def test_disposed_systems_leave_the_class_queries():
+    a = SolarSystem()
+    b = a.clone()
+    b.dispose()
+    assert len(SolarSystem._planets) == 8 and len(SolarSystem._instances) == 1
+    assert SolarSystem.vals('planets') == a.vals('planets')
+
+
+def test_queries_are_cached_until_the_system_changes():
+    ss = SolarSystem()
+    radii = ss.vals('planets', 'meanRadius')
+    radii['Vulcan'] = 1.0
+    assert 'Vulcan' not in ss.vals('planets', 'meanRadius')
+    assert ss._queries.hits == 1 and ss._queries.misses == 1
+    assert ss.min('planets', 'meanRadius') is ss.minmax('planets', 'meanRadius')[0]
+    axes = ss.vals('planets', 'semimajorAxis', labeled=False)
+    ss.scale_solar_system({'planet': {'scale_dist': 5}})
+    assert ss.vals('planets', 'semimajorAxis', labeled=False) == sorted(p.semimajorAxis for p in ss.planets) != axes
+    found = SolarSystem.byvalue('planets', 'meanRadius', 'val > 300')
+    clone = ss.clone()
+    assert len(SolarSystem.byvalue('planets', 'meanRadius', 'val > 300')) == 2 * len(found)
+
+
+def test_attribute_writes_invalidate_queries():
+    ss = SolarSystem()
+    p, moon = ss.planets[0], ss.moons[0]
+    assert ss.vals('planets', 'meanRadius')[p.englishName] != 12345.0
+    ss.max('moons', 'meanRadius')
+    p.meanRadius = 12345.0
+    moon.meanRadius = 1e9
+    assert ss.vals('planets', 'meanRadius')[p.englishName] == 12345.0
+    assert SolarSystem.vals('planets', 'meanRadius')[p.englishName] == 12345.0
+    assert ss.max('moons', 'meanRadius') is moon
+    assert Planet.top('meanRadius', 1) == [p]
+
+
+def test_cached_results_do_not_keep_bodies_alive():
+    with registry.Context('other') as other:
+        ss = SolarSystem()
+        SolarSystem.byvalue('planets', 'meanRadius', 'val > 0')
+        SolarSystem.minmax('planets', 'meanRadius')
+        ss.byvalue('moons', 'meanRadius', 'val > 0')
+        planet = weakref.ref(ss.planets[0])
+    assert len(other.caches['queries']) == 2
+    other.dispose()
+    del ss
+    gc.collect()
+    assert planet() == None
+    ss = SolarSystem()
+    SolarSystem.byvalue('planets', 'meanRadius', 'val > 0')
+    planet = weakref.ref(ss.planets[0])
+    del ss
+    gc.collect()
+    assert planet() == None
+    assert SolarSystem.byvalue('planets', 'meanRadius', 'val > 0') == []
+
+
+def test_class_queries_are_cached_per_context():
+    with registry.Context('a'):
+        a = SolarSystem()
+        radii = SolarSystem.vals('planets', 'meanRadius')
+    with registry.Context('b') as other:
+        b = SolarSystem()
+        b.scale_solar_system()
+        assert SolarSystem.vals('planets', 'meanRadius') == dict((p.englishName, p.meanRadius) for p in b.planets) != radii
+    assert 'queries' not in registry.current().caches and len(other.caches['queries']) == 1
@@ -0,0 +1,65 @@
+# incrementally maintained statistics against a full recompute
+import gc, math, random
+import numpy as np
+import pytest
+import stats
+from planet import Planet
+from moon import Moon
+
+
+def close(a: dict, b: dict):
+    for k, v in b.items():
+        assert (math.isnan(a[k]) and math.isnan(v)) or a[k] == pytest.approx(v, rel=1e-9, abs=1e-9), k
+
+
+def test_running_stats_match_numpy():
+    rng = random.Random(7)
+    running, values = stats.RunningStats(), []
+    for i in range(2000):
+        if values and rng.random() < 0.4:
+            running.remove(values.pop(rng.randrange(len(values))))
+        else:
+            values.append(float(rng.choice([rng.uniform(-1e3, 1e3), rng.randint(0, 5)])))
+            running.add(values[-1])
+        if i % 97 == 0 and len(values) > 1:
+            array = np.array(values)
+            close(running.todict(), {'count': len(values), 'mean': array.mean(), 'variance': array.var(ddof=1), 'min': array.min(), 'max': array.max()})
+
+
+def test_running_stats_empty():
+    running = stats.RunningStats([1.0])
+    running.remove(1.0)
+    assert running.count == 0 and math.isnan(running.todict()['mean']) and math.isnan(running.min)
+
+
+def test_tracker_follows_the_registry():
+    planets = Planet.make_planets()
+    summary = Planet.summary('meanRadius', verify=True)
+    assert summary['count'] == 8 and summary['max'] == max(p.meanRadius for p in planets)
+    Planet.scale_planets(do_moons=False)
+    close(Planet.summary('meanRadius', verify=True), stats.tracker('planet').recompute('meanRadius'))
+    planets[0].scale_planet({'planet': {'scale_size': 3}})
+    removed = planets.pop()
+    Planet._instances.remove(removed)
+    planets.pop()
+    gc.collect()
+    summary = Planet.summary('meanRadius', verify=True)
+    assert summary['count'] == 6
+    assert summary['mean'] == pytest.approx(np.mean([p.meanRadius for p in planets]))
+
+
+def test_moon_summary():
+    planets = Planet.make_planets(prefetch=True)
+    radii = np.array([m.meanRadius for m in Moon._instances])
+    summary = Moon.summary('meanRadius', verify=True)
+    assert summary['count'] == len(radii)
+    assert summary['std'] == pytest.approx(radii.std(ddof=1))
+
+
+def test_verify_mode_detects_drift():
+    planets = Planet.make_planets()
+    Planet.summary('meanRadius')
+    stats.tracker('planet').stats['meanRadius'].mean += 1.0
+    Planet.summary('meanRadius')
+    with pytest.raises(stats.StatsError):
+        Planet.summary('meanRadius', verify=True)